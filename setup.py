@@ -8,6 +8,8 @@ test_requires = [
 install_requires = [
     'waldur-core>=0.151.3',
     'jira>=1.0.4',
+    'numpy>=1.9',
+    'prometheus_client>=0.4.0',
 ]
 
 
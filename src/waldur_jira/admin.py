@@ -1,11 +1,11 @@
 from django.contrib import admin
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import ugettext_lazy as _, ungettext
 
 from waldur_core.core import admin as core_admin
 from waldur_core.structure import admin as structure_admin
 from django.core.exceptions import ValidationError
 
-from . import executors, models
+from . import executors, models, tasks
 
 
 class JiraPropertyAdmin(core_admin.UpdateOnlyModelAdmin,
@@ -21,7 +21,7 @@ class ProjectTemplateAdmin(JiraPropertyAdmin):
 
 
 class ProjectAdmin(structure_admin.ResourceAdmin):
-    actions = ['pull']
+    actions = ['pull', 'reconcile', 'prune_comments']
 
     class Pull(core_admin.ExecutorAdminAction):
         executor = executors.ProjectPullExecutor
@@ -34,11 +34,33 @@ class ProjectAdmin(structure_admin.ResourceAdmin):
 
     pull = Pull()
 
+    class Reconcile(core_admin.ExecutorAdminAction):
+        executor = executors.ProjectReconcileExecutor
+        short_description = _('Reconcile issues')
+
+        def validate(self, project):
+            States = models.Project.States
+            if project.state not in (States.OK, States.ERRED):
+                raise ValidationError(_('Project has to be OK or erred.'))
+
+    reconcile = Reconcile()
+
+    class PruneComments(core_admin.ExecutorAdminAction):
+        executor = executors.ProjectPruneCommentsExecutor
+        short_description = _('Prune deleted comments')
+
+        def validate(self, project):
+            States = models.Project.States
+            if project.state not in (States.OK, States.ERRED):
+                raise ValidationError(_('Project has to be OK or erred.'))
+
+    prune_comments = PruneComments()
+
 
 class IssueAdmin(structure_admin.BackendModelAdmin):
     list_filter = ('project',)
     list_display = ('backend_id', 'type', 'project', 'status', 'reporter_name', 'assignee_name')
-    actions = ['pull']
+    actions = ['pull', 'pull_in_bulk']
 
     class Pull(core_admin.ExecutorAdminAction):
         executor = executors.IssueUpdateFromBackendExecutor
@@ -46,6 +68,18 @@ class IssueAdmin(structure_admin.BackendModelAdmin):
 
     pull = Pull()
 
+    def pull_in_bulk(self, request, queryset):
+        issue_uuids = [uuid.hex for uuid in queryset.exclude(backend_id__isnull=True).values_list('uuid', flat=True)]
+        tasks.pull_issues.delay(issue_uuids)
+        message = ungettext(
+            'Pull has been scheduled for one issue.',
+            'Pull has been scheduled for %(count)d issues.',
+            len(issue_uuids)
+        )
+        self.message_user(request, message % {'count': len(issue_uuids)})
+
+    pull_in_bulk.short_description = _('Pull selected issues in bulk')
+
 
 admin.site.register(models.Priority, JiraPropertyAdmin)
 admin.site.register(models.IssueType, JiraPropertyAdmin)
@@ -0,0 +1,163 @@
+""" Resolution time and SLA compliance of issues grouped by priority, type and assignee.
+
+Columns of issues resolved within the window are streamed from the database into NumPy arrays,
+so that statistics of all groups are computed with few vectorized operations instead of Python loops.
+Results are cached per scope and window until any issue of the scope is changed.
+"""
+from __future__ import division, unicode_literals
+
+import datetime
+import hashlib
+import itertools
+import json
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import models
+
+PERCENTS = (50, 90, 99)
+# Upper bounds of buckets of resolution time histogram in hours, the last bucket is unbounded.
+HISTOGRAM_BUCKETS = (1, 4, 8, 24, 3 * 24, 7 * 24, 30 * 24)
+GROUPS = ('priority', 'type', 'assignee')
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _get_version_key(project_id):
+    return 'waldur_jira:issue_analytics_version:%s' % project_id
+
+
+def invalidate(project_id):
+    """ Drop cached analytics of all scopes which include JIRA project once current transaction is committed. """
+    transaction.on_commit(lambda: cache.set(_get_version_key(project_id), uuid.uuid4().hex, None))
+
+
+def _get_cache_key(project_ids, window):
+    keys = [_get_version_key(project_id) for project_id in project_ids]
+    versions = cache.get_many(keys)
+    # Version is never missing when analytics is cached, otherwise eviction of version could revive stale result
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    scope = json.dumps([[project_id, versions[key]] for project_id, key in zip(project_ids, keys)])
+    return 'waldur_jira:issue_analytics:%s:%s' % (window, hashlib.md5(scope.encode('utf-8')).hexdigest())
+
+
+def _get_timestamp(value):
+    return (value - EPOCH).total_seconds() if value else np.nan
+
+
+def _load_issues(projects, since):
+    """
+    Stream columns of resolved issues into array with row per issue.
+    Names of priority, type and assignee are replaced with integer codes.
+    """
+    names = {group: {} for group in GROUPS}
+    priorities = dict(models.Priority.objects.values_list('id', 'name'))
+    issue_types = dict(models.IssueType.objects.values_list('id', 'name'))
+
+    rows = (models.Issue.objects
+            .filter(project__in=projects, resolution_date__gte=since, backend_created__isnull=False)
+            .values_list('priority_id', 'type_id', 'assignee_username',
+                         'backend_created', 'resolution_date', 'resolution_sla_met')
+            .order_by()
+            .iterator())
+    values = itertools.chain.from_iterable(
+        (names['priority'].setdefault(priorities[priority_id], len(names['priority'])),
+         names['type'].setdefault(issue_types[type_id], len(names['type'])),
+         names['assignee'].setdefault(assignee, len(names['assignee'])),
+         _get_timestamp(created),
+         _get_timestamp(resolved),
+         np.nan if sla_met is None else float(sla_met))
+        for priority_id, type_id, assignee, created, resolved, sla_met in rows)
+    issues = np.fromiter(values, dtype=np.float64).reshape(-1, 6)
+
+    # Map codes back to names
+    names = {group: sorted(codes, key=codes.get) for group, codes in names.items()}
+    return issues, names
+
+
+def _get_statistics(codes, durations, sla_met, has_sla, groups_count):
+    """ Statistics of resolution time of issues grouped by integer code, each group contains some issues. """
+    counts = np.bincount(codes, minlength=groups_count)
+
+    # Issues are sorted by group and resolution time, so that nearest-rank percentiles are picked by index
+    ordered = durations[np.lexsort((durations, codes))]
+    starts = np.cumsum(counts) - counts
+    percentiles = {
+        'p%s' % percent: ordered[starts + np.maximum(np.ceil(percent / 100 * counts).astype(int), 1) - 1]
+        for percent in PERCENTS
+    }
+    mttr = np.bincount(codes, weights=durations, minlength=groups_count) / counts
+
+    with_sla = np.bincount(codes, weights=has_sla, minlength=groups_count)
+    met = np.bincount(codes, weights=sla_met, minlength=groups_count)
+
+    edges = np.array(HISTOGRAM_BUCKETS) * 3600
+    buckets_count = len(edges) + 1
+    buckets = np.searchsorted(edges, durations)
+    histograms = np.bincount(codes * buckets_count + buckets,
+                             minlength=groups_count * buckets_count).reshape(groups_count, buckets_count)
+
+    return [
+        {
+            'count': int(counts[code]),
+            'mttr': float(mttr[code]),
+            'resolution_time': {key: float(values[code]) for key, values in percentiles.items()},
+            'sla_compliance': float(met[code] / with_sla[code]) if with_sla[code] else None,
+            'histogram': histograms[code].tolist(),
+        }
+        for code in range(groups_count)
+    ]
+
+
+def compute_analytics(projects, window, now=None):
+    """
+    :param projects: queryset of JIRA projects.
+    :param window: number of days, issues resolved within this window are analyzed.
+    """
+    now = now or timezone.now()
+    issues, names = _load_issues(projects, now - datetime.timedelta(days=window))
+    created, resolved, sla_outcome = issues[:, 3], issues[:, 4], issues[:, 5]
+    durations = resolved - created
+    # Outcome of SLA is unknown if issue has no completed SLA cycle, such issues are not counted in compliance
+    has_sla = ~np.isnan(sla_outcome)
+    sla_met = np.where(has_sla, sla_outcome, 0)
+
+    analytics = {
+        'window': window,
+        'histogram_buckets': [hours * 3600 for hours in HISTOGRAM_BUCKETS],
+        'total': {
+            'count': 0,
+            'mttr': None,
+            'resolution_time': None,
+            'sla_compliance': None,
+            'histogram': [0] * (len(HISTOGRAM_BUCKETS) + 1),
+        },
+    }
+    if len(issues):
+        analytics['total'] = _get_statistics(
+            np.zeros(len(issues), dtype=int), durations, sla_met, has_sla, 1)[0]
+
+    for column, group in enumerate(GROUPS):
+        statistics = _get_statistics(issues[:, column].astype(int), durations, sla_met, has_sla,
+                                     len(names[group]))
+        analytics[group] = dict(zip(names[group], statistics))
+    return analytics
+
+
+def get_analytics(projects, window):
+    """ Analytics of JIRA projects, it is cached until issues of any of projects are changed. """
+    project_ids = sorted(projects.values_list('id', flat=True))
+    cache_key = _get_cache_key(project_ids, window)
+    analytics = cache.get(cache_key)
+    if analytics is None:
+        analytics = compute_analytics(projects, window)
+        cache.set(cache_key, analytics, settings.WALDUR_JIRA.get('ANALYTICS_CACHE_TIMEOUT', 15 * 60))
+    return analytics
@@ -8,14 +8,15 @@ class JiraConfig(AppConfig):
     service_name = 'JIRA'
 
     def ready(self):
+        from celery import signals as celery_signals
         from waldur_core.quotas import fields as quota_fields
         from waldur_core.structure import SupportedServices
         from waldur_core.structure import models as structure_models
         from waldur_core.structure.signals import resource_imported
 
         from . import handlers
-        from .backend import JiraBackend
-        SupportedServices.register_backend(JiraBackend)
+        from .backend import ConcurrentJiraBackend
+        SupportedServices.register_backend(ConcurrentJiraBackend)
 
         Issue = self.get_model('Issue')
         Comment = self.get_model('Comment')
@@ -47,6 +48,30 @@ class JiraConfig(AppConfig):
             dispatch_uid='waldur_jira.handlers.log_issue_delete',
         )
 
+        signals.post_save.connect(
+            handlers.update_issue_counters_on_save,
+            sender=Issue,
+            dispatch_uid='waldur_jira.handlers.update_issue_counters_on_save',
+        )
+
+        signals.post_delete.connect(
+            handlers.update_issue_counters_on_delete,
+            sender=Issue,
+            dispatch_uid='waldur_jira.handlers.update_issue_counters_on_delete',
+        )
+
+        signals.post_save.connect(
+            handlers.invalidate_issue_analytics,
+            sender=Issue,
+            dispatch_uid='waldur_jira.handlers.invalidate_issue_analytics_on_save',
+        )
+
+        signals.post_delete.connect(
+            handlers.invalidate_issue_analytics,
+            sender=Issue,
+            dispatch_uid='waldur_jira.handlers.invalidate_issue_analytics_on_delete',
+        )
+
         signals.post_save.connect(
             handlers.log_comment_save,
             sender=Comment,
@@ -58,3 +83,8 @@ class JiraConfig(AppConfig):
             sender=Comment,
             dispatch_uid='waldur_jira.handlers.log_comment_delete',
         )
+
+        celery_signals.task_postrun.connect(
+            handlers.push_metrics,
+            dispatch_uid='waldur_jira.handlers.push_metrics',
+        )
@@ -1,24 +1,33 @@
 from __future__ import unicode_literals, division
 
+import datetime
 import functools
+import hashlib
+import json
 import logging
+import threading
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction, IntegrityError
 from django.utils import six
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
+from django.utils.six.moves import queue
 from jira.client import _get_template_list
+from jira.resources import Comment, IssueType, dict2resource
 from jira.utils import json_loads
+from requests import RequestException
 from rest_framework import status
 
 from waldur_core.core.models import StateMixin
 from waldur_core.structure import ServiceBackend, ServiceBackendError
-from waldur_core.structure.utils import update_pulled_fields
 
 from .jira_fix import JIRA, JIRAError
-from . import models
+from . import analytics, counters, metrics, models, utils
+from .utils import UserResolver
 
 logger = logging.getLogger(__name__)
 
@@ -69,15 +78,25 @@ class JiraBackend(ServiceBackend):
     model_attachment = models.Attachment
     model_project = models.Project
 
+    # Number of JIRA requests in flight, see ConcurrentJiraBackend
+    concurrency = 1
+
+    # Minimal set of fields which is requested to compute issue fingerprint.
+    # Comments are requested because JIRA does not bump update time of issue when comment is deleted.
+    FINGERPRINT_FIELDS = 'updated,attachment,comment'
+
     def __init__(self, settings, project=None, verify=False):
         self.settings = settings
         self.project = project
         self.verify = verify
+        # Profiles of backend method calls in progress, see profiling.CallProfile
+        self.request_observers = []
 
     def sync(self):
         self.ping(raise_exception=True)
         self.pull_project_templates()
         self.pull_priorities()
+        self.pull_all_issue_types()
 
     def ping(self, raise_exception=False):
         try:
@@ -90,11 +109,32 @@ class JiraBackend(ServiceBackend):
             return True
 
     @reraise_exceptions
-    def get_resources_for_import(self):
-        return [{
-            'name': proj.name,
-            'backend_id': proj.key,
-        } for proj in self.manager.projects()]
+    def get_resources_for_import(self, refresh=False):
+        """ Catalogue of JIRA projects, it is cached per service settings. """
+        cache_key = 'waldur_jira:importable_projects:%s' % self.settings.uuid.hex
+        projects = None if refresh else cache.get(cache_key)
+        if projects is None:
+            projects = [{
+                'name': proj.name,
+                'backend_id': proj.key,
+            } for proj in self.manager.projects()]
+            cache.set(cache_key, projects, settings.WALDUR_JIRA.get('IMPORTABLE_PROJECTS_CACHE_TIMEOUT', 3600))
+        return projects
+
+    def get_importable_projects(self, name=None, refresh=False):
+        """ JIRA projects which are not registered in Waldur yet, optionally filtered by name. """
+        projects = self.get_resources_for_import(refresh=refresh)
+        if name:
+            name = name.lower()
+            projects = [project for project in projects if name in project['name'].lower()]
+
+        registered_ids = set(
+            self.model_project.objects
+            .filter(service_project_link__service__settings=self.settings,
+                    backend_id__in=[project['backend_id'] for project in projects])
+            .values_list('backend_id', flat=True)
+        )
+        return [project for project in projects if project['backend_id'] not in registered_ids]
 
     @staticmethod
     def convert_field(value, choices, mapping=None):
@@ -116,7 +156,7 @@ class JiraBackend(ServiceBackend):
             try:
                 self._manager = JIRA(
                     server=self.settings.backend_url,
-                    options={'verify': self.verify},
+                    options={'verify': self.verify, 'waldur_adapter': self.get_http_adapter()},
                     basic_auth=(self.settings.username, self.settings.password),
                     validate=False)
             except JIRAError as e:
@@ -126,6 +166,15 @@ class JiraBackend(ServiceBackend):
 
             return self._manager
 
+    def get_http_adapter(self):
+        """ Transport adapter of JIRA session, it records metrics of all requests. """
+        return metrics.InstrumentedHTTPAdapter(self.settings, self.request_observers)
+
+    def _map(self, func, items):
+        """ Apply function to each item and yield results in the original order. """
+        for item in items:
+            yield func(item)
+
     @reraise_exceptions
     def get_field_id_by_name(self, field_name):
         if not field_name:
@@ -222,38 +271,22 @@ class JiraBackend(ServiceBackend):
 
     def pull_issue_types(self, project):
         backend_project = self.get_project(project.backend_id)
+        IssueTypeSynchronizer(self, [project], {project.backend_id: backend_project.issueTypes}).perform_update()
+
+    @reraise_exceptions
+    def pull_all_issue_types(self):
+        """ Synchronize issue types of all projects of JIRA instance using single request. """
+        projects = self.model_project.objects.filter(
+            service_project_link__service__settings=self.settings).exclude(backend_id='')
+        raw_projects = self.manager._get_json('project', params={'expand': 'issueTypes'})
         backend_issue_types = {
-            issue_type.id: issue_type
-            for issue_type in backend_project.issueTypes
-        }
-        project_issue_types = {
-            issue_type.backend_id: issue_type
-            for issue_type in project.issue_types.all()
-        }
-        global_issue_types = {
-            issue_type.backend_id: issue_type
-            for issue_type in models.IssueType.objects.filter(settings=self.settings)
+            raw_project['key']: [
+                IssueType(self.manager._options, self.manager._session, raw=raw_issue_type)
+                for raw_issue_type in raw_project.get('issueTypes', [])
+            ]
+            for raw_project in raw_projects
         }
-
-        new_issue_types = set(backend_issue_types.keys()) - set(project_issue_types.keys())
-        for issue_type_id in new_issue_types:
-            if issue_type_id in global_issue_types:
-                issue_type = global_issue_types[issue_type_id]
-            else:
-                issue_type = self.import_issue_type(backend_issue_types[issue_type_id])
-                issue_type.save()
-            project.issue_types.add(issue_type)
-
-        stale_issue_types = set(project_issue_types.keys()) - set(backend_issue_types.keys())
-        project.issue_types.filter(backend_id__in=stale_issue_types).delete()
-
-        common_issue_types = set(project_issue_types.keys()) & set(backend_issue_types.keys())
-        for issue_type_id in common_issue_types:
-            issue_type = project_issue_types[issue_type_id]
-            imported_issue_type = self.import_issue_type(backend_issue_types[issue_type_id])
-            update_pulled_fields(issue_type, imported_issue_type, (
-                'name', 'description', 'icon_url', 'subtask'
-            ))
+        IssueTypeSynchronizer(self, projects, backend_issue_types).perform_update()
 
     def import_issue_type(self, backend_issue_type):
         return models.IssueType(
@@ -281,34 +314,70 @@ class JiraBackend(ServiceBackend):
         self._backend_issue_to_issue(backend_issue, issue)
         issue.save()
 
-    def create_issue_from_jira(self, project, key):
-        backend_issue = self.get_backend_issue(key)
+    @reraise_exceptions
+    def create_issues(self, issues):
+        """
+        Create several issues using single JIRA bulk request.
+        Created issues are fetched back with single search request.
+        :return: dict which maps issue to error message for issues which have not been created.
+        """
+        field_list = []
+        for issue in issues:
+            args = self._issue_to_dict(issue)
+            # Otherwise JIRA client fetches project for each issue
+            args['project'] = {'key': args['project']}
+            field_list.append(args)
+
+        created_issues = {}
+        errors = {}
+        for issue, result in zip(issues, self.manager.create_issues(field_list, prefetch=False)):
+            if result['status'] == 'Success':
+                issue.backend_id = result['issue'].key
+                created_issues[issue.backend_id] = issue
+            else:
+                errors[issue] = six.text_type(result['error'])
+
+        if not created_issues:
+            return errors
+
+        jql = 'key in (%s)' % ','.join(created_issues.keys())
+        for backend_issue in self.manager.search_issues(jql, maxResults=len(created_issues), fields='*all'):
+            issue = created_issues.pop(backend_issue.key)
+            self._backend_issue_to_issue(backend_issue, issue)
+            issue.save()
+
+        for issue in created_issues.values():
+            # Issue has been created, but it is not available yet, so store its key only.
+            issue.save(update_fields=['backend_id'])
+
+        return errors
+
+    def create_issue_from_jira(self, project, key, backend_issue=None, event_time=None, record_lag=False):
+        backend_issue = backend_issue or self.get_backend_issue(key)
         if not backend_issue:
             logger.debug('Unable to create issue with key=%s, '
                          'because it has already been deleted on backend.', key)
             return
 
         issue = self.model_issue(project=project, backend_id=key, state=StateMixin.States.OK)
-        self._backend_issue_to_issue(backend_issue, issue)
+        self._backend_issue_to_issue(backend_issue, issue, event_time, record_lag)
         try:
             issue.save()
         except IntegrityError:
             logger.debug('Unable to create issue with key=%s, '
                          'because it has been created in another thread.', key)
 
+    @reraise_exceptions
     def update_issue(self, issue):
-        backend_issue = self.get_backend_issue(issue.backend_id)
-        if not backend_issue:
+        fields = dict(summary=issue.summary, description=issue.get_description())
+        if not self._update_backend_obj('issue/%s' % issue.backend_id, {'fields': fields}):
             logger.debug('Unable to update issue with key=%s, '
                          'because it has already been deleted on backend.', issue.backend_id)
-            return
 
-        backend_issue.update(summary=issue.summary, description=issue.get_description())
+    def update_issue_from_jira(self, issue, backend_issue=None, start_time=None, event_time=None, record_lag=False):
+        start_time = start_time or timezone.now()
 
-    def update_issue_from_jira(self, issue):
-        start_time = timezone.now()
-
-        backend_issue = self.get_backend_issue(issue.backend_id)
+        backend_issue = backend_issue or self.get_backend_issue(issue.backend_id)
         if not backend_issue:
             logger.debug('Unable to update issue with key=%s, '
                          'because it has already been deleted on backend.', issue.backend_id)
@@ -321,7 +390,7 @@ class JiraBackend(ServiceBackend):
                          'because it has been updated from other thread.', issue.backend_id)
             return
 
-        self._backend_issue_to_issue(backend_issue, issue)
+        self._backend_issue_to_issue(backend_issue, issue, event_time, record_lag)
         issue.save()
 
     def delete_issue(self, issue):
@@ -332,8 +401,8 @@ class JiraBackend(ServiceBackend):
             logger.debug('Unable to delete issue with key=%s, '
                          'because it has already been deleted on backend.', issue.backend_id)
 
-    def delete_issue_from_jira(self, issue):
-        backend_issue = self.get_backend_issue(issue.backend_id)
+    def delete_issue_from_jira(self, issue, backend_issue=None):
+        backend_issue = backend_issue or self.get_backend_issue(issue.backend_id)
         if not backend_issue:
             issue.delete()
         else:
@@ -362,14 +431,12 @@ class JiraBackend(ServiceBackend):
             logger.debug('Unable to create comment issue_id=%s, backend_id=%s, '
                          'because it already exists  n Waldur.', issue.id, comment_backend_id)
 
+    @reraise_exceptions
     def update_comment(self, comment):
-        backend_comment = self.get_backend_comment(comment.issue.backend_id, comment.backend_id)
-        if not backend_comment:
+        path = 'issue/%s/comment/%s' % (comment.issue.backend_id, comment.backend_id)
+        if not self._update_backend_obj(path, {'body': comment.prepare_message()}):
             logger.debug('Unable to update comment with id=%s, '
                          'because it has already been deleted on backend.', comment.id)
-            return
-
-        backend_comment.update(body=comment.prepare_message())
 
     def update_comment_from_jira(self, comment):
         backend_comment = self.get_backend_comment(comment.issue.backend_id, comment.backend_id)
@@ -422,36 +489,11 @@ class JiraBackend(ServiceBackend):
 
     @reraise_exceptions
     def import_project_issues(self, project, start_at=0, max_results=50, order=None):
-        waldur_issues = list(self.model_issue.objects.filter(project=project, backend_id__isnull=False).
-                             values_list('backend_id', flat=True))
-
         jql = 'project=%s' % project.backend_id
         if order:
             jql += ' ORDER BY %s' % order
 
-        for backend_issue in self.manager.search_issues(jql, startAt=start_at, maxResults=max_results, fields='*all'):
-            key = backend_issue.key
-            if key in waldur_issues:
-                logger.debug('Skipping import of issue with key=%s, '
-                             'because it already exists in Waldur.', key)
-                continue
-
-            issue = self.model_issue(project=project, backend_id=key, state=StateMixin.States.OK)
-            self._backend_issue_to_issue(backend_issue, issue)
-            issue.save()
-
-            attachment_synchronizer = AttachmentSynchronizer(self, issue, backend_issue)
-            attachment_synchronizer.perform_update()
-
-            for backend_comment in backend_issue.fields.comment.comments:
-                tmp = issue.comments.model()
-                tmp.clean_message(backend_comment.body)
-                issue.comments.create(
-                    user=tmp.user,
-                    message=tmp.message,
-                    created=parse_datetime(backend_comment.created),
-                    backend_id=backend_comment.id,
-                    state=issue.comments.model.States.OK)
+        IssueImportPipeline(self, project, jql, start_at=start_at, limit=max_results).run()
 
     def _import_project(self, project_backend_id, service_project_link, state):
         backend_project = self.get_project(project_backend_id)
@@ -474,6 +516,18 @@ class JiraBackend(ServiceBackend):
                                        models.Project.States.OK)
         return project
 
+    def pull_imported_project(self, project):
+        """ Fetch metadata of project registered as placeholder and prepare batch import of its issues. """
+        backend_project = self.get_project(project.backend_id)
+        self._backend_project_to_project(backend_project, project)
+        project.action_details = {
+            'issues_count': self.get_issues_count(project.backend_id),
+            'current_issue': 0,
+            'percentage': 0,
+        }
+        project.runtime_state = ''
+        project.save()
+
     def import_project_batch(self, project):
         max_results = settings.WALDUR_JIRA.get('ISSUE_IMPORT_LIMIT')
         start_at = project.action_details.get('current_issue', 0)
@@ -502,13 +556,148 @@ class JiraBackend(ServiceBackend):
     def get_backend_attachment(self, attachment_backend_id):
         return self._get_backend_obj('attachment')(attachment_backend_id)
 
-    def update_attachment_from_jira(self, issue):
-        backend_issue = self.get_backend_issue(issue.backend_id)
+    def update_attachment_from_jira(self, issue, backend_issue=None):
+        backend_issue = backend_issue or self.get_backend_issue(issue.backend_id)
         AttachmentSynchronizer(self, issue, backend_issue).perform_update()
 
-    def delete_old_comments(self, issue):
-        backend_issue = self.get_backend_issue(issue.backend_id)
-        CommentSynchronizer(self, issue, backend_issue).perform_update()
+    def delete_old_comments(self, issue, backend_issue=None):
+        if backend_issue:
+            CommentSynchronizer(self, issue, backend_issue).perform_update()
+        else:
+            self._prune_deleted_comments([(issue.id, issue.backend_id)])
+
+    def prune_deleted_comments(self, project):
+        """ Delete comments which have been deleted in JIRA for all issues of the project in chunks. """
+        chunk_size = settings.WALDUR_JIRA.get('ISSUE_IMPORT_PAGE_SIZE', 50)
+        issues = list(
+            self.model_issue.objects
+            .filter(project=project, comments__backend_id__isnull=False)
+            .exclude(backend_id__isnull=True).exclude(backend_id='')
+            .distinct()
+            .order_by('id')
+            .values_list('id', 'backend_id')
+        )
+        deleted = sum(self._prune_deleted_comments(chunk) for chunk in _chunks(issues, chunk_size))
+        logger.info('%s comments deleted in JIRA have been removed from project %s.', deleted, project.backend_id)
+
+    def _prune_deleted_comments(self, issues):
+        """
+        Issue-scoped deletion of stale comments for list of issue id and key pairs.
+        Issues which are missing in JIRA are skipped, they are removed by reconciliation.
+        """
+        backend_comment_ids = self.get_comment_ids([key for _, key in issues])
+        comments = (
+            self.model_comment.objects
+            .filter(issue_id__in=[issue_id for issue_id, _ in issues], backend_id__isnull=False)
+            .values_list('id', 'issue__backend_id', 'backend_id')
+        )
+        stale_ids = [
+            comment_id for comment_id, issue_key, backend_id in comments
+            if issue_key in backend_comment_ids and backend_id not in backend_comment_ids[issue_key]
+        ]
+        if stale_ids:
+            self.model_comment.objects.filter(id__in=stale_ids).delete()
+        return len(stale_ids)
+
+    def get_comment_ids(self, issue_keys):
+        """
+        Fetch ids of comments for several issues using search requests.
+        JIRA does not allow to select fields of comments, so their bodies are transferred anyway,
+        but only raw representation is parsed and comment resources are not built.
+        :return: dict which maps issue key to set of comment ids, deleted issues are omitted.
+        """
+        raw_issues, _ = self.get_backend_issues_by_keys(issue_keys, fields='comment', json_result=True)
+        return {key: self._get_raw_comment_ids(raw_issue) for key, raw_issue in raw_issues.items()}
+
+    def _get_raw_comment_ids(self, raw_issue):
+        comment = raw_issue['fields'].get('comment') or {}
+        comments = comment.get('comments', [])
+        if comment.get('total', 0) > len(comments):
+            comments = self.iterate_issue_comments(raw_issue['key'], json_result=True)
+        return {six.text_type(raw_comment['id']) for raw_comment in comments}
+
+    @reraise_exceptions
+    def get_backend_issues_by_keys(self, keys, fields='*all', json_result=False):
+        """
+        Fetch many issues with chunked "key in (...)" searches.
+        :param json_result: whether raw representation of issues is returned instead of JIRA resources.
+        :return: tuple of dict which maps key to JIRA issue and set of keys which have not been found.
+        """
+        keys = list(keys)
+        chunk_size = settings.WALDUR_JIRA.get('ISSUE_IMPORT_PAGE_SIZE', 50)
+        backend_issues = {}
+        missing_keys = set()
+        chunks = list(_chunks(keys, chunk_size))
+        search = functools.partial(self._search_issues_by_keys, fields=fields, json_result=json_result)
+        for chunk, (chunk_issues, complete) in zip(chunks, self._map(search, chunks)):
+            backend_issues.update(chunk_issues)
+            if complete:
+                missing_keys.update(set(chunk) - set(chunk_issues))
+        return backend_issues, missing_keys
+
+    def _search_issues_by_keys(self, keys, fields, json_result=False):
+        """
+        JIRA silently caps number of issues in search page, so search results are paged.
+        :return: tuple of dict which maps key to JIRA issue and flag which is set if all results have been fetched.
+        """
+        jql = 'key in (%s)' % ','.join(keys)
+        options = {'json_result': True} if json_result else {}
+        backend_issues = {}
+        start_at = 0
+        while True:
+            # Query is not validated so that missing keys are skipped instead of failing request
+            page = self.manager.search_issues(
+                jql, startAt=start_at, maxResults=len(keys), fields=fields, validate_query=False, **options)
+            if json_result:
+                total, page = page['total'], page['issues']
+                backend_issues.update((raw_issue['key'], raw_issue) for raw_issue in page)
+            else:
+                total = getattr(page, 'total', None)
+                backend_issues.update((backend_issue.key, backend_issue) for backend_issue in page)
+            start_at += len(page)
+            if total is None or start_at >= total:
+                return backend_issues, True
+            if not page:
+                # JIRA reports more issues than it returns, so absence of remaining keys is not conclusive
+                return backend_issues, False
+
+    def pull_issues(self, issues):
+        """
+        Refresh many issues with few search requests. Issues deleted in JIRA are removed.
+        Issues which are modified in Waldur during the pull are skipped, as in update_issue_from_jira.
+        """
+        start_time = timezone.now()
+        issues = {issue.backend_id: issue for issue in issues if issue.backend_id}
+        backend_issues, missing_keys = self.get_backend_issues_by_keys(issues.keys())
+
+        # Search by old key of moved issue returns it under new key, so that old key looks missing
+        moved_keys = set(backend_issues) - set(issues)
+        if moved_keys:
+            logger.info('Issues with keys %s have been moved in JIRA.', ', '.join(sorted(moved_keys)))
+            for key in moved_keys:
+                del backend_issues[key]
+            # Issue requested by old key is returned by JIRA under its new key
+            for key in sorted(missing_keys):
+                backend_issue = self.get_backend_issue(key)
+                if backend_issue:
+                    missing_keys.discard(key)
+                    backend_issues[key] = backend_issue
+
+        current_issues = self.model_issue.objects.in_bulk([issues[key].id for key in backend_issues])
+        for key, backend_issue in backend_issues.items():
+            issue = current_issues.get(issues[key].id)
+            if issue is None:
+                continue
+            if issue.modified > start_time:
+                logger.debug('Skipping issue update with key=%s, '
+                             'because it has been updated from other thread.', key)
+                continue
+            self._backend_issue_to_issue(backend_issue, issue)
+            issue.save()
+
+        if missing_keys:
+            logger.info('Issues with keys %s have been deleted in JIRA.', ', '.join(sorted(missing_keys)))
+            self.model_issue.objects.filter(id__in=[issues[key].id for key in missing_keys]).delete()
 
     @reraise_exceptions
     def _get_backend_obj(self, method):
@@ -525,10 +714,22 @@ class JiraBackend(ServiceBackend):
             return backend_obj
         return f
 
-    def _backend_issue_to_issue(self, backend_issue, issue):
+    def _update_backend_obj(self, path, data):
+        """
+        Update JIRA object without fetching it first.
+        :return: False if object has been already deleted on backend.
+        """
+        try:
+            self.manager._session.put(self.manager._get_url(path), data=json.dumps(data))
+        except JIRAError as e:
+            if e.status_code == status.HTTP_404_NOT_FOUND:
+                return False
+            raise
+        return True
+
+    def _backend_issue_to_issue(self, backend_issue, issue, event_time=None, record_lag=False):
         priority = self._get_or_create_priority(issue.project, backend_issue.fields.priority)
         issue_type = self._get_or_create_issue_type(issue.project, backend_issue.fields.issuetype)
-        resolution_sla = self._get_resolution_sla(backend_issue)
 
         for obj in ['assignee', 'creator', 'reporter']:
             backend_obj = getattr(backend_issue.fields, obj, None)
@@ -548,9 +749,29 @@ class JiraBackend(ServiceBackend):
         issue.type = issue_type
         issue.status = backend_issue.fields.status.name or ''
         issue.resolution = (backend_issue.fields.resolution and backend_issue.fields.resolution.name) or ''
-        issue.resolution_date = backend_issue.fields.resolutiondate
-        issue.resolution_sla = resolution_sla
+        issue.resolution_date = utils.parse_jira_time(backend_issue.fields.resolutiondate)
+        self._set_resolution_sla(backend_issue, issue)
         issue.backend_id = backend_issue.key
+        issue.backend_fingerprint = self.get_issue_fingerprint(backend_issue)
+        issue.backend_created = utils.parse_jira_time(getattr(backend_issue.fields, 'created', None))
+        self._set_sync_time(issue, getattr(backend_issue.fields, 'updated', None), event_time, record_lag)
+
+    def _set_sync_time(self, issue, backend_updated, event_time=None, record_lag=False):
+        """
+        Record when the change of issue made in JIRA has been applied.
+        :param event_time: time of JIRA webhook event if issue is updated by webhook.
+        :param record_lag: whether change is applied as soon as it is detected, i.e. by webhook or
+        incremental synchronization. Otherwise lag would measure age of the issue rather than freshness.
+        """
+        issue.synced = timezone.now()
+        issue.webhook_latency = max((issue.synced - event_time).total_seconds(), 0) if event_time else None
+        issue.sync_lag = None
+        backend_updated = utils.parse_jira_time(backend_updated)
+        if backend_updated:
+            issue.updated = backend_updated
+            if record_lag:
+                issue.sync_lag = max((issue.synced - backend_updated).total_seconds(), 0)
+                metrics.sync_lag.labels(self.settings.uuid.hex, issue.project.backend_id).observe(issue.sync_lag)
 
     def _backend_comment_to_comment(self, backend_comment, comment):
         comment.update_message(backend_comment.body)
@@ -585,18 +806,66 @@ class JiraBackend(ServiceBackend):
             project.issue_types.add(issue_type)
         return issue_type
 
-    def _get_resolution_sla(self, backend_issue):
-        issue_settings = settings.WALDUR_JIRA.get('ISSUE')
-        field_name = self.get_field_id_by_name(issue_settings['resolution_sla_field'])
-        value = getattr(backend_issue.fields, field_name, None)
+    def get_resolution_sla_field_id(self):
+        """ Field id is cached per service settings, so that webhooks do not fetch fields from JIRA. """
+        cache_key = 'waldur_jira:resolution_sla_field:%s' % self.settings.uuid.hex
+        field_id = cache.get(cache_key)
+        if field_id is None:
+            issue_settings = settings.WALDUR_JIRA.get('ISSUE')
+            field_id = self.get_field_id_by_name(issue_settings['resolution_sla_field'])
+            cache.set(cache_key, field_id, settings.WALDUR_JIRA.get('FIELD_IDS_CACHE_TIMEOUT', 3600))
+        return field_id
+
+    def _set_resolution_sla(self, backend_issue, issue):
+        value = getattr(backend_issue.fields, self.get_resolution_sla_field_id(), None)
+        self._apply_resolution_sla(value, issue)
+
+    def _apply_resolution_sla(self, value, issue):
+        """
+        Store resolution SLA as absolute breach deadline, so that remaining time does not go stale.
+        Remaining time is stored only while SLA cycle is paused, because it does not change then.
+        Outcome of the latest completed cycle is stored as well, because deadline is cleared once cycle is completed.
+        :param value: value of resolution SLA custom field as JIRA resource.
+        """
+        cycle = getattr(value, 'ongoingCycle', None) if value else None
+        completed_cycles = getattr(value, 'completedCycles', None) if value else None
 
-        if value and hasattr(value, 'ongoingCycle'):
-            milliseconds = value.ongoingCycle.remainingTime.millis
-            if milliseconds:
-                resolution_sla = milliseconds / 1000
+        if isinstance(completed_cycles, list) and completed_cycles:
+            issue.resolution_sla_met = self._get_sla_cycle_met(completed_cycles[-1])
         else:
-            resolution_sla = None
-        return resolution_sla
+            issue.resolution_sla_met = None
+        issue.resolution_sla_deadline = None
+        issue.resolution_sla_paused = False
+        issue.resolution_sla_remaining = None
+        if not cycle:
+            return
+
+        remaining_time = getattr(getattr(cycle, 'remainingTime', None), 'millis', None)
+        if isinstance(remaining_time, six.integer_types):
+            remaining_time = datetime.timedelta(milliseconds=remaining_time)
+        else:
+            remaining_time = None
+
+        if getattr(cycle, 'paused', False) is True:
+            issue.resolution_sla_paused = True
+            issue.resolution_sla_remaining = remaining_time
+            return
+
+        breach_time = getattr(getattr(cycle, 'breachTime', None), 'epochMillis', None)
+        if isinstance(breach_time, six.integer_types):
+            issue.resolution_sla_deadline = datetime.datetime.fromtimestamp(breach_time / 1000, tz=timezone.utc)
+        elif remaining_time is not None:
+            issue.resolution_sla_deadline = timezone.now() + remaining_time
+
+    @staticmethod
+    def _get_sla_cycle_met(cycle):
+        breached = getattr(cycle, 'breached', None)
+        if isinstance(breached, bool):
+            return not breached
+        stop_time = getattr(getattr(cycle, 'stopTime', None), 'epochMillis', None)
+        breach_time = getattr(getattr(cycle, 'breachTime', None), 'epochMillis', None)
+        if isinstance(stop_time, six.integer_types) and isinstance(breach_time, six.integer_types):
+            return stop_time <= breach_time
 
     def _issue_to_dict(self, issue):
         args = dict(
@@ -630,12 +899,805 @@ class JiraBackend(ServiceBackend):
         result = self.manager._get_json('search', params=page_params, base=base)
         return result['total']
 
+    def search_all_issues(self, jql, fields='*all', page_size=50, **kwargs):
+        """
+        Iterate over all issues matching JQL query page by page.
+        Once total number of issues is known, up to `concurrency` pages are requested at once.
+        """
+        search = functools.partial(self._search_page, jql, fields, kwargs)
+        start_at = 0
+        total = None
+        try:
+            while True:
+                # JIRA may return less issues than requested, so actual page size is used as a step
+                offsets = [start_at] if total is None else range(start_at, total, page_size)[:self.concurrency]
+                pages = list(self._map(search, [(offset, page_size) for offset in offsets]))
+                for page in pages:
+                    for backend_issue in page:
+                        yield backend_issue
+
+                    start_at += len(page)
+                    total = page.total
+                    if not page or start_at >= total:
+                        return
+                    if len(page) < page_size:
+                        # Issues of subsequent pages are shifted, so they are requested again
+                        page_size = len(page)
+                        break
+        except JIRAError as e:
+            six.reraise(JiraBackendError, e)
+
+    def _search_page(self, jql, fields, kwargs, offset_and_size):
+        start_at, page_size = offset_and_size
+        return self.manager.search_issues(jql, startAt=start_at, maxResults=page_size, fields=fields, **kwargs)
+
+    def iterate_issue_comments(self, issue_key, page_size=None, json_result=False):
+        """
+        Iterate over all comments of the issue using dedicated paginated endpoint.
+        :param json_result: whether raw representation of comments is yielded instead of JIRA resources.
+        """
+        page_size = page_size or settings.WALDUR_JIRA.get('COMMENT_PAGE_SIZE', 100)
+        params = {'startAt': 0, 'maxResults': page_size}
+        try:
+            while True:
+                page = self.manager._get_json('issue/%s/comment' % issue_key, params=params)
+                for raw in page['comments']:
+                    yield raw if json_result else Comment(self.manager._options, self.manager._session, raw=raw)
+
+                params['startAt'] += len(page['comments'])
+                if not page['comments'] or params['startAt'] >= page['total']:
+                    return
+        except JIRAError as e:
+            six.reraise(JiraBackendError, e)
+
+    def get_issue_comments(self, backend_issue):
+        """
+        All comments of the issue. JIRA caps the list embedded into issue representation,
+        so remaining comments are fetched page by page only if it is incomplete.
+        """
+        comment = backend_issue.fields.comment
+        if getattr(comment, 'total', 0) <= len(comment.comments):
+            return comment.comments
+        return list(self.iterate_issue_comments(backend_issue.key))
+
+    @staticmethod
+    def get_issue_fingerprint(backend_issue):
+        """
+        Digest of issue key, update timestamp, attachments count and comments count.
+        It is computed from the fields listed in FINGERPRINT_FIELDS only.
+        """
+        fields = backend_issue.fields
+        return JiraBackend.compute_issue_fingerprint(
+            backend_issue.key, getattr(fields, 'updated', ''), getattr(fields, 'attachment', None),
+            getattr(getattr(fields, 'comment', None), 'total', None))
+
+    @staticmethod
+    def compute_issue_fingerprint(key, updated, attachments, comments_total):
+        value = '%s|%s|%s|%s' % (key, updated or '', len(attachments) if isinstance(attachments, list) else 0,
+                                 comments_total if isinstance(comments_total, six.integer_types) else 0)
+        return hashlib.md5(value.encode('utf-8')).hexdigest()  # nosec
+
+    @reraise_exceptions
+    def sync_issues(self):
+        InstanceIssueSync(self).run()
+
+    @reraise_exceptions
+    def reconcile_project(self, project):
+        ProjectReconciler(self, project).run()
+
+
+class ConcurrentJiraBackend(JiraBackend):
+    """ JIRA backend which keeps several read requests in flight.
+
+    Read-heavy operations accept a batch of objects and fetch them using a pool of threads
+    which share JIRA session. Database is accessed from the calling thread only.
+    Number of concurrent requests is defined by WALDUR_JIRA['BACKEND_CONCURRENCY'] setting.
+    It is registered as backend of JIRA service, so it is used by tasks, import and reconciliation.
+    """
+
+    @cached_property
+    def concurrency(self):
+        return settings.WALDUR_JIRA.get('BACKEND_CONCURRENCY', 10)
+
+    def get_http_adapter(self):
+        return metrics.InstrumentedHTTPAdapter(self.settings, self.request_observers,
+                                               pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+
+    def _map(self, func, items):
+        """ Apply function to each item concurrently and yield results in the original order. """
+        items = list(items)
+        if not items:
+            return
+        # JIRA client is initialized in the calling thread
+        manager = self.manager  # noqa: F841
+        pool = ThreadPool(min(self.concurrency, len(items)))
+        try:
+            for result in pool.imap(func, items):
+                yield result
+        finally:
+            pool.terminate()
+
+    @reraise_exceptions
+    def prefetch_metadata(self):
+        """ Fetch custom fields and priorities concurrently. Fields are cached by the backend. """
+        self._fields, priorities = self._map(lambda func: func(), [self.manager.fields, self.manager.priorities])
+        return priorities
+
+    @reraise_exceptions
+    def get_backend_issues(self, keys):
+        """ :return: dict which maps issue key to JIRA issue or None if it has been deleted. """
+        keys = list(keys)
+        return dict(zip(keys, self._map(self.get_backend_issue, keys)))
+
+    @reraise_exceptions
+    def get_backend_comments(self, issue_backend_id, comment_ids):
+        """ :return: dict which maps comment id to JIRA comment or None if it has been deleted. """
+        comment_ids = list(comment_ids)
+        get_comment = functools.partial(self.get_backend_comment, issue_backend_id)
+        return dict(zip(comment_ids, self._map(get_comment, comment_ids)))
+
+    def download_files(self, urls):
+        """
+        Download files using JIRA session.
+        :return: list of byte streams in the same order as URLs.
+        :raises: requests.RequestException
+        """
+        return list(self._map(self._download_file, urls))
+
+    def _download_file(self, url):
+        response = self.manager._session.get(url)
+        response.raise_for_status()
+        return six.BytesIO(response.content)
+
+
+class IssueImportPipeline(object):
+    """ Import issues found by JQL query so that network and database are busy at the same time.
+
+    Stages of the pipeline:
+     - producer thread fetches search pages into bounded queue, so next page is prefetched
+       while current one is processed and memory usage does not depend on project size;
+     - attachments of each page are downloaded concurrently by a pool of threads;
+     - calling thread maps issues and inserts them and their comments in bulk.
+    """
+    QUEUE_SIZE = 2
+    PUT_TIMEOUT = 1
+
+    def __init__(self, backend, project, jql, start_at=0, limit=None, page_size=None):
+        self.backend = backend
+        self.project = project
+        self.jql = jql
+        self.start_at = start_at
+        self.limit = limit
+        self.page_size = page_size or settings.WALDUR_JIRA.get('ISSUE_IMPORT_PAGE_SIZE', 50)
+        if limit:
+            self.page_size = min(self.page_size, limit)
+        self.concurrency = backend.concurrency
+        self.user_resolver = UserResolver()
+
+    def run(self):
+        # JIRA client is initialized in the calling thread
+        manager = self.backend.manager  # noqa: F841
+        pages = queue.Queue(maxsize=self.QUEUE_SIZE)
+        stopped = threading.Event()
+        producer = threading.Thread(target=self._produce_pages, args=(pages, stopped))
+        producer.daemon = True
+        producer.start()
+
+        pool = ThreadPool(self.concurrency)
+        try:
+            while True:
+                page = pages.get()
+                if page is None:
+                    break
+                if isinstance(page, BaseException):
+                    raise page
+                self.import_page(page, pool)
+        finally:
+            stopped.set()
+            pool.terminate()
+
+    def _produce_pages(self, pages, stopped):
+        # Consumer waits until sentinel or error is queued, so it is done however the thread exits
+        result = None
+        try:
+            for page in self._fetch_pages():
+                if not self._put(pages, page, stopped):
+                    return
+        except BaseException as e:
+            result = e
+        finally:
+            self._put(pages, result, stopped)
+
+    def _put(self, pages, item, stopped):
+        """ Wait for free slot in the queue unless consumer has stopped. """
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=self.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch_pages(self):
+        start_at = self.start_at
+        end_at = self.start_at + self.limit if self.limit else None
+        while end_at is None or start_at < end_at:
+            max_results = self.page_size
+            if end_at is not None:
+                max_results = min(max_results, end_at - start_at)
+
+            page = self.backend.manager.search_issues(
+                self.jql, startAt=start_at, maxResults=max_results, fields='*all')
+            if not page:
+                return
+            yield page
+
+            start_at += len(page)
+            if page.total is not None and start_at >= page.total:
+                return
+
+    def import_page(self, backend_issues, pool):
+        model_issue = self.backend.model_issue
+        keys = [backend_issue.key for backend_issue in backend_issues]
+        existing_keys = self._get_existing_keys(keys)
+        backend_issues = [backend_issue for backend_issue in backend_issues if backend_issue.key not in existing_keys]
+        if not backend_issues:
+            return
+
+        urls = [backend_attachment.content
+                for backend_issue in backend_issues
+                for backend_attachment in self._get_backend_attachments(backend_issue)]
+        downloads = pool.map_async(self._download_file, urls)
+        # Comments of issues with long threads are fetched concurrently as well
+        comments_lists = pool.map_async(self.backend.get_issue_comments, backend_issues)
+
+        issues = []
+        for backend_issue in backend_issues:
+            issue = model_issue(project=self.project, backend_id=backend_issue.key, state=StateMixin.States.OK)
+            self.backend._backend_issue_to_issue(backend_issue, issue)
+            issues.append(issue)
+
+        # Comments are fetched before transaction is started, so that it is not kept open during requests
+        comments_map = {backend_issue.key: backend_comments
+                        for backend_issue, backend_comments in zip(backend_issues, comments_lists.get())}
+
+        with transaction.atomic():
+            issues = self._insert_issues(issues)
+            counters.add_issues(issues)
+            analytics.invalidate(self.project.id)
+            issue_ids = dict(model_issue.objects.filter(project=self.project, backend_id__in=keys)
+                             .values_list('backend_id', 'id'))
+            comments, messages = [], []
+            for issue in issues:
+                backend_comments = comments_map[issue.backend_id]
+                issue.id = issue_ids[issue.backend_id]
+                # Later saves of the issue compare counter key with stored state
+                issue.tracker.set_saved_fields()
+                for backend_comment in backend_comments:
+                    comments.append(self._get_comment(issue, backend_comment))
+                    messages.append(backend_comment.body)
+            self.backend.model_comment.clean_messages(comments, messages, self.user_resolver)
+            self.backend.model_comment.objects.bulk_create(comments)
+
+        downloaded_files = dict(zip(urls, downloads.get()))
+        backend_issues_map = {backend_issue.key: backend_issue for backend_issue in backend_issues}
+        for issue in issues:
+            backend_issue = backend_issues_map[issue.backend_id]
+            AttachmentSynchronizer(self.backend, issue, backend_issue, downloaded_files).perform_update()
+
+    def _get_existing_keys(self, keys):
+        existing_keys = set(self.backend.model_issue.objects.filter(project=self.project, backend_id__in=keys)
+                            .values_list('backend_id', flat=True))
+        for key in existing_keys:
+            logger.debug('Skipping import of issue with key=%s, '
+                         'because it already exists in Waldur.', key)
+        return existing_keys
+
+    def _insert_issues(self, issues):
+        """
+        Issues may be created by webhook concurrently, so existing ones are skipped right before insert.
+        If insert fails anyway, issues are inserted one by one.
+        :return: list of inserted issues.
+        """
+        model_issue = self.backend.model_issue
+        existing_keys = self._get_existing_keys([issue.backend_id for issue in issues])
+        issues = [issue for issue in issues if issue.backend_id not in existing_keys]
+        try:
+            with transaction.atomic():
+                model_issue.objects.bulk_create(issues)
+            return issues
+        except IntegrityError:
+            pass
+
+        inserted_issues = []
+        for issue in issues:
+            try:
+                with transaction.atomic():
+                    model_issue.objects.bulk_create([issue])
+            except IntegrityError:
+                logger.debug('Skipping import of issue with key=%s, '
+                             'because it has been created in another thread.', issue.backend_id)
+            else:
+                inserted_issues.append(issue)
+        return inserted_issues
+
+    def _get_backend_attachments(self, backend_issue):
+        return getattr(backend_issue.fields, 'attachment', None) or []
+
+    def _get_comment(self, issue, backend_comment):
+        return self.backend.model_comment(
+            issue=issue,
+            created=parse_datetime(backend_comment.created),
+            backend_id=backend_comment.id,
+            state=StateMixin.States.OK)
+
+    def _download_file(self, url):
+        """ Errors are returned instead of raised so that they are handled by AttachmentSynchronizer. """
+        try:
+            response = self.backend.manager._session.get(url)
+            response.raise_for_status()
+        except (JIRAError, RequestException) as e:
+            return e
+        return six.BytesIO(response.content)
+
+
+class IssueEventContext(object):
+    """ State shared by all handlers of single JIRA webhook event.
+
+    Backend issue is fetched lazily by get_backend_issue, so that attachment,
+    comment and field synchronizers issue at most one request for it.
+    """
+
+    def __init__(self, backend, issue_key, event_time=None):
+        """ :param event_time: time when event has been fired by JIRA, if it is specified in the payload. """
+        self.backend = backend
+        self.issue_key = issue_key
+        self.event_time = event_time
+        # Local changes made after this moment are not overwritten with fetched state.
+        self.start_time = timezone.now()
+        self._backend_issue = None
+        self._backend_issue_fetched = False
+
+    def get_backend_issue(self):
+        """ :return: JIRA issue or None if it has been deleted. It is fetched once per event. """
+        if not self._backend_issue_fetched:
+            self._backend_issue = self.backend.get_backend_issue(self.issue_key)
+            self._backend_issue_fetched = True
+        return self._backend_issue
+
+    def create_issue(self, project):
+        backend_issue = self.get_backend_issue()
+        if backend_issue:
+            self.backend.create_issue_from_jira(project, self.issue_key, backend_issue=backend_issue,
+                                                event_time=self.event_time, record_lag=True)
+        else:
+            logger.debug('Unable to create issue with key=%s, '
+                         'because it has already been deleted on backend.', self.issue_key)
+
+    def update_issue(self, issue):
+        backend_issue = self.get_backend_issue()
+        if backend_issue:
+            self.backend.update_issue_from_jira(issue, backend_issue=backend_issue, start_time=self.start_time,
+                                                event_time=self.event_time, record_lag=True)
+        else:
+            logger.debug('Unable to update issue with key=%s, '
+                         'because it has already been deleted on backend.', self.issue_key)
+
+    def update_issue_from_changelog(self, issue, items, fields):
+        """ Apply changelog without JIRA round trip or fall back to full refresh. """
+        if not IssueChangelogUpdater(self.backend, issue, fields, self.event_time).apply(items):
+            self.update_issue(issue)
+
+    def update_attachments(self, issue):
+        backend_issue = self.get_backend_issue()
+        if backend_issue:
+            AttachmentSynchronizer(self.backend, issue, backend_issue).perform_update()
+
+    def delete_old_comments(self, issue):
+        # Comment ids are fetched separately unless complete issue has been fetched already
+        backend_issue = self._backend_issue if self._backend_issue_fetched else None
+        self.backend.delete_old_comments(issue, backend_issue=backend_issue)
+
+    def delete_issue(self, issue):
+        if not self.get_backend_issue():
+            issue.delete()
+        else:
+            logger.debug('Skipping issue deletion with key=%s, '
+                         'because it still exists on backend.', self.issue_key)
+
+    def record_latency(self, event):
+        if self.event_time:
+            latency = max((timezone.now() - self.event_time).total_seconds(), 0)
+            metrics.webhook_latency.labels(self.backend.settings.uuid.hex, event).observe(latency)
+
+
+class IssueChangelogUpdater(object):
+    """ Turn changelog items of JIRA webhook into targeted update of issue fields.
+
+    Each handler returns list of updated model fields or None if change could not be mapped,
+    in this case nothing is saved and caller is expected to refresh issue completely.
+    """
+
+    HANDLERS = {
+        'status': 'update_status',
+        'priority': 'update_priority',
+        'assignee': 'update_assignee',
+        'summary': 'update_summary',
+        'description': 'update_description',
+        'resolution': 'update_resolution',
+        'issuetype': 'update_issue_type',
+    }
+
+    def __init__(self, backend, issue, fields, event_time=None):
+        self.backend = backend
+        self.issue = issue
+        # Current issue fields from webhook payload
+        self.fields = fields or {}
+        self.event_time = event_time
+
+    def apply(self, items):
+        if not items:
+            return False
+
+        # Webhooks may be retried or delivered out of order
+        updated = utils.parse_jira_time(self.fields.get('updated'))
+        if updated and self.issue.updated and updated < self.issue.updated:
+            logger.debug('Skipping changelog of issue with key=%s, '
+                         'because newer version of the issue is already stored.', self.issue.backend_id)
+            return True
+
+        update_fields = set()
+        for item in items:
+            handler = self.HANDLERS.get(item.get('fieldId'))
+            changed_fields = handler and getattr(self, handler)(item)
+            if not changed_fields:
+                return False
+            update_fields.update(changed_fields)
+
+        self.backend._set_sync_time(self.issue, self.fields.get('updated'), self.event_time, record_lag=True)
+        self.update_fingerprint()
+        update_fields.update(['modified', 'synced', 'updated', 'sync_lag', 'webhook_latency', 'backend_fingerprint'])
+        self.issue.save(update_fields=update_fields)
+        return True
+
+    @cached_property
+    def service_settings(self):
+        return self.issue.project.service_project_link.service.settings
+
+    def update_fingerprint(self):
+        # Issue is refetched by reconciliation if payload does not contain fields of fingerprint
+        if all(name in self.fields for name in ('updated', 'attachment', 'comment')):
+            self.issue.backend_fingerprint = self.backend.compute_issue_fingerprint(
+                self.issue.backend_id, self.fields['updated'], self.fields['attachment'],
+                (self.fields['comment'] or {}).get('total'))
+        else:
+            self.issue.backend_fingerprint = ''
+
+    def update_resolution_sla(self):
+        # SLA cycle is started, paused or completed by status transition, so it is taken from the payload
+        field_id = self.backend.get_resolution_sla_field_id()
+        if field_id not in self.fields:
+            return
+        value = self.fields[field_id]
+        self.backend._apply_resolution_sla(value and dict2resource(value), self.issue)
+        return ['resolution_sla_deadline', 'resolution_sla_paused', 'resolution_sla_remaining', 'resolution_sla_met']
+
+    def update_status(self, item):
+        sla_fields = self.update_resolution_sla()
+        if not sla_fields:
+            return
+        self.issue.status = item.get('toString') or ''
+        return ['status'] + sla_fields
+
+    def update_summary(self, item):
+        self.issue.summary = item.get('toString') or ''
+        return ['summary']
+
+    def update_description(self, item):
+        self.issue.description = item.get('toString') or ''
+        return ['description']
+
+    def update_resolution(self, item):
+        # Resolution date is not listed in changelog, so it is taken from the payload
+        if 'resolutiondate' not in self.fields:
+            return
+        sla_fields = self.update_resolution_sla()
+        if not sla_fields:
+            return
+        self.issue.resolution = item.get('toString') or ''
+        self.issue.resolution_date = utils.parse_jira_time(self.fields['resolutiondate'])
+        return ['resolution', 'resolution_date'] + sla_fields
+
+    def update_assignee(self, item):
+        # Changelog contains only name of assignee, so other details are taken from the payload
+        if 'assignee' not in self.fields:
+            return
+        assignee = self.fields['assignee'] or {}
+        self.issue.assignee_name = assignee.get('displayName', '')
+        self.issue.assignee_username = assignee.get('name', '')
+        self.issue.assignee_email = assignee.get('emailAddress', '')
+        return ['assignee_name', 'assignee_username', 'assignee_email']
+
+    def update_priority(self, item):
+        try:
+            self.issue.priority = models.Priority.objects.get(
+                settings=self.service_settings, backend_id=item.get('to'))
+        except models.Priority.DoesNotExist:
+            return
+        return ['priority']
+
+    def update_issue_type(self, item):
+        try:
+            self.issue.type = models.IssueType.objects.get(
+                settings=self.service_settings, backend_id=item.get('to'))
+        except models.IssueType.DoesNotExist:
+            return
+        return ['type']
+
+
+class ProjectReconciler(object):
+    """ Bring issues of JIRA project in Waldur in line with JIRA.
+
+    Fingerprints of all project issues are fetched using minimal set of fields
+    and compared with stored ones. Only issues with different fingerprint are
+    fetched completely. Issues which are missing in JIRA are deleted in bulk.
+
+    Fingerprints are paged by offset, so issues may be skipped if other ones are deleted
+    in JIRA concurrently or if search index lags behind. Therefore issues missing in fingerprints
+    are searched by key again and deleted only if they are not found either.
+    """
+
+    def __init__(self, backend, project):
+        self.backend = backend
+        self.project = project
+        self.page_size = settings.WALDUR_JIRA.get('RECONCILE_PAGE_SIZE', 1000)
+        self.chunk_size = settings.WALDUR_JIRA.get('ISSUE_IMPORT_PAGE_SIZE', 50)
+
+    def run(self):
+        stored_fingerprints = dict(
+            self.backend.model_issue.objects
+            .filter(project=self.project, backend_id__isnull=False)
+            .values_list('backend_id', 'backend_fingerprint')
+        )
+
+        jql = 'project=%s' % self.project.backend_id
+        backend_keys = set()
+        changed_keys = []
+        fingerprints = self.backend.search_all_issues(
+            jql, fields=self.backend.FINGERPRINT_FIELDS, page_size=self.page_size)
+        for backend_issue in fingerprints:
+            backend_keys.add(backend_issue.key)
+            if stored_fingerprints.get(backend_issue.key) != self.backend.get_issue_fingerprint(backend_issue):
+                changed_keys.append(backend_issue.key)
+
+        unseen_keys = sorted(set(stored_fingerprints) - backend_keys)
+        deleted_keys = set()
+
+        # Chunks of keys are searched concurrently by the backend
+        for keys in _chunks(changed_keys + unseen_keys, self.chunk_size * self.backend.concurrency):
+            backend_issues, missing_keys = self.backend.get_backend_issues_by_keys(keys)
+            # Issue may be deleted in JIRA after fingerprints have been fetched
+            self.delete_issues(missing_keys)
+            deleted_keys.update(missing_keys)
+            self.update_issues(backend_issues)
+
+        logger.info('JIRA project %s has been reconciled. Issues total: %s, changed: %s, deleted: %s.',
+                    self.project.backend_id, len(backend_keys), len(changed_keys), len(deleted_keys))
+
+    def delete_issues(self, keys):
+        for chunk in _chunks(list(keys), self.chunk_size):
+            self.backend.model_issue.objects.filter(project=self.project, backend_id__in=chunk).delete()
+
+    def update_issues(self, backend_issues, record_lag=False):
+        """ :param record_lag: whether issues are updated as soon as their changes are detected. """
+        issues = {
+            issue.backend_id: issue
+            for issue in self.backend.model_issue.objects.filter(
+                project=self.project, backend_id__in=backend_issues.keys())
+        }
+
+        synchronizers = []
+        for key, backend_issue in backend_issues.items():
+            issue = issues.get(key)
+            if issue is None:
+                issue = self.backend.model_issue(
+                    project=self.project, backend_id=key, state=StateMixin.States.OK)
+            synchronizer = CommentSynchronizer(self.backend, issue, backend_issue)
+            # Comments truncated in issue representation are fetched before transaction is started
+            comments = synchronizer.backend_comments_map  # noqa: F841
+            synchronizers.append(synchronizer)
+
+        with transaction.atomic():
+            for synchronizer in synchronizers:
+                issue = synchronizer.current_issue
+                self.backend._backend_issue_to_issue(synchronizer.backend_issue, issue, record_lag=record_lag)
+                issue.save()
+                synchronizer.perform_full_update()
+
+        # Attachments are downloaded outside of transaction, so that it is not kept open during transfer
+        for synchronizer in synchronizers:
+            issue, backend_issue = synchronizer.current_issue, synchronizer.backend_issue
+            AttachmentSynchronizer(self.backend, issue, backend_issue).perform_update()
+
+
+class InstanceIssueSync(object):
+    """ Pull issues updated since previous run for all projects of JIRA instance at once.
+
+    Single JQL search covers all projects, so number of requests depends on number
+    of changed issues only. Relative dates are used in queries in order not to depend on
+    time zone of JIRA user. Deleted issues are not detected, it is done by reconciliation.
+
+    Results are paginated by key set rather than by offset: each next query starts from update time
+    of the last fetched issue. Otherwise issues which are modified during synchronization move
+    to the end of results and shift offsets, so that other issues are skipped.
+    Relative dates have minute precision and include overlap, so issues which have been applied already
+    are skipped, and offset is used only while the condition of the query does not change.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.page_size = settings.WALDUR_JIRA.get('ISSUE_IMPORT_PAGE_SIZE', 50)
+        # Overlap with previous run in minutes which compensates clock skew and minute precision of JQL
+        self.overlap = settings.WALDUR_JIRA.get('ISSUE_SYNC_OVERLAP', 5)
+
+    def run(self):
+        projects = self.get_projects_map()
+        if not projects:
+            return
+
+        state, _ = models.IssueSyncState.objects.get_or_create(settings=self.backend.settings)
+        start_time = timezone.now()
+        condition = self.get_watermark_condition(state.watermark, start_time)
+
+        start_at = 0
+        # Update time of issues which have been applied, it is used in order to skip them on next pages
+        applied = {}
+        while True:
+            page = self.fetch_page(projects.keys(), condition, start_at)
+            new_issues = [backend_issue for backend_issue in page
+                          if applied.get(backend_issue.key) != backend_issue.fields.updated]
+            self.sync_page(new_issues, projects)
+            applied.update((backend_issue.key, backend_issue.fields.updated) for backend_issue in new_issues)
+
+            start_at += len(page)
+            if not page or start_at >= page.total:
+                break
+            if new_issues:
+                last_updated = parse_datetime(page[-1].fields.updated)
+                next_condition = self.get_watermark_condition(last_updated, timezone.now())
+                if next_condition != condition:
+                    condition, start_at = next_condition, 0
+
+        state.watermark = start_time
+        state.save(update_fields=['watermark'])
+
+    def get_projects_map(self):
+        """ Map JIRA project key to Waldur projects connected to it. """
+        projects = {}
+        queryset = (
+            self.backend.model_project.objects
+            .filter(service_project_link__service__settings=self.backend.settings,
+                    state=self.backend.model_project.States.OK)
+            .exclude(backend_id='')
+        )
+        for project in queryset:
+            projects.setdefault(project.backend_id, []).append(project)
+        return projects
+
+    def get_watermark_condition(self, watermark, start_time):
+        if not watermark:
+            return ''
+        minutes = int((start_time - watermark).total_seconds() // 60) + self.overlap
+        return ' AND updated >= "-%sm"' % minutes
+
+    def get_query(self, project_keys, condition):
+        jql = 'project in (%s)' % ','.join('"%s"' % key for key in sorted(project_keys))
+        return jql + condition + ' ORDER BY updated ASC, key ASC'
+
+    def fetch_page(self, project_keys, condition, start_at):
+        # Query is not validated so that projects deleted in JIRA do not break synchronization
+        return self.backend.manager.search_issues(
+            self.get_query(project_keys, condition), startAt=start_at, maxResults=self.page_size,
+            fields='*all', validate_query=False)
+
+    def sync_page(self, backend_issues, projects):
+        issues_by_project = {}
+        for backend_issue in backend_issues:
+            for project in projects.get(backend_issue.fields.project.key, []):
+                issues_by_project.setdefault(project, {})[backend_issue.key] = backend_issue
+
+        for project, project_issues in issues_by_project.items():
+            ProjectReconciler(self.backend, project).update_issues(project_issues, record_lag=True)
+
+
+def _chunks(items, size):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+class IssueTypeSynchronizer(object):
+    """ Apply issue types of several projects of the same JIRA instance using bulk queries.
+
+    Issue types catalogue is updated first, after that links between projects
+    and issue types are added and removed. Projects missing in the backend map are skipped.
+    """
+    FIELDS = ('name', 'description', 'icon_url', 'subtask')
+
+    def __init__(self, backend, projects, backend_issue_types):
+        self.backend = backend
+        self.projects = [project for project in projects if project.backend_id in backend_issue_types]
+        self.backend_issue_types = backend_issue_types
+
+    def perform_update(self):
+        catalogue = {
+            issue_type.id: issue_type
+            for issue_types in self.backend_issue_types.values()
+            for issue_type in issue_types
+        }
+        with transaction.atomic():
+            issue_type_ids = self.update_catalogue(catalogue)
+            self.update_links(issue_type_ids)
+
+    def update_catalogue(self, catalogue):
+        """ :return: dict which maps backend ID of issue type to its primary key. """
+        current_issue_types = {
+            issue_type.backend_id: issue_type
+            for issue_type in models.IssueType.objects.filter(settings=self.backend.settings)
+        }
+
+        new_issue_types = [
+            self.backend.import_issue_type(catalogue[backend_id])
+            for backend_id in set(catalogue) - set(current_issue_types)
+        ]
+        models.IssueType.objects.bulk_create(new_issue_types)
+
+        for backend_id in set(catalogue) & set(current_issue_types):
+            issue_type = current_issue_types[backend_id]
+            imported_issue_type = self.backend.import_issue_type(catalogue[backend_id])
+            changes = {
+                field: getattr(imported_issue_type, field)
+                for field in self.FIELDS
+                if getattr(issue_type, field) != getattr(imported_issue_type, field)
+            }
+            if changes:
+                models.IssueType.objects.filter(pk=issue_type.pk).update(**changes)
+
+        return dict(
+            models.IssueType.objects
+            .filter(settings=self.backend.settings, backend_id__in=catalogue.keys())
+            .values_list('backend_id', 'id')
+        )
+
+    def update_links(self, issue_type_ids):
+        Link = models.IssueType.projects.through
+        current_links = {
+            (project_id, issue_type_id): link_id
+            for link_id, project_id, issue_type_id in Link.objects
+            .filter(project__in=self.projects)
+            .values_list('id', 'project_id', 'issuetype_id')
+        }
+        actual_links = {
+            (project.id, issue_type_ids[issue_type.id])
+            for project in self.projects
+            for issue_type in self.backend_issue_types[project.backend_id]
+        }
+
+        Link.objects.bulk_create([
+            Link(project_id=project_id, issuetype_id=issue_type_id)
+            for project_id, issue_type_id in actual_links - set(current_links)
+        ])
+
+        stale_link_ids = [current_links[link] for link in set(current_links) - actual_links]
+        if stale_link_ids:
+            Link.objects.filter(id__in=stale_link_ids).delete()
+
 
 class AttachmentSynchronizer(object):
-    def __init__(self, backend, current_issue, backend_issue):
+    def __init__(self, backend, current_issue, backend_issue, downloaded_files=None):
         self.backend = backend
         self.current_issue = current_issue
         self.backend_issue = backend_issue
+        self.downloaded_files = downloaded_files or {}
 
     def perform_update(self):
         if self.stale_attachment_ids:
@@ -716,6 +1778,12 @@ class AttachmentSynchronizer(object):
         :return: byte stream
         :raises: requests.RequestException
         """
+        if url in self.downloaded_files:
+            content = self.downloaded_files.pop(url)
+            if isinstance(content, Exception):
+                raise content
+            return content
+
         session = self.backend.manager._session
         response = session.get(url)
         response.raise_for_status()
@@ -769,7 +1837,25 @@ class CommentSynchronizer(object):
 
     def perform_update(self):
         if self.stale_comments_ids:
-            self.backend.model_comment.objects.filter(backend_id__in=self.stale_comments_ids).delete()
+            self.backend.model_comment.objects.filter(
+                issue=self.current_issue, backend_id__in=self.stale_comments_ids).delete()
+
+    def perform_full_update(self):
+        """ Delete stale comments, add new ones and update changed ones. """
+        self.perform_update()
+
+        for comment_id in self.new_comments_ids:
+            comment = self.backend.model_comment(
+                issue=self.current_issue, backend_id=comment_id, state=StateMixin.States.OK)
+            self.backend._backend_comment_to_comment(self.get_backend_comment(comment_id), comment)
+            comment.save()
+
+        for comment_id in self.current_comments_ids & self.backend_comments_ids:
+            comment = self.get_current_comment(comment_id)
+            message = comment.message
+            self.backend._backend_comment_to_comment(self.get_backend_comment(comment_id), comment)
+            if comment.message != message:
+                comment.save()
 
     def get_current_comment(self, comment_id):
         return self.current_comments_map[comment_id]
@@ -792,7 +1878,7 @@ class CommentSynchronizer(object):
     def backend_comments_map(self):
         return {
             six.text_type(comment.id): comment
-            for comment in self.backend_issue.fields.comment.comments
+            for comment in self.backend.get_issue_comments(self.backend_issue)
         }
 
     @cached_property
@@ -802,3 +1888,7 @@ class CommentSynchronizer(object):
     @cached_property
     def stale_comments_ids(self):
         return self.current_comments_ids - self.backend_comments_ids
+
+    @cached_property
+    def new_comments_ids(self):
+        return self.backend_comments_ids - self.current_comments_ids
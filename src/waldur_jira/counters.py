@@ -0,0 +1,102 @@
+""" Denormalized counters of issues by JIRA project, status, priority and type.
+
+Counters are updated when issue is saved or deleted and when issues are imported in bulk,
+so that statistics of any number of issues are aggregated from few counter rows.
+"""
+from __future__ import unicode_literals
+
+import collections
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from . import models
+
+KEY_FIELDS = ('project_id', 'status', 'priority_id', 'type_id')
+
+
+def get_key(issue):
+    return tuple(getattr(issue, field) for field in KEY_FIELDS)
+
+
+def get_previous_key(issue):
+    """ Key of the issue as it is stored in the database, it is tracked by FieldTracker of the issue. """
+    return tuple(issue.tracker.previous(field) for field in KEY_FIELDS)
+
+
+def update_counters(deltas):
+    """ :param deltas: dict which maps counter key to change of the number of issues. """
+    for key, delta in deltas.items():
+        if not delta or None in key:
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        if models.IssueCounter.objects.filter(**lookup).update(count=F('count') + delta) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                models.IssueCounter.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            # Counter has been created concurrently
+            models.IssueCounter.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def add_issues(issues):
+    """ Count issues which have been created without signals, e.g. with bulk_create. """
+    update_counters(collections.Counter(get_key(issue) for issue in issues))
+
+
+def handle_issue_save(issue, created):
+    if created:
+        update_counters({get_key(issue): 1})
+        return
+
+    previous_key, key = get_previous_key(issue), get_key(issue)
+    if previous_key != key:
+        update_counters({previous_key: -1, key: 1})
+
+
+def handle_issue_delete(issue):
+    update_counters({get_previous_key(issue): -1})
+
+
+def rebuild_counters(projects=None):
+    """ Recalculate counters from issues, it is needed only if issues have been changed bypassing signals. """
+    issues = models.Issue.objects.all()
+    counters = models.IssueCounter.objects.all()
+    if projects is not None:
+        issues = issues.filter(project__in=projects)
+        counters = counters.filter(project__in=projects)
+
+    rows = issues.values(*KEY_FIELDS).annotate(total=Count('id')).order_by()
+    with transaction.atomic():
+        counters.delete()
+        models.IssueCounter.objects.bulk_create(
+            models.IssueCounter(count=row.pop('total'), **row) for row in rows)
+
+
+def get_statistics(projects):
+    """ Aggregate counters of JIRA projects by status, priority and type. """
+    rows = (models.IssueCounter.objects
+            .filter(project__in=projects, count__gt=0)
+            .values_list('status', 'priority__name', 'type__name')
+            .annotate(total=Sum('count'))
+            .order_by())
+
+    statistics = {
+        'total': 0,
+        'status': collections.defaultdict(int),
+        'priority': collections.defaultdict(int),
+        'type': collections.defaultdict(int),
+    }
+    for status, priority, issue_type, total in rows:
+        statistics['total'] += total
+        statistics['status'][status] += total
+        statistics['priority'][priority] += total
+        statistics['type'][issue_type] += total
+
+    # Breach of SLA depends on current time, so it is counted using index of SLA deadline
+    statistics['sla_breached'] = (models.Issue.objects
+                                  .filter(project__in=projects)
+                                  .filter_resolution_sla_breached()
+                                  .count())
+    return statistics
@@ -1,6 +1,10 @@
 from celery import chain
+from django.conf import settings
+from django.core.cache import cache
 
-from waldur_core.core import tasks, executors
+from waldur_core.core import tasks, executors, utils as core_utils
+
+from . import tasks as jira_tasks
 
 
 class ProjectCreateExecutor(executors.CreateExecutor):
@@ -27,6 +31,24 @@ class ProjectImportExecutor(executors.UpdateExecutor):
             serialized_project, 'import_project_issues', state_transition='begin_updating')
 
 
+class ProjectReconcileExecutor(executors.ActionExecutor):
+    action = 'Reconcile'
+
+    @classmethod
+    def get_task_signature(cls, project, serialized_project, **kwargs):
+        return tasks.BackendMethodTask().si(
+            serialized_project, 'reconcile_project', state_transition='begin_updating')
+
+
+class ProjectPruneCommentsExecutor(executors.ActionExecutor):
+    action = 'Prune deleted comments'
+
+    @classmethod
+    def get_task_signature(cls, project, serialized_project, **kwargs):
+        return tasks.BackendMethodTask().si(
+            serialized_project, 'prune_deleted_comments', state_transition='begin_updating')
+
+
 class ProjectDeleteExecutor(executors.DeleteExecutor):
 
     @classmethod
@@ -40,20 +62,80 @@ class ProjectDeleteExecutor(executors.DeleteExecutor):
 
 class IssueCreateExecutor(executors.CreateExecutor):
 
+    @classmethod
+    def execute(cls, issue, async=True, **kwargs):
+        if settings.WALDUR_JIRA.get('ISSUE_BULK_CREATE_WINDOW'):
+            # Bulk creation is deferred by design, therefore it is always asynchronous.
+            return IssueBatchCreateExecutor.execute(issue, **kwargs)
+        return super(IssueCreateExecutor, cls).execute(issue, async=async, **kwargs)
+
     @classmethod
     def get_task_signature(cls, issue, serialized_issue, **kwargs):
         return tasks.BackendMethodTask().si(
             serialized_issue, 'create_issue', state_transition='begin_creating')
 
 
+class IssueBatchCreateExecutor(executors.BaseExecutor):
+    """ Create issue in JIRA together with other issues of the same project.
+
+    Only one batch task per project is scheduled within ISSUE_BULK_CREATE_WINDOW.
+    Issue state is changed by the batch task.
+    """
+
+    @classmethod
+    def get_task_signature(cls, issue, serialized_issue, **kwargs):
+        serialized_project = core_utils.serialize_instance(issue.project)
+        return jira_tasks.CreateIssuesBatchTask().si(serialized_project)
+
+    @classmethod
+    def execute(cls, issue, async=True, **kwargs):
+        window = settings.WALDUR_JIRA.get('ISSUE_BULK_CREATE_WINDOW', 0)
+        cache_key = jira_tasks.get_issue_batch_cache_key(issue.project)
+        if async and not cache.add(cache_key, True, window):
+            # Issue is going to be created by already scheduled batch task.
+            return
+        return super(IssueBatchCreateExecutor, cls).execute(issue, async=async, countdown=window, **kwargs)
+
+
+class DebouncedUpdateExecutor(executors.ErrorExecutorMixin, executors.BaseExecutor):
+    """ Push instance to JIRA at most once within UPDATE_DEBOUNCE_WINDOW.
+
+    Instance state is not changed, so that it could be updated again while push is pending.
+    """
+    backend_method = NotImplemented
+
+    @classmethod
+    def get_task_signature(cls, instance, serialized_instance, **kwargs):
+        return jira_tasks.DebouncedBackendMethodTask().si(serialized_instance, cls.backend_method)
+
+    @classmethod
+    def execute(cls, instance, async=True, **kwargs):
+        window = settings.WALDUR_JIRA.get('UPDATE_DEBOUNCE_WINDOW', 0)
+        cache_key = jira_tasks.get_debounced_update_cache_key(instance)
+        if async and not cache.add(cache_key, True, window):
+            # Latest state of the instance is going to be pushed by already scheduled task.
+            return
+        return super(DebouncedUpdateExecutor, cls).execute(instance, async=async, countdown=window, **kwargs)
+
+
 class IssueUpdateExecutor(executors.UpdateExecutor):
 
+    @classmethod
+    def execute(cls, issue, async=True, **kwargs):
+        if settings.WALDUR_JIRA.get('UPDATE_DEBOUNCE_WINDOW'):
+            return IssueDebouncedUpdateExecutor.execute(issue, **kwargs)
+        return super(IssueUpdateExecutor, cls).execute(issue, async=async, **kwargs)
+
     @classmethod
     def get_task_signature(cls, issue, serialized_issue, **kwargs):
         return tasks.BackendMethodTask().si(
             serialized_issue, 'update_issue', state_transition='begin_updating')
 
 
+class IssueDebouncedUpdateExecutor(DebouncedUpdateExecutor):
+    backend_method = 'update_issue'
+
+
 class IssueUpdateFromBackendExecutor(executors.ActionExecutor):
 
     @classmethod
@@ -83,12 +165,22 @@ class CommentCreateExecutor(executors.CreateExecutor):
 
 class CommentUpdateExecutor(executors.UpdateExecutor):
 
+    @classmethod
+    def execute(cls, comment, async=True, **kwargs):
+        if settings.WALDUR_JIRA.get('UPDATE_DEBOUNCE_WINDOW'):
+            return CommentDebouncedUpdateExecutor.execute(comment, **kwargs)
+        return super(CommentUpdateExecutor, cls).execute(comment, async=async, **kwargs)
+
     @classmethod
     def get_task_signature(cls, comment, serialized_comment, **kwargs):
         return tasks.BackendMethodTask().si(
             serialized_comment, 'update_comment', state_transition='begin_updating')
 
 
+class CommentDebouncedUpdateExecutor(DebouncedUpdateExecutor):
+    backend_method = 'update_comment'
+
+
 class CommentDeleteExecutor(executors.DeleteExecutor):
 
     @classmethod
@@ -119,6 +211,23 @@ class AttachmentDeleteExecutor(executors.DeleteExecutor):
             return tasks.StateTransitionTask().si(serialized_attachment, state_transition='begin_deleting')
 
 
+class ProjectImportFromBackendExecutor(executors.CreateExecutor):
+    """ Fetch metadata and issues of project registered as placeholder during import. """
+
+    @classmethod
+    def get_task_signature(cls, project, serialized_project, **kwargs):
+        return chain(
+            tasks.BackendMethodTask().si(
+                serialized_project, 'pull_imported_project', state_transition='begin_creating'),
+            tasks.PollRuntimeStateTask().si(
+                serialized_project,
+                backend_pull_method='import_project_batch',
+                success_state='success',
+                erred_state='error',
+            ),
+        )
+
+
 class ProjectPullExecutor(executors.ActionExecutor):
     action = 'Synchronize'
 
@@ -0,0 +1,122 @@
+""" Streaming export of issues and comments in NDJSON or CSV format.
+
+Objects are read with server-side cursor as flat rows, names of related objects are joined by database,
+so that memory usage does not depend on number of exported objects and no queries are made per object.
+"""
+from __future__ import unicode_literals
+
+import csv
+import itertools
+import json
+
+import six
+
+# Name of exported column, lookup of issue field and converter of its value to JSON-compatible one
+FIELDS = (
+    ('uuid', 'uuid', lambda value: value.hex),
+    ('key', 'backend_id', None),
+    ('project', 'project__backend_id', None),
+    ('parent', 'parent__backend_id', None),
+    ('type', 'type__name', None),
+    ('priority', 'priority__name', None),
+    ('status', 'status', None),
+    ('resolution', 'resolution', None),
+    ('summary', 'summary', None),
+    ('description', 'description', None),
+    ('creator_username', 'creator_username', None),
+    ('reporter_username', 'reporter_username', None),
+    ('assignee_username', 'assignee_username', None),
+    ('created', 'backend_created', lambda value: value.isoformat()),
+    ('updated', 'updated', lambda value: value.isoformat()),
+    ('resolution_date', 'resolution_date', lambda value: value.isoformat()),
+    ('resolution_sla_deadline', 'resolution_sla_deadline', lambda value: value.isoformat()),
+    ('resolution_sla_paused', 'resolution_sla_paused', None),
+    ('resolution_sla_met', 'resolution_sla_met', None),
+)
+COMMENT_FIELDS = (
+    ('uuid', 'uuid', lambda value: value.hex),
+    ('key', 'backend_id', None),
+    ('issue_uuid', 'issue__uuid', lambda value: value.hex),
+    ('issue', 'issue__backend_id', None),
+    ('project', 'issue__project__backend_id', None),
+    ('username', 'user__username', None),
+    ('message', 'message', None),
+    ('created', 'created', lambda value: value.isoformat()),
+)
+# Rows are sent to client in batches, so that response is not flushed for every issue
+BATCH_SIZE = 1000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def get_rows(queryset, fields=FIELDS):
+    """ Iterate objects of queryset as lists of exported values. """
+    rows = queryset.values_list(*[lookup for _, lookup, _ in fields]).iterator()
+    converters = [(index, converter) for index, (_, _, converter) in enumerate(fields) if converter]
+    for row in rows:
+        row = list(row)
+        for index, converter in converters:
+            if row[index] is not None:
+                row[index] = converter(row[index])
+        yield row
+
+
+def get_batches(queryset, fields):
+    rows = get_rows(queryset, fields)
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def get_columns(fields):
+    return [name for name, _, _ in fields]
+
+
+def stream_ndjson(queryset, fields):
+    columns = get_columns(fields)
+    for batch in get_batches(queryset, fields):
+        yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in batch)
+
+
+class _Buffer(list):
+    """ File-like object which collects lines written by CSV writer. """
+
+    def write(self, value):
+        if isinstance(value, six.binary_type):
+            value = value.decode('utf-8')
+        self.append(value)
+
+    def flush(self):
+        content = ''.join(self)
+        del self[:]
+        return content
+
+
+def _encode_csv_row(row):
+    # CSV module of Python 2 does not support unicode
+    return [value.encode('utf-8') if isinstance(value, six.text_type) else value for value in row]
+
+
+def stream_csv(queryset, fields):
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(get_columns(fields))
+    yield buffer.flush()
+    for batch in get_batches(queryset, fields):
+        writer.writerows(map(_encode_csv_row, batch) if six.PY2 else batch)
+        yield buffer.flush()
+
+
+def stream(queryset, export_format, fields=FIELDS):
+    """
+    :param fields: exported fields, FIELDS of issues or COMMENT_FIELDS.
+    :return: iterator over chunks of exported content.
+    """
+    if export_format == 'csv':
+        return stream_csv(queryset, fields)
+    return stream_ndjson(queryset, fields)
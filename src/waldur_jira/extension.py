@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+from datetime import timedelta
+
 from waldur_core.core import WaldurExtension
 
 
@@ -14,7 +16,51 @@ class JiraExtension(WaldurExtension):
             'ISSUE': {
                 'resolution_sla_field': 'Time to resolution',
             },
-            'ISSUE_IMPORT_LIMIT': 10
+            'ISSUE_IMPORT_LIMIT': 10,
+            # Number of issues fetched with single search request during import.
+            'ISSUE_IMPORT_PAGE_SIZE': 50,
+            # Number of comments fetched with single request if issue has more comments than embedded by JIRA.
+            'COMMENT_PAGE_SIZE': 100,
+            # Issues created within this window (in seconds) are sent to JIRA with single bulk request.
+            # Set to 0 in order to create each issue with separate request.
+            'ISSUE_BULK_CREATE_WINDOW': 0,
+            'ISSUE_BULK_CREATE_SIZE': 50,
+            # Updates of the same issue or comment within this window (in seconds)
+            # are collapsed into single JIRA request carrying the latest state.
+            'UPDATE_DEBOUNCE_WINDOW': 0,
+            # Maximum number of JIRA requests in flight for ConcurrentJiraBackend.
+            'BACKEND_CONCURRENCY': 10,
+            # Number of issue fingerprints fetched with single search request during reconciliation.
+            'RECONCILE_PAGE_SIZE': 1000,
+            # Periodically pull issues updated in JIRA with single search across all projects of the instance.
+            'ISSUE_SYNC_ENABLED': False,
+            # Overlap of consecutive issue synchronizations in minutes.
+            'ISSUE_SYNC_OVERLAP': 5,
+            # Lifetime in seconds of cached catalogue of JIRA projects available for import.
+            'IMPORTABLE_PROJECTS_CACHE_TIMEOUT': 60 * 60,
+            # Lifetime in seconds of cached ids of JIRA custom fields, such as resolution SLA field.
+            'FIELD_IDS_CACHE_TIMEOUT': 60 * 60,
+            # Address of Prometheus Pushgateway which receives metrics of JIRA requests made by Celery workers.
+            # Metrics of web server processes are exposed at /api/jira-metrics/ endpoint.
+            'METRICS_PUSHGATEWAY': None,
+            # Minimal interval in seconds between consecutive pushes of metrics by the same worker process.
+            'METRICS_PUSH_INTERVAL': 30,
+            # Log statistics of each call of JIRA backend method made by tasks and webhooks.
+            # Profiling may be enabled with WALDUR_JIRA_PROFILING environment variable as well,
+            # or for single service settings with {"profiling": true} in their options.
+            'PROFILING_ENABLED': False,
+            # Calls which take longer than this number of seconds are logged as slow.
+            'PROFILING_SLOW_THRESHOLD': 10,
+            # Fraction of calls profiled with cProfile. Profiles of sampled calls are stored in the directory.
+            'PROFILING_SAMPLE_RATE': 0.1,
+            'PROFILING_DIRECTORY': None,
+            # Sync lag percentiles of project are computed over issues synchronized within this window (in seconds),
+            # the latest ones at most.
+            'SYNC_STATS_WINDOW': 24 * 60 * 60,
+            'SYNC_STATS_SAMPLE_SIZE': 1000,
+            # Lifetime in seconds of cached issue analytics. Cache is invalidated when issues are changed,
+            # this timeout limits staleness caused by sliding of the analyzed window.
+            'ANALYTICS_CACHE_TIMEOUT': 15 * 60,
         }
 
     @staticmethod
@@ -31,12 +77,12 @@ class JiraExtension(WaldurExtension):
         from .urls import register_in
         return register_in
 
-    # @staticmethod
-    # def celery_tasks():
-    #     return {
-    #         'waldur-import-jira-projects': {
-    #             'task': 'waldur_jira.ImportProjects',
-    #             'schedule': timedelta(minutes=1),
-    #             'args': (),
-    #         },
-    #     }
+    @staticmethod
+    def celery_tasks():
+        return {
+            'waldur-jira-sync-issues': {
+                'task': 'waldur_jira.sync_issues',
+                'schedule': timedelta(minutes=5),
+                'args': (),
+            },
+        }
@@ -1,5 +1,4 @@
 import django_filters
-from django.db.models import Q
 
 from waldur_core.core import filters as core_filters
 from waldur_core.structure import filters as structure_filters
@@ -44,17 +43,20 @@ class IssueFilter(django_filters.FilterSet):
     type_name = django_filters.CharFilter(name='type__name')
     updated_before = django_filters.IsoDateTimeFilter(name="updated", lookup_expr="lte")
     updated_after = django_filters.IsoDateTimeFilter(name="updated", lookup_expr="gte")
+    backend_created_before = django_filters.IsoDateTimeFilter(name="backend_created", lookup_expr="lte")
+    backend_created_after = django_filters.IsoDateTimeFilter(name="backend_created", lookup_expr="gte")
+    resolution_date_before = django_filters.IsoDateTimeFilter(name="resolution_date", lookup_expr="lte")
+    resolution_date_after = django_filters.IsoDateTimeFilter(name="resolution_date", lookup_expr="gte")
     user_uuid = django_filters.UUIDFilter(name='user__uuid')
     key = django_filters.CharFilter(name='backend_id')
     status = core_filters.LooseMultipleChoiceFilter()
     sla_ttr_breached = django_filters.BooleanFilter(name='resolution_sla', method='filter_resolution_sla',
                                                     widget=django_filters.widgets.BooleanWidget())
+    o = django_filters.OrderingFilter(fields=('created', 'updated', 'backend_created', 'resolution_date',
+                                              'resolution_sla'))
 
     def filter_resolution_sla(self, queryset, name, value):
-        if value:
-            return queryset.exclude(Q(resolution_sla__gte=0) | Q(resolution_sla__isnull=True))
-        else:
-            return queryset.filter(resolution_sla__gte=0)
+        return queryset.filter_resolution_sla_breached(value)
 
     class Meta(object):
         model = models.Issue
@@ -68,18 +70,12 @@ class IssueFilter(django_filters.FilterSet):
             'assignee_name',
             'reporter_name',
         ]
-        order_by = [
-            'created',
-            'updated',
-            # desc
-            '-created',
-            '-updated',
-        ]
 
 
 class CommentFilter(django_filters.FilterSet):
     issue = core_filters.URLFilter(view_name='jira-issues-detail', name='issue__uuid')
     issue_uuid = django_filters.UUIDFilter(name='issue__uuid')
+    jira_project_uuid = django_filters.UUIDFilter(name='issue__project__uuid')
     user_uuid = django_filters.UUIDFilter(name='user__uuid')
 
     class Meta(object):
@@ -0,0 +1,83 @@
+""" Freshness of issues synchronized from JIRA.
+
+Sync lag of issue is time between its latest change in JIRA and application of that change.
+It is recorded only when change is applied by webhook or incremental synchronization,
+because import and reconciliation apply changes of any age.
+Lag percentiles are computed over issues applied within SYNC_STATS_WINDOW, the latest
+SYNC_STATS_SAMPLE_SIZE of them at most, so that cost of the query does not depend on size of project.
+"""
+from __future__ import unicode_literals
+
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from prometheus_client.core import CollectorRegistry, GaugeMetricFamily
+
+from . import models, utils
+from .apps import JiraConfig
+
+
+def get_oldest_unsynced_change_age(service_settings, now=None):
+    """
+    Age in seconds of the oldest change of JIRA instance which may not be applied yet.
+    Incremental synchronization applies all changes made before its watermark,
+    so age is unknown if synchronization is disabled or has not been run yet.
+    """
+    if not settings.WALDUR_JIRA.get('ISSUE_SYNC_ENABLED'):
+        return None
+    watermark = (models.IssueSyncState.objects
+                 .filter(settings=service_settings)
+                 .values_list('watermark', flat=True).first())
+    if not watermark:
+        return None
+    return max(((now or timezone.now()) - watermark).total_seconds(), 0)
+
+
+def get_project_sync_status(project):
+    now = timezone.now()
+    window = settings.WALDUR_JIRA.get('SYNC_STATS_WINDOW', 24 * 60 * 60)
+    sample_size = settings.WALDUR_JIRA.get('SYNC_STATS_SAMPLE_SIZE', 1000)
+    samples = list(
+        models.Issue.objects
+        .filter(project=project, synced__gte=now - datetime.timedelta(seconds=window))
+        .order_by('-synced')
+        .values_list('synced', 'sync_lag', 'webhook_latency')[:sample_size]
+    )
+    lags = [lag for _, lag, _ in samples if lag is not None]
+    latencies = [latency for _, _, latency in samples if latency is not None]
+    if samples:
+        last_synced = samples[0][0]
+    else:
+        last_synced = (models.Issue.objects.filter(project=project, synced__isnull=False)
+                       .order_by('-synced').values_list('synced', flat=True).first())
+
+    return {
+        'last_synced': last_synced,
+        'sync_lag': utils.get_percentiles(lags),
+        'webhook_latency': utils.get_percentiles(latencies),
+        'oldest_unsynced_change_age': get_oldest_unsynced_change_age(
+            project.service_project_link.service.settings, now),
+    }
+
+
+class FreshnessCollector(object):
+    """ Collect age of the oldest unsynced change of each JIRA instance at scrape time. """
+
+    def collect(self):
+        gauge = GaugeMetricFamily(
+            'waldur_jira_oldest_unsynced_change_age_seconds',
+            'Age of the oldest change of JIRA instance which may not be applied yet.',
+            labels=['settings'])
+        if settings.WALDUR_JIRA.get('ISSUE_SYNC_ENABLED'):
+            now = timezone.now()
+            states = models.IssueSyncState.objects.filter(
+                settings__type=JiraConfig.service_name, watermark__isnull=False).select_related('settings')
+            for state in states:
+                gauge.add_metric([state.settings.uuid.hex], max((now - state.watermark).total_seconds(), 0))
+        yield gauge
+
+
+# Metrics which require database queries are kept separately from metrics pushed by Celery workers
+registry = CollectorRegistry()
+registry.register(FreshnessCollector())
@@ -1,3 +1,4 @@
+from . import analytics, counters, metrics
 from .executors import ProjectImportExecutor
 from .log import event_logger
 from .models import Issue
@@ -38,6 +39,21 @@ def log_issue_delete(sender, instance, **kwargs):
         })
 
 
+def update_issue_counters_on_save(sender, instance, created=False, **kwargs):
+    counters.handle_issue_save(instance, created)
+
+
+def update_issue_counters_on_delete(sender, instance, **kwargs):
+    counters.handle_issue_delete(instance)
+
+
+def invalidate_issue_analytics(sender, instance, **kwargs):
+    analytics.invalidate(instance.project_id)
+    previous_project_id = instance.tracker.previous('project_id')
+    if previous_project_id and previous_project_id != instance.project_id:
+        analytics.invalidate(previous_project_id)
+
+
 def log_comment_save(sender, instance, created=False, **kwargs):
     if created:
         event_logger.jira_comment.info(
@@ -62,3 +78,7 @@ def log_comment_delete(sender, instance, **kwargs):
         event_context={
             'comment': instance,
         })
+
+
+def push_metrics(sender, **kwargs):
+    metrics.push_metrics()
@@ -74,3 +74,22 @@ def add_attachment(manager, issue, path):
 
 
 JIRA.waldur_add_attachment = add_attachment
+
+
+_create_http_basic_session = JIRA._create_http_basic_session
+
+
+def create_http_basic_session(manager, *args, **kwargs):
+    """
+    Mount transport adapter passed in client options as 'waldur_adapter'.
+    Session is created within JIRA client constructor, so that adapter
+    is used for the very first request fetching server info as well.
+    """
+    _create_http_basic_session(manager, *args, **kwargs)
+    adapter = manager._options.get('waldur_adapter')
+    if adapter:
+        manager._session.mount('http://', adapter)
+        manager._session.mount('https://', adapter)
+
+
+JIRA._create_http_basic_session = create_http_basic_session
@@ -0,0 +1,21 @@
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from waldur_jira import counters, models
+
+
+class Command(BaseCommand):
+    help = """ Recalculate counters of JIRA issues which are used by issue statistics. """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', dest='projects', action='append', metavar='KEY',
+                            help='Key of JIRA project which counters are rebuilt, may be repeated. '
+                                 'Counters of all projects are rebuilt by default.')
+
+    def handle(self, *args, **options):
+        projects = None
+        if options['projects']:
+            projects = models.Project.objects.filter(backend_id__in=options['projects'])
+        counters.rebuild_counters(projects)
+        self.stdout.write('Issue counters have been rebuilt.')
@@ -0,0 +1,131 @@
+from __future__ import unicode_literals
+
+import logging
+import os
+import re
+import socket
+import time
+
+import six
+from django.conf import settings
+from prometheus_client import REGISTRY, Counter, Histogram, push_to_gateway
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError
+from six.moves.urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+LABELS = ('settings', 'method', 'endpoint')
+# Responses which are retried by JIRA client, see jira.resilientsession.ResilientSession
+RECOVERABLE_STATUSES = (401, 502, 503, 504)
+
+request_duration = Histogram(
+    'waldur_jira_request_duration_seconds', 'Duration of HTTP requests to JIRA.', LABELS,
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+responses = Counter(
+    'waldur_jira_responses_total', 'HTTP responses of JIRA by status code, connection errors have status "error".',
+    LABELS + ('status',))
+retries = Counter(
+    'waldur_jira_retries_total', 'Recoverable errors of JIRA requests which are retried by JIRA client.', LABELS)
+rate_limited = Counter(
+    'waldur_jira_rate_limited_total', 'JIRA requests rejected with 429 Too Many Requests.', LABELS)
+transferred_bytes = Counter(
+    'waldur_jira_transferred_bytes_total', 'Size of request and response bodies of JIRA requests.',
+    LABELS + ('direction',))
+
+# Synchronization lag spans from seconds for webhooks to minutes for periodic synchronization
+SYNC_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 4 * 3600, 24 * 3600)
+sync_lag = Histogram(
+    'waldur_jira_sync_lag_seconds', 'Time between change of issue in JIRA and its application.',
+    ('settings', 'project'), buckets=SYNC_BUCKETS)
+webhook_latency = Histogram(
+    'waldur_jira_webhook_latency_seconds', 'Time between JIRA webhook event and its application.',
+    ('settings', 'event'), buckets=SYNC_BUCKETS)
+
+
+def get_endpoint(url):
+    """
+    Path of JIRA resource with issue keys, project keys and ids replaced with placeholders.
+    Other paths are collapsed into single label value, so that number of label values is bounded.
+    """
+    path = urlparse(url).path
+    if '/secure/attachment/' in path:
+        return '/secure/attachment/{id}/{filename}'
+    if '/secure/thumbnail/' in path:
+        return '/secure/thumbnail/{id}/{filename}'
+
+    # Context path of JIRA server is dropped, API name and version are kept
+    match = re.search(r'/rest/[^/]+/[^/]+', path)
+    if not match:
+        return 'other'
+    resource = re.sub(r'^/(project|issue)/[^/]+', r'/\1/{key}', path[match.end():])
+    return match.group() + re.sub(r'/\d+(?=/|$)', '/{id}', resource)
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """ Transport adapter which records metrics of each HTTP request to JIRA, including retried ones. """
+
+    def __init__(self, service_settings, observers=(), *args, **kwargs):
+        """ :param observers: objects which record duration of each request, see profiling.CallProfile. """
+        self.settings_label = service_settings.uuid.hex
+        self.observers = observers
+        super(InstrumentedHTTPAdapter, self).__init__(*args, **kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        labels = (self.settings_label, request.method, get_endpoint(request.url))
+        started = time.time()
+        try:
+            response = super(InstrumentedHTTPAdapter, self).send(request, stream=stream, **kwargs)
+        except ConnectionError:
+            responses.labels(*labels + ('error',)).inc()
+            retries.labels(*labels).inc()
+            raise
+        finally:
+            duration = time.time() - started
+            request_duration.labels(*labels).observe(duration)
+            for observer in list(self.observers):
+                observer.record_request(duration)
+            if isinstance(request.body, (six.binary_type, six.text_type)):
+                transferred_bytes.labels(*labels + ('sent',)).inc(len(request.body))
+            _push_state.pending = True
+
+        responses.labels(*labels + (str(response.status_code),)).inc()
+        if response.status_code == 429:
+            rate_limited.labels(*labels).inc()
+        elif response.status_code in RECOVERABLE_STATUSES:
+            retries.labels(*labels).inc()
+
+        # Body of streamed response is not read in advance, its size is known from headers only
+        size = response.headers.get('Content-Length') if stream else len(response.content)
+        if size:
+            transferred_bytes.labels(*labels + ('received',)).inc(int(size))
+        return response
+
+
+class _PushState(object):
+    pending = False
+    pushed_at = 0
+
+
+_push_state = _PushState()
+
+
+def push_metrics():
+    """
+    Push metrics of current process to Prometheus Pushgateway, so that metrics of
+    Celery workers are collected. Metrics are pushed at most once per METRICS_PUSH_INTERVAL
+    seconds and only if JIRA has been requested since previous push.
+    """
+    gateway = settings.WALDUR_JIRA.get('METRICS_PUSHGATEWAY')
+    interval = settings.WALDUR_JIRA.get('METRICS_PUSH_INTERVAL', 30)
+    if not gateway or not _push_state.pending or time.time() - _push_state.pushed_at < interval:
+        return
+
+    _push_state.pending = False
+    _push_state.pushed_at = time.time()
+    # Each worker process has its own metrics, so they are grouped by process
+    grouping_key = {'instance': '%s:%s' % (socket.gethostname(), os.getpid())}
+    try:
+        push_to_gateway(gateway, job='waldur_jira', registry=REGISTRY, grouping_key=grouping_key)
+    except IOError as e:
+        logger.warning('Unable to push JIRA metrics to %s: %s', gateway, e)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 02:23
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0019_immutable_default_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='backend_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Digest of JIRA issue state used for reconciliation.', max_length=32),
+        ),
+    ]
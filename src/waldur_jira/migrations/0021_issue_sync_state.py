@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 02:38
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('structure', '0052_customer_subnets'),
+        ('waldur_jira', '0020_issue_backend_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueSyncState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.DateTimeField(blank=True, help_text='Issues updated before this moment have been synchronized.', null=True)),
+                ('settings', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='structure.ServiceSettings')),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 03:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0022_project_backend_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='backend_updated',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Time of the latest change of the issue in JIRA.', null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='synced',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Time when the latest state of the issue has been applied.', null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='webhook_latency',
+            field=models.FloatField(blank=True, editable=False, help_text='Seconds between JIRA webhook event and its application, if the latest state of the issue has been applied by webhook.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'synced'], name='waldur_jira_project_75e4ad_idx'),
+        ),
+    ]
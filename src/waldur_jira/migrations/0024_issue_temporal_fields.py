@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0023_issue_sync_time'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='issue',
+            old_name='resolution_date',
+            new_name='resolution_date_string',
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='resolution_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='backend_created',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Time when the issue has been created in JIRA.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='issue',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Time of the latest change of the issue in JIRA.'),
+        ),
+    ]
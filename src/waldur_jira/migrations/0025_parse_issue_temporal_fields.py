@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+
+
+def parse_resolution_dates(apps, schema_editor):
+    Issue = apps.get_model('waldur_jira', 'Issue')
+    issues = Issue.objects.exclude(resolution_date_string__isnull=True).exclude(resolution_date_string='')
+    for issue_id, value in issues.values_list('id', 'resolution_date_string').iterator():
+        try:
+            resolution_date = parse_datetime(value)
+        except ValueError:
+            resolution_date = None
+        if resolution_date:
+            Issue.objects.filter(id=issue_id).update(resolution_date=resolution_date)
+
+    # Time of the latest change in JIRA has been recorded since issue sync time is tracked
+    Issue.objects.exclude(backend_updated__isnull=True).update(updated=F('backend_updated'))
+
+
+def format_resolution_dates(apps, schema_editor):
+    Issue = apps.get_model('waldur_jira', 'Issue')
+    issues = Issue.objects.exclude(resolution_date__isnull=True)
+    for issue_id, value in issues.values_list('id', 'resolution_date').iterator():
+        Issue.objects.filter(id=issue_id).update(
+            resolution_date_string=value.strftime('%Y-%m-%dT%H:%M:%S.000%z'))
+    Issue.objects.update(backend_updated=F('updated'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0024_issue_temporal_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_resolution_dates, format_resolution_dates),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0025_parse_issue_temporal_fields'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='issue',
+            name='resolution_date_string',
+        ),
+        migrations.RemoveField(
+            model_name='issue',
+            name='backend_updated',
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['backend_created'], name='waldur_jira_backend_133548_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['updated'], name='waldur_jira_updated_8464e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['resolution_date'], name='waldur_jira_resolut_05b809_idx'),
+        ),
+    ]
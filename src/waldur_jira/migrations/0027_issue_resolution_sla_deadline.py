@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0026_drop_issue_string_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='resolution_sla_deadline',
+            field=models.DateTimeField(blank=True, help_text='Time when resolution SLA is breached unless its cycle is paused.', null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='resolution_sla_paused',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='resolution_sla_remaining',
+            field=models.DurationField(blank=True, help_text='Remaining time of resolution SLA cycle while it is paused.', null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+
+from django.db import migrations
+
+
+def fill_deadlines(apps, schema_editor):
+    # Remaining time has been stored when issue was pulled from JIRA, i.e. when it has been modified
+    Issue = apps.get_model('waldur_jira', 'Issue')
+    issues = Issue.objects.exclude(resolution_sla__isnull=True)
+    for issue_id, modified, resolution_sla in issues.values_list('id', 'modified', 'resolution_sla').iterator():
+        deadline = modified + datetime.timedelta(seconds=resolution_sla)
+        Issue.objects.filter(id=issue_id).update(resolution_sla_deadline=deadline)
+
+
+def fill_remaining_time(apps, schema_editor):
+    Issue = apps.get_model('waldur_jira', 'Issue')
+    issues = Issue.objects.exclude(resolution_sla_deadline__isnull=True)
+    for issue_id, modified, deadline in issues.values_list('id', 'modified', 'resolution_sla_deadline').iterator():
+        resolution_sla = int((deadline - modified).total_seconds())
+        Issue.objects.filter(id=issue_id).update(resolution_sla=resolution_sla)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0027_issue_resolution_sla_deadline'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_deadlines, fill_remaining_time),
+    ]
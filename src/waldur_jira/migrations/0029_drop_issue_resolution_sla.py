@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0028_fill_issue_resolution_sla_deadline'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='issue',
+            name='resolution_sla',
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['resolution_sla_deadline'], name='waldur_jira_resolut_7c07db_idx'),
+        ),
+    ]
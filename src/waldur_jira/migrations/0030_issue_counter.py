@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 03:38
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_issues(apps, schema_editor):
+    Issue = apps.get_model('waldur_jira', 'Issue')
+    IssueCounter = apps.get_model('waldur_jira', 'IssueCounter')
+    fields = ('project_id', 'status', 'priority_id', 'type_id')
+    rows = Issue.objects.values(*fields).annotate(total=models.Count('id')).order_by()
+    IssueCounter.objects.bulk_create(IssueCounter(count=row.pop('total'), **row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0029_drop_issue_resolution_sla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=255)),
+                ('count', models.IntegerField(default=0)),
+                ('priority', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='waldur_jira.Priority')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='waldur_jira.Project')),
+                ('type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='waldur_jira.IssueType')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='issuecounter',
+            unique_together=set([('project', 'status', 'priority', 'type')]),
+        ),
+        migrations.RunPython(count_issues, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 04:14
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0030_issue_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='resolution_sla_met',
+            field=models.NullBooleanField(help_text='Whether the latest completed resolution SLA cycle has been met, if any cycle is completed.'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 04:31
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waldur_jira', '0031_issue_resolution_sla_met'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='sync_lag',
+            field=models.FloatField(blank=True, editable=False, help_text='Seconds between the latest change of the issue in JIRA and its application, if it has been applied by webhook or incremental sync.', null=True),
+        ),
+    ]
@@ -1,13 +1,13 @@
 from __future__ import unicode_literals
 
-import re
+import datetime
 import urlparse
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.utils import timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
 from model_utils import FieldTracker
@@ -17,6 +17,8 @@ from waldur_core.core import models as core_models
 from waldur_core.core.fields import JSONField
 from waldur_core.structure import models as structure_models
 
+from . import profiling, utils
+
 
 class JiraService(structure_models.Service):
     projects = models.ManyToManyField(
@@ -56,8 +58,14 @@ class Project(structure_models.NewResource, core_models.RuntimeStateMixin):
     action = models.CharField(max_length=50, blank=True)
     action_details = JSONField(default=dict)
 
+    class Meta(object):
+        indexes = [
+            models.Index(fields=['backend_id']),
+        ]
+
     def get_backend(self):
-        return super(Project, self).get_backend(project=self.backend_id)
+        backend = super(Project, self).get_backend(project=self.backend_id)
+        return profiling.wrap_backend(backend)
 
     def get_access_url(self):
         base_url = self.service_project_link.service.settings.backend_url
@@ -72,6 +80,13 @@ class Project(structure_models.NewResource, core_models.RuntimeStateMixin):
         return Priority.objects.filter(settings=self.service_project_link.service.settings)
 
 
+class IssueSyncState(models.Model):
+    """ Progress of incremental issue synchronization across all projects of JIRA instance. """
+    settings = models.OneToOneField(structure_models.ServiceSettings, related_name='+', on_delete=models.CASCADE)
+    watermark = models.DateTimeField(null=True, blank=True,
+                                     help_text=_('Issues updated before this moment have been synchronized.'))
+
+
 class JiraPropertyIssue(core_models.UuidMixin, core_models.StateMixin, TimeStampedModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True)
     backend_id = models.CharField(max_length=255, null=True)
@@ -126,6 +141,30 @@ class Priority(core_models.UiDescribableMixin, structure_models.ServiceProperty)
         return super(Priority, cls).get_backend_fields() + ('icon_url', 'description')
 
 
+class IssueQuerySet(models.QuerySet):
+    def annotate_resolution_sla(self, now=None):
+        """ Annotate issues with remaining time of resolution SLA, it is negative if SLA is breached. """
+        now = models.Value(now or timezone.now(), output_field=models.DateTimeField())
+        return self.annotate(resolution_sla=models.Case(
+            models.When(resolution_sla_paused=True, then=models.F('resolution_sla_remaining')),
+            # Difference is not computed for NULL deadlines, because SQLite fails to do it
+            models.When(resolution_sla_deadline__isnull=False, then=models.ExpressionWrapper(
+                models.F('resolution_sla_deadline') - now, output_field=models.DurationField())),
+            output_field=models.DurationField(),
+        ))
+
+    def filter_resolution_sla_breached(self, breached=True, now=None):
+        now = now or timezone.now()
+        zero = datetime.timedelta(0)
+        if breached:
+            query = (models.Q(resolution_sla_paused=False, resolution_sla_deadline__lt=now) |
+                     models.Q(resolution_sla_paused=True, resolution_sla_remaining__lt=zero))
+        else:
+            query = (models.Q(resolution_sla_paused=False, resolution_sla_deadline__gte=now) |
+                     models.Q(resolution_sla_paused=True, resolution_sla_remaining__gte=zero))
+        return self.filter(query)
+
+
 @python_2_unicode_compatible
 class Issue(structure_models.StructureLoggableMixin,
             JiraPropertyIssue):
@@ -145,21 +184,48 @@ class Issue(structure_models.StructureLoggableMixin,
     assignee_email = models.CharField(blank=True, max_length=255)
     assignee_username = models.CharField(blank=True, max_length=255)
     resolution = models.CharField(blank=True, max_length=255)
-    resolution_date = models.CharField(blank=True, null=True, max_length=255)
+    resolution_date = models.DateTimeField(blank=True, null=True)
     priority = models.ForeignKey(Priority)
     status = models.CharField(max_length=255)
-    updated = models.DateTimeField(auto_now_add=True)
+    backend_created = models.DateTimeField(null=True, blank=True, editable=False,
+                                           help_text=_('Time when the issue has been created in JIRA.'))
+    updated = models.DateTimeField(default=timezone.now, editable=False,
+                                   help_text=_('Time of the latest change of the issue in JIRA.'))
 
     resource_content_type = models.ForeignKey(ContentType, blank=True, null=True, related_name='jira_issues')
     resource_object_id = models.PositiveIntegerField(blank=True, null=True)
     resource = GenericForeignKey('resource_content_type', 'resource_object_id')
 
-    resolution_sla = models.IntegerField(blank=True, null=True)
+    resolution_sla_deadline = models.DateTimeField(
+        blank=True, null=True, help_text=_('Time when resolution SLA is breached unless its cycle is paused.'))
+    resolution_sla_paused = models.BooleanField(default=False)
+    resolution_sla_remaining = models.DurationField(
+        blank=True, null=True, help_text=_('Remaining time of resolution SLA cycle while it is paused.'))
+    resolution_sla_met = models.NullBooleanField(
+        help_text=_('Whether the latest completed resolution SLA cycle has been met, if any cycle is completed.'))
+    backend_fingerprint = models.CharField(max_length=32, blank=True, editable=False,
+                                           help_text=_('Digest of JIRA issue state used for reconciliation.'))
+    synced = models.DateTimeField(null=True, blank=True, editable=False,
+                                  help_text=_('Time when the latest state of the issue has been applied.'))
+    sync_lag = models.FloatField(null=True, blank=True, editable=False,
+                                 help_text=_('Seconds between the latest change of the issue in JIRA and its '
+                                             'application, if it has been applied by webhook or incremental sync.'))
+    webhook_latency = models.FloatField(null=True, blank=True, editable=False,
+                                        help_text=_('Seconds between JIRA webhook event and its application, '
+                                                    'if the latest state of the issue has been applied by webhook.'))
 
     tracker = FieldTracker()
+    objects = IssueQuerySet.as_manager()
 
     class Meta(object):
         unique_together = ('project', 'backend_id')
+        indexes = [
+            models.Index(fields=['project', 'synced']),
+            models.Index(fields=['backend_created']),
+            models.Index(fields=['updated']),
+            models.Index(fields=['resolution_date']),
+            models.Index(fields=['resolution_sla_deadline']),
+        ]
 
     def get_backend(self):
         return self.project.get_backend()
@@ -187,6 +253,13 @@ class Issue(structure_models.StructureLoggableMixin,
     def get_log_fields(self):
         return ('uuid', 'issue_user', 'key', 'summary', 'status', 'issue_project')
 
+    def get_resolution_sla(self, now=None):
+        """ Remaining time of resolution SLA, the same as annotated by IssueQuerySet.annotate_resolution_sla. """
+        if self.resolution_sla_paused:
+            return self.resolution_sla_remaining
+        if self.resolution_sla_deadline:
+            return self.resolution_sla_deadline - (now or timezone.now())
+
     def get_description(self):
         template = settings.WALDUR_JIRA['ISSUE_TEMPLATE']['RESOURCE_INFO']
         if template and self.resource:
@@ -208,6 +281,22 @@ class JiraSubPropertyIssue(JiraPropertyIssue):
         abstract = True
 
 
+class IssueCounter(models.Model):
+    """ Number of issues of JIRA project with the same status, priority and type.
+
+    Counters are maintained incrementally, see counters module, so that
+    issue statistics are aggregated without scanning issues.
+    """
+    project = models.ForeignKey(Project, related_name='+', on_delete=models.CASCADE)
+    status = models.CharField(max_length=255)
+    priority = models.ForeignKey(Priority, related_name='+', on_delete=models.CASCADE)
+    type = models.ForeignKey(IssueType, related_name='+', on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+
+    class Meta(object):
+        unique_together = ('project', 'status', 'priority', 'type')
+
+
 @python_2_unicode_compatible
 class Comment(structure_models.StructureLoggableMixin,
               JiraSubPropertyIssue):
@@ -231,27 +320,36 @@ class Comment(structure_models.StructureLoggableMixin,
     def get_log_fields(self):
         return ('uuid', 'comment_user', 'issue')
 
-    def clean_message(self, message):
+    @staticmethod
+    def parse_message(message):
+        """ Split message into body and username of Waldur user who has added it. """
         template = settings.WALDUR_JIRA['COMMENT_TEMPLATE']
         if not template:
-            return self.message
-
-        User = get_user_model()
-        template = re.sub(r'([\^~*?:\(\)\[\]|+])', r'\\\1', template)
-        pattern = template.format(body='', user=User(full_name=r'(.+?)', username=r'([\w.@+-]+)'))
-        match = re.search(pattern, message)
+            return message, None
 
+        match = utils.get_comment_pattern(template).search(message)
         if match:
-            try:
-                self.user = User.objects.get(username=match.group(2))
-            except User.DoesNotExist:
-                pass
-            self.message = message[:match.start()]
-        else:
-            self.message = message
+            return message[:match.start()], match.group(2)
+        return message, None
 
+    def clean_message(self, message):
+        self.message, username = self.parse_message(message)
+        if username:
+            self.user = utils.UserResolver().resolve([username]).get(username, self.user)
         return self.message
 
+    @classmethod
+    def clean_messages(cls, comments, messages, user_resolver=None):
+        """ Clean messages of comments batch resolving all referenced users at once. """
+        parsed = [cls.parse_message(message) for message in messages]
+        usernames = {username for _, username in parsed if username}
+        users = (user_resolver or utils.UserResolver()).resolve(usernames) if usernames else {}
+
+        for comment, (body, username) in zip(comments, parsed):
+            comment.message = body
+            if username in users:
+                comment.user = users[username]
+
     def prepare_message(self):
         template = settings.WALDUR_JIRA['COMMENT_TEMPLATE']
         if template and self.user:
@@ -0,0 +1,209 @@
+from __future__ import unicode_literals
+
+import cProfile
+import functools
+import logging
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import CursorWrapper
+
+try:
+    import tracemalloc
+except ImportError:
+    # It is not available in Python 2
+    tracemalloc = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled(service_settings):
+    """
+    Profiling is enabled either globally with WALDUR_JIRA['PROFILING_ENABLED'] setting or
+    WALDUR_JIRA_PROFILING environment variable, or for single service settings with
+    {"profiling": true} in their options.
+    """
+    if os.environ.get('WALDUR_JIRA_PROFILING', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if settings.WALDUR_JIRA.get('PROFILING_ENABLED'):
+        return True
+    return bool((service_settings.options or {}).get('profiling'))
+
+
+def wrap_backend(backend):
+    return ProfiledBackend(backend) if is_enabled(backend.settings) else backend
+
+
+class ProfiledBackend(object):
+    """ Proxy of JIRA backend which profiles each call of its public method.
+
+    Methods called by the backend itself are not profiled separately,
+    so that BackendMethodTask gets single profile of the method it has called.
+    """
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    def __getattr__(self, name):
+        attribute = getattr(self._backend, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def wrapper(*args, **kwargs):
+            with CallProfile(self._backend, name):
+                return attribute(*args, **kwargs)
+
+        return wrapper
+
+
+class QueryCounter(object):
+    """ Count and time database queries executed by current thread within context. """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __enter__(self):
+        counter = self
+
+        class CountingCursorWrapper(CursorWrapper):
+            def execute(self, sql, params=None):
+                with counter.measure():
+                    return super(CountingCursorWrapper, self).execute(sql, params)
+
+            def executemany(self, sql, param_list):
+                with counter.measure():
+                    return super(CountingCursorWrapper, self).executemany(sql, param_list)
+
+        # Connection is local to the current thread
+        self.connection = connection = connections[DEFAULT_DB_ALIAS]
+        self.previous = connection.force_debug_cursor, vars(connection).get('make_debug_cursor')
+        connection.force_debug_cursor = True
+        connection.make_debug_cursor = lambda cursor: CountingCursorWrapper(cursor, connection)
+        return self
+
+    def __exit__(self, *args):
+        force_debug_cursor, make_debug_cursor = self.previous
+        self.connection.force_debug_cursor = force_debug_cursor
+        if make_debug_cursor:
+            self.connection.make_debug_cursor = make_debug_cursor
+        else:
+            del self.connection.make_debug_cursor
+
+    def measure(self):
+        return _Timer(self)
+
+
+class _Timer(object):
+    def __init__(self, counter):
+        self.counter = counter
+
+    def __enter__(self):
+        self.started = time.time()
+
+    def __exit__(self, *args):
+        self.counter.count += 1
+        self.counter.duration += time.time() - self.started
+
+
+def _get_cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _get_max_rss():
+    """ Peak resident set size of the process in bytes. """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # It is measured in bytes on macOS and in kilobytes on Linux
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class CallProfile(object):
+    """ Collect statistics of single call of JIRA backend method.
+
+    Statistics include wall and CPU time, number and duration of database queries
+    and JIRA requests and peak of memory allocated by Python if tracemalloc is available.
+    Otherwise, for example, in Python 2, growth of peak resident set size of the process is reported,
+    it is zero if the process has used more memory before the call.
+    Calls are sampled with cProfile according to PROFILING_SAMPLE_RATE and their profiles
+    are stored in PROFILING_DIRECTORY.
+    """
+
+    def __init__(self, backend, method):
+        self.backend = backend
+        self.method = method
+        self.jira_requests = 0
+        self.jira_time = 0
+        self.lock = threading.Lock()
+        self.stats = None
+        self.slow_threshold = settings.WALDUR_JIRA.get('PROFILING_SLOW_THRESHOLD', 10)
+        self.directory = settings.WALDUR_JIRA.get('PROFILING_DIRECTORY')
+        sample_rate = settings.WALDUR_JIRA.get('PROFILING_SAMPLE_RATE', 0.1)
+        self.profiler = cProfile.Profile() if self.directory and random.random() < sample_rate else None
+
+    def record_request(self, duration):
+        """ It is called by transport adapter of JIRA session, possibly from several threads. """
+        with self.lock:
+            self.jira_requests += 1
+            self.jira_time += duration
+
+    def __enter__(self):
+        self.trace_memory = tracemalloc is not None and not tracemalloc.is_tracing()
+        if self.trace_memory:
+            tracemalloc.start()
+        self.max_rss_started = _get_max_rss()
+        self.queries = QueryCounter()
+        self.queries.__enter__()
+        self.backend.request_observers.append(self)
+        self.started = time.time()
+        self.cpu_started = _get_cpu_time()
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *args):
+        if self.profiler:
+            self.profiler.disable()
+        wall_time = time.time() - self.started
+        cpu_time = _get_cpu_time() - self.cpu_started
+        self.backend.request_observers.remove(self)
+        self.queries.__exit__()
+
+        if self.trace_memory:
+            memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            memory_peak = _get_max_rss() - self.max_rss_started
+
+        self.stats = {
+            'wall_time': wall_time,
+            'cpu_time': cpu_time,
+            'db_queries': self.queries.count,
+            'db_time': self.queries.duration,
+            'jira_requests': self.jira_requests,
+            'jira_time': self.jira_time,
+            'memory_peak': memory_peak,
+        }
+        self.report()
+
+    def report(self):
+        message = ('JIRA backend method %(method)s of settings %(settings)s took %(wall_time).3fs '
+                   '(CPU %(cpu_time).3fs), %(db_queries)s database queries took %(db_time).3fs, '
+                   '%(jira_requests)s JIRA requests took %(jira_time).3fs, memory peak is %(memory_peak)s bytes.')
+        context = dict(self.stats, method=self.method, settings=self.backend.settings.uuid.hex)
+        slow = self.stats['wall_time'] >= self.slow_threshold
+        logger.log(logging.WARNING if slow else logging.INFO, message, context)
+
+        if self.profiler:
+            path = os.path.join(self.directory, '%s-%s-%s-%s.pstats' % (
+                self.method, time.strftime('%Y%m%d%H%M%S'), os.getpid(), uuid.uuid4().hex[:8]))
+            self.profiler.dump_stats(path)
+            logger.info('Profile of JIRA backend method %s is stored in %s.', self.method, path)
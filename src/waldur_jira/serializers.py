@@ -1,19 +1,21 @@
 from __future__ import unicode_literals
 
+import datetime
 import logging
 import re
 
 import six
 from django.core import validators as django_validators
 from django.db import transaction
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
 from waldur_core.core import serializers as core_serializers
 from waldur_core.structure import serializers as structure_serializers, models as structure_models, SupportedServices
 
-from . import models, executors
-from .backend import JiraBackendError
+from . import export, models
+from .backend import IssueEventContext
 
 logger = logging.getLogger(__name__)
 
@@ -145,6 +147,11 @@ class ProjectImportableSerializer(core_serializers.AugmentedSerializerMixin,
         read_only_fields = model_fields
 
 
+class IssueAnalyticsSerializer(serializers.Serializer):
+    window = serializers.IntegerField(min_value=1, max_value=365, default=30,
+                                      help_text=_('Number of days, issues resolved within this window are analyzed.'))
+
+
 class ProjectImportSerializer(ProjectImportableSerializer):
     class Meta(ProjectImportableSerializer.Meta):
         fields = ProjectImportableSerializer.Meta.fields + ('url', 'uuid', 'created',)
@@ -154,6 +161,10 @@ class ProjectImportSerializer(ProjectImportableSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
+        """
+        Register placeholder project without calling JIRA.
+        Its metadata and issues are fetched in background by import executor.
+        """
         service_project_link = validated_data['service_project_link']
         backend_id = validated_data['backend_id']
 
@@ -165,16 +176,12 @@ class ProjectImportSerializer(ProjectImportableSerializer):
                 'backend_id': _('Project has been imported already.')
             })
 
-        try:
-            backend = service_project_link.get_backend()
-            project = backend.import_project_scheduled(backend_id, service_project_link)
-        except JiraBackendError:
-            raise serializers.ValidationError({
-                'backend_id': _("Can't import project with ID %s") % validated_data['backend_id']
-            })
-
-        executors.ProjectPullExecutor.execute(project)
-        return project
+        return models.Project.objects.create(
+            service_project_link=service_project_link,
+            backend_id=backend_id,
+            name=backend_id,
+            state=models.Project.States.CREATION_SCHEDULED,
+        )
 
 
 class JiraPropertySerializer(core_serializers.RestrictedSerializerMixin,
@@ -287,10 +294,17 @@ class IssueSerializer(JiraPropertySerializer):
 
     resource_type = serializers.SerializerMethodField()
     service_settings_state = serializers.SerializerMethodField()
+    resolution_sla = serializers.SerializerMethodField()
 
     def get_resource_type(self, obj):
         return 'JIRA.Issue'
 
+    def get_resolution_sla(self, obj):
+        # Remaining time is annotated by IssueViewSet, otherwise it is computed for single issue
+        remaining_time = obj.resolution_sla if hasattr(obj, 'resolution_sla') else obj.get_resolution_sla()
+        if remaining_time is not None:
+            return int(remaining_time.total_seconds())
+
     def get_service_settings_state(self, obj):
         return 'OK'
 
@@ -305,7 +319,7 @@ class IssueSerializer(JiraPropertySerializer):
             'jira_project', 'jira_project_uuid', 'jira_project_name',
             'key', 'summary', 'description', 'resolution', 'status',
             'priority', 'priority_name', 'priority_icon_url', 'priority_description',
-            'created', 'updated',
+            'created', 'updated', 'backend_created',
             'creator_username', 'creator_name', 'creator_email',
             'assignee_username', 'assignee_name', 'assignee_email',
             'reporter_username', 'reporter_name', 'reporter_email',
@@ -313,9 +327,11 @@ class IssueSerializer(JiraPropertySerializer):
             'access_url', 'comments', 'resource_type', 'service_settings_state',
             'type', 'type_name', 'type_description', 'type_icon_url',
             'scope', 'scope_type', 'scope_name',
-            'parent', 'parent_uuid', 'parent_summary', 'resolution_sla',
+            'parent', 'parent_uuid', 'parent_summary',
+            'resolution_sla', 'resolution_sla_deadline', 'resolution_sla_paused', 'resolution_sla_met',
         )
-        read_only_fields = 'status', 'resolution', 'updated_username', 'error_message', 'resolution_sla', 'backend_id'
+        read_only_fields = ('status', 'resolution', 'updated_username', 'error_message', 'backend_id',
+                            'resolution_sla_deadline', 'resolution_sla_paused', 'resolution_sla_met')
         protected_fields = 'jira_project', 'key', 'type', 'scope',
         extra_kwargs = dict(
             url={'lookup_field': 'uuid', 'view_name': 'jira-issues-detail'},
@@ -364,6 +380,19 @@ class IssueSerializer(JiraPropertySerializer):
 # Serializers below are used by webhook only
 #
 
+class IssueBulkPullSerializer(serializers.Serializer):
+    issues = serializers.HyperlinkedRelatedField(
+        view_name='jira-issues-detail',
+        queryset=models.Issue.objects.exclude(backend_id__isnull=True).exclude(backend_id=''),
+        lookup_field='uuid',
+        many=True,
+    )
+
+
+class ExportSerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=sorted(export.FORMATS.keys()), default='ndjson')
+
+
 class JiraCommentSerializer(serializers.Serializer):
     id = serializers.CharField()
 
@@ -425,6 +454,7 @@ class WebHookReceiverSerializer(serializers.Serializer):
     comment = JiraCommentSerializer(required=False)
     changelog = JiraChangelogSerializer(required=False)
     issue_event_type_name = serializers.CharField(required=False)  # For old Jira's version
+    timestamp = serializers.IntegerField(required=False)  # Milliseconds since epoch
 
     def get_project(self, project_key):
         try:
@@ -462,6 +492,11 @@ class WebHookReceiverSerializer(serializers.Serializer):
         project_key = fields['project']['key']
         project = self.get_project(project_key)
         backend = project.get_backend()
+        event_time = None
+        if validated_data.get('timestamp'):
+            event_time = datetime.datetime.fromtimestamp(validated_data['timestamp'] / 1000.0, tz=timezone.utc)
+        # Backend issue is fetched at most once per event
+        context = IssueEventContext(backend, key, event_time)
         create_issue = event_type == self.Event.ISSUE_CREATE
         issue = self.get_issue(project, key, create_issue)
 
@@ -475,7 +510,7 @@ class WebHookReceiverSerializer(serializers.Serializer):
 
         if event_type in self.Event.ISSUE_ACTIONS:
             if not issue and create_issue:
-                backend.create_issue_from_jira(project, key)
+                context.create_issue(project)
 
             if event_type == self.Event.ISSUE_UPDATE:
                 if old_jira:
@@ -489,27 +524,29 @@ class WebHookReceiverSerializer(serializers.Serializer):
                         backend.update_comment_from_jira(comment)
 
                     if old_jira == 'issue_comment_deleted':
-                        backend.delete_old_comments(issue)
+                        context.delete_old_comments(issue)
 
                     if old_jira == 'issue_updated':
                         new_attachment = filter(lambda x: x['field'] == 'Attachment',
                                                 validated_data['changelog']['items'])
                         if new_attachment:
-                            backend.update_attachment_from_jira(issue)
+                            context.update_attachments(issue)
 
-                        backend.update_issue_from_jira(issue)
+                        context.update_issue_from_changelog(
+                            issue, validated_data['changelog']['items'], self.initial_data['issue']['fields'])
 
                 else:
                     new_attachment = filter(lambda x: x['fieldId'] == 'attachment',
                                             validated_data['changelog']['items'])
 
                     if new_attachment:
-                        backend.update_attachment_from_jira(issue)
+                        context.update_attachments(issue)
 
-                    backend.update_issue_from_jira(issue)
+                    context.update_issue_from_changelog(
+                        issue, validated_data['changelog']['items'], self.initial_data['issue']['fields'])
 
             if event_type == self.Event.ISSUE_DELETE:
-                backend.delete_issue_from_jira(issue)
+                context.delete_issue(issue)
 
         if event_type in self.Event.COMMENT_ACTIONS:
             try:
@@ -529,4 +566,5 @@ class WebHookReceiverSerializer(serializers.Serializer):
             if event_type == self.Event.COMMENT_DELETE:
                 backend.delete_comment_from_jira(comment)
 
+        context.record_latency(validated_data['webhookEvent'])
         return validated_data
@@ -0,0 +1,145 @@
+from __future__ import unicode_literals
+
+import logging
+
+import six
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from waldur_core.core import tasks as core_tasks, utils as core_utils
+from waldur_core.structure import models as structure_models
+
+from . import models
+from .apps import JiraConfig
+from .backend import JiraBackendError
+
+logger = logging.getLogger(__name__)
+
+
+def get_issue_batch_cache_key(project):
+    return 'waldur_jira:issue_batch:%s' % project.uuid.hex
+
+
+def get_debounced_update_cache_key(instance):
+    return 'waldur_jira:debounced_update:%s:%s' % (instance._meta.model_name, instance.uuid.hex)
+
+
+class DebouncedBackendMethodTask(core_tasks.BackendMethodTask):
+    """ Push the latest state of the instance to JIRA.
+
+    Instance is reloaded from the database when task is started,
+    therefore all updates scheduled before that are sent together.
+    """
+
+    def pre_execute(self, instance):
+        # Updates which are scheduled from now on are pushed by the next task.
+        cache.delete(get_debounced_update_cache_key(instance))
+        # Instance has been deserialized before the key was deleted, so updates committed in between are loaded
+        instance.refresh_from_db()
+        super(DebouncedBackendMethodTask, self).pre_execute(instance)
+
+
+class CreateIssuesBatchTask(core_tasks.Task):
+    """ Create all issues of JIRA project which are scheduled for creation using bulk requests. """
+
+    @classmethod
+    def get_description(cls, project, *args, **kwargs):
+        return 'Create scheduled issues of JIRA project "%s".' % project
+
+    def execute(self, project):
+        # Issues which are scheduled from now on are collected by the next batch.
+        cache.delete(get_issue_batch_cache_key(project))
+
+        backend = project.get_backend()
+        batch_size = settings.WALDUR_JIRA.get('ISSUE_BULK_CREATE_SIZE', 50)
+
+        while True:
+            issues = self.claim_issues(backend.model_issue, project, batch_size)
+            if not issues:
+                break
+
+            try:
+                errors = backend.create_issues(issues)
+            except JiraBackendError as e:
+                errors = {issue: six.text_type(e) for issue in issues}
+
+            for issue in issues:
+                if issue in errors:
+                    logger.warning('Unable to create issue %s in JIRA. Error: %s', issue, errors[issue])
+                    issue.set_erred()
+                    issue.error_message = errors[issue]
+                else:
+                    issue.set_ok()
+                issue.save()
+
+        self.fail_orphaned_subtasks(backend.model_issue, project)
+
+    def claim_issues(self, model_issue, project, batch_size):
+        """
+        Mark batch of scheduled issues as being created.
+        Sub-tasks are postponed until their parent issue is created in JIRA.
+        """
+        with transaction.atomic():
+            issues = list(
+                model_issue.objects
+                .select_for_update()
+                .filter(project=project, state=model_issue.States.CREATION_SCHEDULED)
+                .filter(Q(parent__isnull=True) | Q(parent__backend_id__isnull=False))
+                .order_by('created')[:batch_size]
+            )
+            for issue in issues:
+                issue.begin_creating()
+                issue.save(update_fields=['state'])
+        return issues
+
+    def fail_orphaned_subtasks(self, model_issue, project):
+        """ Sub-tasks of issues which have failed to be created can not be created either. """
+        subtasks = (
+            model_issue.objects
+            .filter(project=project, state=model_issue.States.CREATION_SCHEDULED,
+                    parent__state=model_issue.States.ERRED, parent__backend_id__isnull=True)
+            .select_related('parent')
+        )
+        for subtask in subtasks:
+            logger.warning('Unable to create issue %s in JIRA, because its parent %s is not created.',
+                           subtask, subtask.parent)
+            subtask.set_erred()
+            subtask.error_message = subtask.parent.error_message
+            subtask.save()
+
+
+@shared_task(name='waldur_jira.pull_issues')
+def pull_issues(issue_uuids):
+    """ Refresh issues in bulk, issues of each JIRA instance are fetched together. """
+    issues = (
+        models.Issue.objects
+        .filter(uuid__in=issue_uuids)
+        .select_related('project__service_project_link__service__settings')
+    )
+    issues_by_settings = {}
+    for issue in issues:
+        service_settings = issue.project.service_project_link.service.settings
+        issues_by_settings.setdefault(service_settings, []).append(issue)
+
+    for service_settings, settings_issues in issues_by_settings.items():
+        backend = settings_issues[0].get_backend()
+        try:
+            backend.pull_issues(settings_issues)
+        except JiraBackendError as e:
+            logger.warning('Unable to pull issues of JIRA instance %s. Error: %s', service_settings, e)
+
+
+@shared_task(name='waldur_jira.sync_issues')
+def sync_issues():
+    """ Schedule incremental synchronization of issues for each JIRA instance. """
+    if not settings.WALDUR_JIRA.get('ISSUE_SYNC_ENABLED'):
+        return
+
+    States = structure_models.ServiceSettings.States
+    for service_settings in structure_models.ServiceSettings.objects.filter(type=JiraConfig.service_name,
+                                                                             state=States.OK):
+        serialized_settings = core_utils.serialize_instance(service_settings)
+        core_tasks.BackendMethodTask().delay(serialized_settings, 'sync_issues')
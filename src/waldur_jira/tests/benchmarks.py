@@ -0,0 +1,431 @@
+""" Benchmarks of JIRA plugin hot paths against in-process stub JIRA and throwaway database.
+
+Each scenario reports wall time, number of database queries, number of JIRA requests
+and peak resident set size of the process, and compares them against stored baseline.
+Peak RSS is a high-water mark of the whole process, so run single scenario per process
+if memory usage of each scenario is of interest.
+
+Usage:
+
+    DJANGO_SETTINGS_MODULE=waldur_core.server.test_settings \\
+        python -m waldur_jira.tests.benchmarks --scenario import --sizes 1000 10000 100000
+
+    # Store current results as new baseline
+    DJANGO_SETTINGS_MODULE=waldur_core.server.test_settings \\
+        python -m waldur_jira.tests.benchmarks --save-baseline
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import collections
+import copy
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+METRICS = ('wall_time', 'db_queries', 'jira_requests', 'peak_rss')
+
+
+class Measurement(object):
+    """ Collect metrics of the code executed within context. """
+
+    def __init__(self, server):
+        self.server = server
+        self.result = None
+
+    def __enter__(self):
+        from waldur_jira.profiling import QueryCounter
+
+        self.queries = QueryCounter()
+        self.queries.__enter__()
+        self.server.reset_counters()
+        self.started = time.time()
+        return self
+
+    def __exit__(self, *args):
+        wall_time = time.time() - self.started
+        self.queries.__exit__()
+        self.result = collections.OrderedDict([
+            ('wall_time', round(wall_time, 3)),
+            ('db_queries', self.queries.count),
+            ('jira_requests', self.server.request_count),
+            # ru_maxrss is measured in kilobytes on Linux
+            ('peak_rss', round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)),
+        ])
+
+
+class Scenario(object):
+    """ Base class of benchmark scenario. It is executed in empty database. """
+    name = NotImplemented
+
+    def __init__(self, options):
+        self.options = options
+
+    def get_server_options(self):
+        return {}
+
+    def setup(self):
+        from . import factories, fixtures
+
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.project = factories.ProjectFactory(
+            service_project_link=self.fixture.service_project_link, backend_id='P1')
+        self.backend = self.project.get_backend()
+
+    def run(self):
+        raise NotImplementedError()
+
+    def execute(self):
+        """ :return: dict which maps benchmark name to its metrics. """
+        from .stub_server import StubJiraServer
+
+        server_options = dict(latency=self.options.latency)
+        server_options.update(self.get_server_options())
+        with StubJiraServer(**server_options) as self.server:
+            self.setup()
+            with Measurement(self.server) as measurement:
+                self.run()
+        return {self.name: measurement.result}
+
+
+class ImportScenario(Scenario):
+    """ Import all issues of project with comments using backend pipeline. """
+
+    def __init__(self, options, size):
+        super(ImportScenario, self).__init__(options)
+        self.size = size
+        self.name = 'import_project_issues[%s]' % size
+
+    def get_server_options(self):
+        return dict(issues_per_project=self.size, comments_per_issue=self.options.comments)
+
+    def run(self):
+        self.backend.import_project_issues(self.project, max_results=None)
+
+
+class WebHookScenario(Scenario):
+    """ Process JIRA webhook events of single type through WebHookReceiverViewSet. """
+
+    def __init__(self, options, event):
+        super(WebHookScenario, self).__init__(options)
+        self.event = event
+        self.name = 'webhook[%s]' % event
+
+    def get_server_options(self):
+        return dict(issues_per_project=self.options.events, comments_per_issue=1)
+
+    def setup(self):
+        from django.urls import reverse
+        from rest_framework import test
+
+        super(WebHookScenario, self).setup()
+        self.client = test.APIClient()
+        self.url = reverse('jira-web-hook')
+        self.keys = ['P1-%s' % number for number in range(1, self.options.events + 1)]
+
+        if self.event == 'jira:issue_created':
+            self.keys = [self.server.create_issue({'fields': {
+                'project': {'key': 'P1'}, 'summary': 'New issue %s' % number}})['key']
+                for number in range(self.options.events)]
+        else:
+            self.backend.import_project_issues(self.project, max_results=None)
+
+        self.payloads = [self.prepare(key) for key in self.keys]
+
+    def prepare(self, key):
+        """ Apply change to stub JIRA and build webhook payload describing it. """
+        payload = {'webhookEvent': self.event}
+        comments = self.server.get_issue_state(key)['fields']['comment']
+        comment = comments[0] if comments else None
+
+        if self.event == 'jira:issue_updated':
+            self.server.update_issue(key, {'fields': {'summary': 'Updated summary'}})
+            payload['changelog'] = {'items': [{
+                'field': 'summary', 'fieldId': 'summary', 'fieldtype': 'jira',
+                'fromString': 'Synthetic issue %s' % key, 'toString': 'Updated summary',
+            }]}
+        elif self.event == 'jira:issue_deleted':
+            self.server.delete_issue(key)
+        elif self.event == 'comment_created':
+            comment = self.server.create_comment(key, {'body': 'New comment'})
+        elif self.event == 'comment_updated':
+            comment = self.server.update_comment(key, comment['id'], {'body': 'Updated comment'})
+        elif self.event == 'comment_deleted':
+            self.server.delete_comment(key, comment['id'])
+
+        if comment:
+            payload['comment'] = comment
+        issue = self.server.serialize_issue(key) if self.event != 'jira:issue_deleted' else self.deleted_issue(key)
+        # Webhook payload does not include comments of the issue
+        issue['fields'].pop('comment', None)
+        payload['issue'] = issue
+        return payload
+
+    def deleted_issue(self, key):
+        return {'key': key, 'fields': {'project': self.server.serialize_project('P1')}}
+
+    def run(self):
+        for payload in self.payloads:
+            response = self.client.post(self.url, payload, format='json')
+            assert response.status_code == 201, response.data
+
+
+class IssueListScenario(Scenario):
+    """ List issues with embedded comments page by page through REST API. """
+    name = 'issue_list'
+    page_size = 50
+
+    def get_server_options(self):
+        return dict(issues_per_project=self.options.issues, comments_per_issue=self.options.comments)
+
+    def setup(self):
+        from rest_framework import test
+        from . import factories
+
+        super(IssueListScenario, self).setup()
+        self.backend.import_project_issues(self.project, max_results=None)
+        self.client = test.APIClient()
+        self.client.force_authenticate(self.fixture.staff)
+        self.url = factories.IssueFactory.get_list_url()
+
+    def run(self):
+        pages = (self.options.issues + self.page_size - 1) // self.page_size
+        for page in range(1, pages + 1):
+            response = self.client.get(self.url, {'page': page, 'page_size': self.page_size})
+            assert response.status_code == 200, response.data
+
+
+class ExportScenario(Scenario):
+    """ Stream all issues of project through export endpoint in each format. """
+
+    def __init__(self, options, export_format):
+        super(ExportScenario, self).__init__(options)
+        self.export_format = export_format
+        self.name = 'issue_export[%s]' % export_format
+
+    def setup(self):
+        from rest_framework import test
+        from . import factories
+
+        super(ExportScenario, self).setup()
+        # Issues are copied in the database, because import of them from stub JIRA is much slower than export
+        issue = factories.IssueFactory(project=self.project)
+        issues = []
+        for number in range(1, self.options.export_issues):
+            issues.append(copy.copy(issue))
+            issues[-1].pk = None
+            issues[-1].uuid = uuid.uuid4()
+            issues[-1].backend_id = 'P1-%s' % number
+            if len(issues) == 1000 or number == self.options.export_issues - 1:
+                type(issue).objects.bulk_create(issues)
+                issues = []
+        self.client = test.APIClient()
+        self.client.force_authenticate(self.fixture.staff)
+        self.url = factories.IssueFactory.get_list_url('export')
+
+    def run(self):
+        response = self.client.get(self.url, {'export_format': self.export_format})
+        assert response.status_code == 200
+        for _ in response.streaming_content:
+            pass
+
+
+class AttachmentScenario(Scenario):
+    """ Synchronize large attachments of issues which have been imported without them. """
+    name = 'attachment_sync'
+
+    def get_server_options(self):
+        return dict(issues_per_project=self.options.attachment_issues,
+                    attachment_size=self.options.attachment_size * 1024 * 1024)
+
+    def setup(self):
+        super(AttachmentScenario, self).setup()
+        self.backend.import_project_issues(self.project, max_results=None)
+        # Synthetic issues are generated lazily, so attachments appear for all issues at once
+        self.server.attachments_per_issue = self.options.attachments
+
+    def run(self):
+        for issue in self.project.issues.all():
+            self.backend.update_attachment_from_jira(issue)
+
+
+class ReconcileScenario(Scenario):
+    """ Reconcile project whose issues have all changed, using sequential or concurrent backend. """
+
+    def __init__(self, options, backend_class):
+        super(ReconcileScenario, self).__init__(options)
+        self.backend_class = backend_class
+        self.name = 'reconcile[%s]' % backend_class.__name__
+
+    def get_server_options(self):
+        return dict(issues_per_project=self.options.reconcile_issues,
+                    latency=self.options.latency or self.options.network_latency)
+
+    def setup(self):
+        super(ReconcileScenario, self).setup()
+        self.backend.import_project_issues(self.project, max_results=None)
+        self.project.issues.update(backend_fingerprint='')
+        self.backend = self.backend_class(self.fixture.service_settings, project=self.project.backend_id)
+
+    def run(self):
+        self.backend.reconcile_project(self.project)
+
+
+class FetchScenario(Scenario):
+    """ Fetch issues by keys with chunked searches, using sequential or concurrent backend.
+    Unlike reconcile scenario, issues are not stored, so that throughput of JIRA requests is measured.
+    """
+
+    def __init__(self, options, backend_class):
+        super(FetchScenario, self).__init__(options)
+        self.backend_class = backend_class
+        self.name = 'fetch[%s]' % backend_class.__name__
+
+    def get_server_options(self):
+        return dict(issues_per_project=self.options.fetch_issues,
+                    latency=self.options.latency or self.options.network_latency)
+
+    def setup(self):
+        super(FetchScenario, self).setup()
+        self.backend = self.backend_class(self.fixture.service_settings, project=self.project.backend_id)
+        self.keys = ['P1-%s' % number for number in range(1, self.options.fetch_issues + 1)]
+        # JIRA client is initialized before measurement
+        self.backend.manager.server_info()
+
+    def run(self):
+        backend_issues, missing_keys = self.backend.get_backend_issues_by_keys(self.keys)
+        assert len(backend_issues) == len(self.keys)
+
+
+WEBHOOK_EVENTS = ('jira:issue_created', 'jira:issue_updated', 'comment_created',
+                  'comment_updated', 'comment_deleted', 'jira:issue_deleted')
+SCENARIOS = ('import', 'webhook', 'issue_list', 'export', 'attachments', 'reconcile', 'fetch')
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def get_scenarios(options):
+    for name in options.scenario or SCENARIOS:
+        if name == 'import':
+            for size in options.sizes:
+                yield ImportScenario(options, size)
+        elif name == 'webhook':
+            for event in WEBHOOK_EVENTS:
+                yield WebHookScenario(options, event)
+        elif name == 'issue_list':
+            yield IssueListScenario(options)
+        elif name == 'export':
+            for export_format in EXPORT_FORMATS:
+                yield ExportScenario(options, export_format)
+        elif name == 'attachments':
+            yield AttachmentScenario(options)
+        elif name == 'reconcile':
+            from waldur_jira.backend import ConcurrentJiraBackend, JiraBackend
+            for backend_class in (JiraBackend, ConcurrentJiraBackend):
+                yield ReconcileScenario(options, backend_class)
+        elif name == 'fetch':
+            from waldur_jira.backend import ConcurrentJiraBackend, JiraBackend
+            for backend_class in (JiraBackend, ConcurrentJiraBackend):
+                yield FetchScenario(options, backend_class)
+
+
+def compare(results, baseline, tolerance):
+    """ Print results next to baseline values. :return: list of regressed metrics. """
+    regressions = []
+    print('%-36s %-14s %12s %12s %8s' % ('benchmark', 'metric', 'current', 'baseline', 'change'))
+    for name, metrics in results.items():
+        for metric in METRICS:
+            value = metrics[metric]
+            expected = baseline.get(name, {}).get(metric)
+            if expected:
+                change = (value - expected) / float(expected)
+                mark = ' !' if change > tolerance else ''
+                print('%-36s %-14s %12s %12s %+7.1f%%%s' % (name, metric, value, expected, change * 100, mark))
+                if change > tolerance:
+                    regressions.append((name, metric))
+            else:
+                print('%-36s %-14s %12s %12s %8s' % (name, metric, value, '-', '-'))
+    return regressions
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description='Benchmark JIRA plugin against stub JIRA.')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Scenario to run, may be repeated. All scenarios are run by default.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000],
+                        help='Numbers of issues imported by import scenario.')
+    parser.add_argument('--comments', type=int, default=5, help='Number of comments of each issue.')
+    parser.add_argument('--events', type=int, default=100, help='Number of webhook events of each type.')
+    parser.add_argument('--issues', type=int, default=500, help='Number of issues listed by issue_list scenario.')
+    parser.add_argument('--export-issues', type=int, default=20000,
+                        help='Number of issues streamed by export scenario.')
+    parser.add_argument('--attachments', type=int, default=2, help='Number of attachments of each issue.')
+    parser.add_argument('--attachment-issues', type=int, default=10,
+                        help='Number of issues synchronized by attachments scenario.')
+    parser.add_argument('--attachment-size', type=int, default=10, help='Size of each attachment in megabytes.')
+    parser.add_argument('--reconcile-issues', type=int, default=1000,
+                        help='Number of issues refreshed by reconcile scenario.')
+    parser.add_argument('--fetch-issues', type=int, default=1000, help='Number of issues fetched by fetch scenario.')
+    parser.add_argument('--network-latency', type=float, default=0.2,
+                        help='Latency of stub JIRA in seconds used by reconcile and fetch scenarios '
+                             'unless --latency is set.')
+    parser.add_argument('--latency', type=float, default=0, help='Latency of stub JIRA in seconds.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Path to JSON file with baseline results.')
+    parser.add_argument('--save-baseline', action='store_true', help='Store results as new baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Relative increase of metric which is reported as regression.')
+    return parser
+
+
+def main(argv=None):
+    options = get_parser().parse_args(argv)
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings
+
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    runner.setup_test_environment()
+    databases = runner.setup_databases()
+    media_root = tempfile.mkdtemp()
+    results = collections.OrderedDict()
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            for scenario in get_scenarios(options):
+                results.update(scenario.execute())
+                call_command('flush', interactive=False, verbosity=0)
+    finally:
+        shutil.rmtree(media_root)
+        runner.teardown_databases(databases)
+        runner.teardown_test_environment()
+
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    regressions = compare(results, baseline, options.tolerance)
+
+    if options.save_baseline:
+        baseline.update(results)
+        with open(options.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True, separators=(',', ': '))
+            baseline_file.write('\n')
+    elif regressions:
+        print('\n%s metrics exceed baseline by more than %d%%.' % (len(regressions), options.tolerance * 100))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
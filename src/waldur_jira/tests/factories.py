@@ -1,6 +1,7 @@
 import factory
 
 from django.core.urlresolvers import reverse
+from django.utils import timezone
 
 from waldur_core.structure.tests import factories as structure_factories
 
@@ -145,7 +146,7 @@ class IssueFactory(factory.DjangoModelFactory):
     assignee_name = factory.Sequence(lambda n: 'ASSIGNEE-%s' % n)
     reporter_name = factory.Sequence(lambda n: 'REPORTER-%s' % n)
     creator_name = factory.Sequence(lambda n: 'CREATOR-%s' % n)
-    resolution_date = factory.Sequence(lambda n: 'RESOLUTION_DATE-%s' % n)
+    resolution_date = factory.LazyAttribute(lambda o: timezone.now())
     project = factory.SubFactory(ProjectFactory)
 
     @classmethod
@@ -156,8 +157,9 @@ class IssueFactory(factory.DjangoModelFactory):
         return url if action is None else url + action + '/'
 
     @classmethod
-    def get_list_url(cls):
-        return 'http://testserver' + reverse('jira-issues-list')
+    def get_list_url(cls, action=None):
+        url = 'http://testserver' + reverse('jira-issues-list')
+        return url if action is None else url + action + '/'
 
 
 class CommentFactory(factory.DjangoModelFactory):
@@ -175,5 +177,6 @@ class CommentFactory(factory.DjangoModelFactory):
         return url if action is None else url + action + '/'
 
     @classmethod
-    def get_list_url(cls):
-        return 'http://testserver' + reverse('jira-comments-list')
+    def get_list_url(cls, action=None):
+        url = 'http://testserver' + reverse('jira-comments-list')
+        return url if action is None else url + action + '/'
@@ -0,0 +1,724 @@
+""" In-process stub of JIRA REST API for offline tests, benchmarks and load tests.
+
+It serves synthetic projects and issues of configurable size which are generated
+lazily and deterministically, so that even huge instances do not consume memory
+until issues are modified. Latency, server errors and rate limiting may be injected.
+
+Usage:
+
+    with StubJiraServer(projects=2, issues_per_project=1000, latency=0.01) as server:
+        service_settings.backend_url = server.url
+        ...
+        print(server.request_count)
+"""
+from __future__ import unicode_literals
+
+import calendar
+import cgi
+import collections
+import datetime
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, urlparse
+
+API_PREFIX = '/rest/api/2/'
+TEMPLATES_PATH = '/rest/project-templates/latest/templates'
+ATTACHMENT_CONTENT_PREFIX = '/secure/attachment/'
+BASE_TIME = datetime.datetime(2018, 1, 1)
+SLA_FIELD_ID = 'customfield_10138'
+
+PRIORITIES = [
+    {'id': '1', 'name': 'Highest', 'description': 'Blocker', 'iconUrl': '/images/icons/priorities/highest.svg'},
+    {'id': '2', 'name': 'High', 'description': 'Serious problem', 'iconUrl': '/images/icons/priorities/high.svg'},
+    {'id': '3', 'name': 'Medium', 'description': 'Default priority', 'iconUrl': '/images/icons/priorities/medium.svg'},
+    {'id': '4', 'name': 'Low', 'description': 'Minor problem', 'iconUrl': '/images/icons/priorities/low.svg'},
+]
+ISSUE_TYPES = [
+    {'id': '10000', 'name': 'Task', 'description': 'A task that needs to be done.',
+     'iconUrl': '/images/icons/issuetypes/task.svg', 'subtask': False},
+    {'id': '10001', 'name': 'Bug', 'description': 'A problem which impairs product functions.',
+     'iconUrl': '/images/icons/issuetypes/bug.svg', 'subtask': False},
+    {'id': '10002', 'name': 'Sub-task', 'description': 'The sub-task of the issue.',
+     'iconUrl': '/images/icons/issuetypes/subtask.svg', 'subtask': True},
+]
+STATUSES = ['Open', 'In Progress', 'Resolved']
+
+
+def _format_time(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+
+def _epoch_millis(value):
+    return int(calendar.timegm(value.timetuple()) * 1000)
+
+
+def _split_key(issue_key):
+    project_key, number = issue_key.rsplit('-', 1)
+    return project_key, int(number)
+
+
+class StubJiraError(Exception):
+    def __init__(self, status, message=None, headers=None):
+        super(StubJiraError, self).__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class StubJiraServer(object):
+    """ JIRA instance living in background thread of the current process.
+
+    :param projects: number of synthetic projects, their keys are P1, P2, ...
+    :param issues_per_project: number of synthetic issues in each project.
+    :param comments_per_issue: number of synthetic comments of each issue.
+    :param embedded_comments: maximum number of comments embedded into issue representation.
+    :param attachments_per_issue: number of synthetic attachments of each issue.
+    :param attachment_size: size of synthetic attachment in bytes.
+    :param max_results: maximum page size of search and comment list, as configured in JIRA.
+    :param latency: delay in seconds added to each response.
+    :param error_rate: probability of responding with 500 Internal Server Error.
+    :param rate_limit: maximum number of requests per second, exceeding ones get 429 Too Many Requests.
+    :param seed: seed of random generator used for error injection.
+    """
+
+    def __init__(self, projects=1, issues_per_project=100, comments_per_issue=0, embedded_comments=20,
+                 attachments_per_issue=0, attachment_size=1024, max_results=100,
+                 latency=0, error_rate=0, rate_limit=None, seed=0):
+        self.project_keys = ['P%s' % number for number in range(1, projects + 1)]
+        self.issues_per_project = issues_per_project
+        self.comments_per_issue = comments_per_issue
+        self.embedded_comments = embedded_comments
+        self.attachments_per_issue = attachments_per_issue
+        self.attachment_size = attachment_size
+        self.max_results = max_results
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+
+        self.lock = threading.RLock()
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.request_counts = collections.Counter()
+        self.recent_requests = collections.deque()
+
+        # Issues which have been created or modified are materialized and kept here
+        self.issues = {}
+        self.deleted_keys = set()
+        self.last_issue_numbers = {key: issues_per_project for key in self.project_keys}
+        self.attachment_issue_keys = {}
+        self.uploaded_contents = {}
+        self.next_id = 1000000
+
+        self.httpd = None
+        self.thread = None
+
+    # Lifecycle
+
+    def start(self):
+        self.httpd = _ThreadingHTTPServer(('127.0.0.1', 0), _RequestHandler)
+        self.httpd.stub = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return 'http://%s:%s' % (host, port)
+
+    def reset_counters(self):
+        with self.lock:
+            self.request_count = 0
+            self.request_counts.clear()
+            self.recent_requests.clear()
+
+    # Request dispatching
+
+    ROUTES = [
+        ('GET', r'serverInfo$', 'get_server_info'),
+        ('GET', r'myself$', 'get_myself'),
+        ('GET', r'field$', 'get_fields'),
+        ('GET', r'priority$', 'get_priorities'),
+        ('GET', r'project$', 'get_projects'),
+        ('GET', r'project/(?P<key>[^/]+)$', 'get_project'),
+        ('GET', r'search$', 'search'),
+        ('POST', r'search$', 'search'),
+        ('POST', r'issue$', 'create_issue'),
+        ('POST', r'issue/bulk$', 'create_issues'),
+        ('GET', r'issue/(?P<key>[^/]+)$', 'get_issue'),
+        ('PUT', r'issue/(?P<key>[^/]+)$', 'update_issue'),
+        ('DELETE', r'issue/(?P<key>[^/]+)$', 'delete_issue'),
+        ('GET', r'issue/(?P<key>[^/]+)/comment$', 'get_comments'),
+        ('POST', r'issue/(?P<key>[^/]+)/comment$', 'create_comment'),
+        ('GET', r'issue/(?P<key>[^/]+)/comment/(?P<comment_id>\d+)$', 'get_comment'),
+        ('PUT', r'issue/(?P<key>[^/]+)/comment/(?P<comment_id>\d+)$', 'update_comment'),
+        ('DELETE', r'issue/(?P<key>[^/]+)/comment/(?P<comment_id>\d+)$', 'delete_comment'),
+        ('POST', r'issue/(?P<key>[^/]+)/attachments$', 'create_attachment'),
+        ('GET', r'attachment/(?P<attachment_id>\d+)$', 'get_attachment'),
+        ('DELETE', r'attachment/(?P<attachment_id>\d+)$', 'delete_attachment'),
+    ]
+
+    def dispatch(self, method, path, query, body, headers):
+        """ :return: tuple of status, body and content type. """
+        self.check_limits(method, path)
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path.startswith(TEMPLATES_PATH):
+            return 200, self.get_project_templates(), 'application/json'
+        if path.startswith(ATTACHMENT_CONTENT_PREFIX):
+            attachment_id = path[len(ATTACHMENT_CONTENT_PREFIX):].split('/')[0]
+            return 200, self.get_attachment_content(attachment_id), 'application/octet-stream'
+
+        if path.startswith(API_PREFIX):
+            resource_path = path[len(API_PREFIX):].rstrip('/')
+            for route_method, pattern, handler in self.ROUTES:
+                match = re.match(pattern, resource_path)
+                if route_method == method and match:
+                    kwargs = match.groupdict()
+                    if method in ('POST', 'PUT'):
+                        kwargs['data'] = self.parse_body(body, headers)
+                    if method == 'GET' or handler == 'search':
+                        kwargs['query'] = query
+                    result = getattr(self, handler)(**kwargs)
+                    if result is None:
+                        return 204, b'', 'application/json'
+                    status = 201 if method == 'POST' and handler != 'search' else 200
+                    return status, json.dumps(result).encode('utf-8'), 'application/json'
+
+        raise StubJiraError(404, 'Resource %s is not found.' % path)
+
+    def check_limits(self, method, path):
+        with self.lock:
+            self.request_count += 1
+            self.request_counts['%s %s' % (method, self.normalize_path(path))] += 1
+
+            if self.rate_limit:
+                now = time.time()
+                while self.recent_requests and self.recent_requests[0] <= now - 1:
+                    self.recent_requests.popleft()
+                if len(self.recent_requests) >= self.rate_limit:
+                    raise StubJiraError(429, 'Rate limit exceeded.', {'Retry-After': '1'})
+                self.recent_requests.append(now)
+
+            if self.error_rate and self.random.random() < self.error_rate:
+                raise StubJiraError(500, 'Injected server error.')
+
+    @staticmethod
+    def normalize_path(path):
+        """ Replace keys and ids with placeholders so that requests are counted per endpoint. """
+        if path.startswith(ATTACHMENT_CONTENT_PREFIX):
+            return ATTACHMENT_CONTENT_PREFIX + '{id}/{filename}'
+        if not path.startswith(API_PREFIX):
+            return path
+        resource_path = re.sub(r'^(issue|project)/[^/]+', r'\1/{key}', path[len(API_PREFIX):])
+        return API_PREFIX + re.sub(r'/\d+', '/{id}', resource_path)
+
+    def parse_body(self, body, headers):
+        content_type = headers.get('Content-Type', '')
+        if content_type.startswith('multipart/form-data'):
+            environ = {'REQUEST_METHOD': 'POST', 'CONTENT_TYPE': content_type, 'CONTENT_LENGTH': str(len(body))}
+            form = cgi.FieldStorage(fp=six.BytesIO(body), environ=environ, keep_blank_values=True)
+            upload = form['file']
+            return {'filename': upload.filename, 'content': upload.value}
+        return json.loads(body.decode('utf-8')) if body else {}
+
+    # Metadata
+
+    def get_server_info(self, query):
+        return {'baseUrl': self.url, 'version': '7.3.0', 'versionNumbers': [7, 3, 0],
+                'deploymentType': 'Server', 'serverTitle': 'Stub JIRA'}
+
+    def get_myself(self, query):
+        return self.get_user('admin')
+
+    def get_fields(self, query):
+        return [
+            {'id': 'summary', 'name': 'Summary', 'custom': False, 'clauseNames': ['summary']},
+            {'id': 'description', 'name': 'Description', 'custom': False, 'clauseNames': ['description']},
+            {'id': SLA_FIELD_ID, 'name': 'Time to resolution', 'custom': True,
+             'clauseNames': ['cf[10138]', 'Time to resolution']},
+        ]
+
+    def get_priorities(self, query):
+        return [dict(priority, self=self.api_url('priority/%s' % priority['id'])) for priority in PRIORITIES]
+
+    def get_project_templates(self):
+        templates = [{
+            'projectTemplateModuleCompleteKey': 'com.atlassian.jira-core-project-templates:jira-core-task-management',
+            'name': 'Task management',
+            'description': 'Organize and assign tasks.',
+            'iconUrl': '/images/task-management.svg',
+        }]
+        return json.dumps({'projectTemplatesGroupedByType': [{'projectTemplates': templates}]}).encode('utf-8')
+
+    def get_user(self, username):
+        return {
+            'self': self.api_url('user?username=%s' % username),
+            'name': username,
+            'key': username,
+            'displayName': username.title(),
+            'emailAddress': '%s@example.com' % username,
+            'active': True,
+        }
+
+    # Projects
+
+    def get_projects(self, query):
+        expand = query.get('expand', [''])[0]
+        return [self.serialize_project(key, 'issueTypes' in expand) for key in self.project_keys]
+
+    def get_project(self, key, query):
+        if key not in self.project_keys:
+            raise StubJiraError(404, 'No project could be found with key \'%s\'.' % key)
+        return self.serialize_project(key, True)
+
+    def serialize_project(self, key, issue_types=False):
+        project_id = str(10000 + self.project_keys.index(key))
+        project = {
+            'self': self.api_url('project/%s' % project_id),
+            'id': project_id,
+            'key': key,
+            'name': 'Project %s' % key,
+            'description': 'Synthetic project %s' % key,
+        }
+        if issue_types:
+            project['issueTypes'] = [
+                dict(issue_type, self=self.api_url('issuetype/%s' % issue_type['id'])) for issue_type in ISSUE_TYPES
+            ]
+        return project
+
+    # Issues
+
+    def search(self, query, data=None):
+        params = dict((name, values[0]) for name, values in query.items())
+        params.update(data or {})
+        # Client sends list of fields either as repeated query parameter or in request body
+        fields = params['fields'] if data and 'fields' in data else query.get('fields')
+        if isinstance(fields, list):
+            fields = ','.join(fields)
+        start_at = int(params.get('startAt', 0))
+        max_results = min(int(params.get('maxResults', 50)), self.max_results)
+
+        keys = self.find_issue_keys(params.get('jql', ''))
+        issues = [self.serialize_issue(key, fields) for key in keys[start_at:start_at + max_results]]
+        return {'startAt': start_at, 'maxResults': max_results, 'total': len(keys), 'issues': issues}
+
+    def find_issue_keys(self, jql):
+        """ Evaluate subset of JQL used by Waldur: project and key filters, updated lower bound and ordering. """
+        match = re.search(r'key in \(([^)]*)\)', jql)
+        if match:
+            keys = [key.strip(' "') for key in match.group(1).split(',')]
+            return [key for key in keys if self.issue_exists(key)]
+
+        match = re.search(r'project\s*=\s*"?([\w-]+)"?', jql) or re.search(r'project in \(([^)]*)\)', jql)
+        project_keys = [key.strip(' "') for key in match.group(1).split(',')] if match else self.project_keys
+        keys = [key for project_key in project_keys for key in self.iterate_project_keys(project_key)]
+
+        match = re.search(r'updated >= "-(\d+)m"', jql)
+        if match:
+            since = _format_time(datetime.datetime.utcnow() - datetime.timedelta(minutes=int(match.group(1))))
+            keys = [key for key in keys if self.get_updated(key) >= since]
+
+        if re.search(r'ORDER BY updated', jql, re.IGNORECASE):
+            keys.sort(key=lambda key: (self.get_updated(key), _split_key(key)), reverse='DESC' in jql.upper())
+        return keys
+
+    def iterate_project_keys(self, project_key):
+        if project_key not in self.last_issue_numbers:
+            return
+        for number in range(1, self.last_issue_numbers[project_key] + 1):
+            key = '%s-%s' % (project_key, number)
+            if self.issue_exists(key):
+                yield key
+
+    def issue_exists(self, key):
+        if key in self.issues:
+            return True
+        if key in self.deleted_keys:
+            return False
+        try:
+            project_key, number = _split_key(key)
+        except ValueError:
+            return False
+        return project_key in self.project_keys and 1 <= number <= self.issues_per_project
+
+    def get_updated(self, key):
+        issue = self.issues.get(key)
+        return issue['fields']['updated'] if issue else self.generate_issue(key)['fields']['updated']
+
+    def get_issue_state(self, key):
+        """ :return: raw issue with full list of comments, it is generated if issue has not been modified. """
+        if not self.issue_exists(key):
+            raise StubJiraError(404, 'Issue Does Not Exist')
+        return self.issues.get(key) or self.generate_issue(key)
+
+    def materialize_issue(self, key):
+        with self.lock:
+            issue = self.get_issue_state(key)
+            self.issues[key] = issue
+            return issue
+
+    def touch_issue(self, issue):
+        issue['fields']['updated'] = _format_time(datetime.datetime.utcnow())
+
+    def generate_issue(self, key):
+        project_key, number = _split_key(key)
+        issue_id = str(number + 100000 * (self.project_keys.index(project_key) + 1))
+        created = BASE_TIME + datetime.timedelta(minutes=number)
+        priority = PRIORITIES[number % len(PRIORITIES)]
+        issue_type = ISSUE_TYPES[number % 2]
+        comments = [
+            self.generate_comment(key, issue_id, index, created)
+            for index in range(1, self.comments_per_issue + 1)
+        ]
+        attachments = [
+            self.generate_attachment(issue_id, index, created)
+            for index in range(1, self.attachments_per_issue + 1)
+        ]
+
+        return {
+            'id': issue_id,
+            'key': key,
+            'self': self.api_url('issue/%s' % issue_id),
+            'fields': {
+                'project': self.serialize_project(project_key),
+                'summary': 'Synthetic issue %s' % key,
+                'description': 'Description of synthetic issue %s.\n' % key * 3,
+                'status': {'id': str(number % len(STATUSES) + 1), 'name': STATUSES[number % len(STATUSES)]},
+                'resolution': None,
+                'resolutiondate': None,
+                'priority': dict(priority, self=self.api_url('priority/%s' % priority['id'])),
+                'issuetype': dict(issue_type, self=self.api_url('issuetype/%s' % issue_type['id'])),
+                'assignee': self.get_user('assignee'),
+                'creator': self.get_user('creator'),
+                'reporter': self.get_user('reporter'),
+                'created': _format_time(created),
+                'updated': _format_time(created + datetime.timedelta(hours=1)),
+                'attachment': attachments,
+                'comment': comments,
+                SLA_FIELD_ID: {'ongoingCycle': {
+                    'breachTime': {'epochMillis': _epoch_millis(created + datetime.timedelta(days=1))},
+                    'paused': False,
+                    'remainingTime': {'millis': 3600000},
+                }},
+            },
+        }
+
+    def generate_comment(self, key, issue_id, index, created):
+        comment_id = '%s%03d' % (issue_id, index)
+        timestamp = _format_time(created + datetime.timedelta(seconds=index))
+        return {
+            'id': comment_id,
+            'self': self.api_url('issue/%s/comment/%s' % (issue_id, comment_id)),
+            'body': 'Comment %s of issue %s' % (index, key),
+            'author': self.get_user('reporter'),
+            'created': timestamp,
+            'updated': timestamp,
+        }
+
+    def generate_attachment(self, issue_id, index, created):
+        attachment_id = '%s%03d' % (issue_id, index)
+        return self.serialize_attachment(attachment_id, 'attachment-%s.bin' % index,
+                                         self.attachment_size, _format_time(created))
+
+    def serialize_attachment(self, attachment_id, filename, size, created):
+        return {
+            'id': attachment_id,
+            'self': self.api_url('attachment/%s' % attachment_id),
+            'filename': filename,
+            'size': size,
+            'mimeType': 'application/octet-stream',
+            'created': created,
+            'author': self.get_user('reporter'),
+            'content': '%s%s%s/%s' % (self.url, ATTACHMENT_CONTENT_PREFIX, attachment_id, filename),
+        }
+
+    def serialize_issue(self, key, fields=None):
+        issue = self.get_issue_state(key)
+        comments = issue['fields']['comment']
+        result = dict(issue, fields=dict(issue['fields'], comment={
+            'comments': comments[:self.embedded_comments],
+            'maxResults': self.embedded_comments,
+            'total': len(comments),
+            'startAt': 0,
+        }))
+
+        if fields and fields not in ('*all', '*navigable'):
+            names = set(fields.split(','))
+            result['fields'] = {name: value for name, value in result['fields'].items() if name in names}
+        return result
+
+    def get_issue(self, key, query):
+        return self.serialize_issue(self.resolve_key(key), query.get('fields', [None])[0])
+
+    def resolve_key(self, key_or_id):
+        """ Resources of issue are referenced either with key or with numeric id. """
+        if not key_or_id.isdigit():
+            return key_or_id
+        number = int(key_or_id)
+        project_key = self.project_keys[number // 100000 - 1] if 0 < number // 100000 <= len(self.project_keys) else ''
+        return '%s-%s' % (project_key, number % 100000)
+
+    def create_issue(self, data):
+        with self.lock:
+            issue = self.add_issue(data['fields'])
+        return {'id': issue['id'], 'key': issue['key'], 'self': issue['self']}
+
+    def create_issues(self, data):
+        issues = []
+        with self.lock:
+            for issue_update in data['issueUpdates']:
+                issue = self.add_issue(issue_update['fields'])
+                issues.append({'id': issue['id'], 'key': issue['key'], 'self': issue['self']})
+        return {'issues': issues, 'errors': []}
+
+    def add_issue(self, fields):
+        project = fields.get('project') or {}
+        project_key = project.get('key') or self.project_keys[int(project.get('id', 10000)) - 10000]
+        self.last_issue_numbers[project_key] += 1
+        key = '%s-%s' % (project_key, self.last_issue_numbers[project_key])
+
+        # Issue is generated only in order to get default values of fields
+        issue = self.generate_issue('%s-1' % project_key)
+        number = self.last_issue_numbers[project_key]
+        issue_id = str(number + 100000 * (self.project_keys.index(project_key) + 1))
+        issue.update(id=issue_id, key=key, self=self.api_url('issue/%s' % issue_id))
+        issue['fields'].update(comment=[], attachment=[], resolution=None, resolutiondate=None)
+        self.apply_fields(issue, fields)
+        self.touch_issue(issue)
+        self.issues[key] = issue
+        return issue
+
+    def apply_fields(self, issue, fields):
+        for name, value in fields.items():
+            if name == 'project':
+                continue
+            if name == 'issuetype' and isinstance(value, dict):
+                value = next((issue_type for issue_type in ISSUE_TYPES
+                              if value.get('id') == issue_type['id'] or value.get('name') == issue_type['name']),
+                             ISSUE_TYPES[0])
+            elif name == 'priority' and isinstance(value, dict):
+                value = next((priority for priority in PRIORITIES
+                              if value.get('id') == priority['id'] or value.get('name') == priority['name']),
+                             PRIORITIES[2])
+            issue['fields'][name] = value
+
+    def update_issue(self, key, data):
+        with self.lock:
+            issue = self.materialize_issue(self.resolve_key(key))
+            self.apply_fields(issue, data.get('fields', {}))
+            self.touch_issue(issue)
+
+    def delete_issue(self, key):
+        with self.lock:
+            key = self.resolve_key(key)
+            self.get_issue_state(key)
+            self.issues.pop(key, None)
+            self.deleted_keys.add(key)
+
+    # Comments
+
+    def get_comments(self, key, query):
+        comments = self.get_issue_state(self.resolve_key(key))['fields']['comment']
+        start_at = int(query.get('startAt', [0])[0])
+        max_results = min(int(query.get('maxResults', [50])[0]), self.max_results)
+        return {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(comments),
+            'comments': comments[start_at:start_at + max_results],
+        }
+
+    def find_comment(self, key, comment_id):
+        issue = self.get_issue_state(self.resolve_key(key))
+        for comment in issue['fields']['comment']:
+            if comment['id'] == comment_id:
+                return comment
+        raise StubJiraError(404, 'Can not find a comment for the id: %s.' % comment_id)
+
+    def get_comment(self, key, comment_id, query):
+        return self.find_comment(key, comment_id)
+
+    def create_comment(self, key, data):
+        with self.lock:
+            issue = self.materialize_issue(self.resolve_key(key))
+            comment_id = self.generate_id()
+            timestamp = _format_time(datetime.datetime.utcnow())
+            comment = {
+                'id': comment_id,
+                'self': self.api_url('issue/%s/comment/%s' % (issue['id'], comment_id)),
+                'body': data.get('body', ''),
+                'author': self.get_user('admin'),
+                'created': timestamp,
+                'updated': timestamp,
+            }
+            issue['fields']['comment'].append(comment)
+            self.touch_issue(issue)
+            return comment
+
+    def update_comment(self, key, comment_id, data):
+        with self.lock:
+            self.materialize_issue(self.resolve_key(key))
+            comment = self.find_comment(key, comment_id)
+            comment['body'] = data.get('body', comment['body'])
+            comment['updated'] = _format_time(datetime.datetime.utcnow())
+            return comment
+
+    def delete_comment(self, key, comment_id):
+        with self.lock:
+            issue = self.materialize_issue(self.resolve_key(key))
+            comment = self.find_comment(key, comment_id)
+            issue['fields']['comment'].remove(comment)
+            self.touch_issue(issue)
+
+    # Attachments
+
+    def create_attachment(self, key, data):
+        with self.lock:
+            issue = self.materialize_issue(self.resolve_key(key))
+            attachment_id = self.generate_id()
+            attachment = self.serialize_attachment(attachment_id, data['filename'], len(data['content']),
+                                                   _format_time(datetime.datetime.utcnow()))
+            issue['fields']['attachment'].append(attachment)
+            self.attachment_issue_keys[attachment_id] = issue['key']
+            self.uploaded_contents[attachment_id] = data['content']
+            self.touch_issue(issue)
+            return [attachment]
+
+    def find_attachment(self, attachment_id):
+        # Only uploaded attachments are registered, id of synthetic one is derived from id of its issue
+        key = self.attachment_issue_keys.get(attachment_id) or self.resolve_key(attachment_id[:-3])
+        if self.issue_exists(key):
+            for attachment in self.get_issue_state(key)['fields']['attachment']:
+                if attachment['id'] == attachment_id:
+                    return key, attachment
+        raise StubJiraError(404, 'The attachment with id \'%s\' does not exist' % attachment_id)
+
+    def get_attachment(self, attachment_id, query):
+        return self.find_attachment(attachment_id)[1]
+
+    def delete_attachment(self, attachment_id):
+        with self.lock:
+            key, attachment = self.find_attachment(attachment_id)
+            issue = self.materialize_issue(key)
+            issue['fields']['attachment'] = [
+                item for item in issue['fields']['attachment'] if item['id'] != attachment_id
+            ]
+            self.uploaded_contents.pop(attachment_id, None)
+            self.touch_issue(issue)
+
+    def get_attachment_content(self, attachment_id):
+        if attachment_id in self.uploaded_contents:
+            return self.uploaded_contents[attachment_id]
+        size = self.find_attachment(attachment_id)[1]['size']
+        return (b'%s\n' % attachment_id.encode('ascii') * (size // (len(attachment_id) + 1) + 1))[:size]
+
+    # Helpers
+
+    def api_url(self, path):
+        return self.url + API_PREFIX + path
+
+    def generate_id(self):
+        self.next_id += 1
+        return str(self.next_id)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, *args, **kwargs):
+        BaseHTTPServer.HTTPServer.__init__(self, *args, **kwargs)
+        self.connections = set()
+
+    def process_request(self, request, client_address):
+        self.connections.add(request)
+        socketserver.ThreadingMixIn.process_request(self, request, client_address)
+
+    def shutdown_request(self, request):
+        self.connections.discard(request)
+        BaseHTTPServer.HTTPServer.shutdown_request(self, request)
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        # Keep-alive connections of clients are closed so that handler threads are finished
+        for request in list(self.connections):
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+    def handle_error(self, request, client_address):
+        if sys.exc_info()[0] not in (socket.error, IOError):
+            BaseHTTPServer.HTTPServer.handle_error(self, request, client_address)
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        # Headers and body are written separately, so Nagle's algorithm would delay each response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_PUT(self):
+        self.handle_method('PUT')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
+
+    def handle_method(self, method):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        try:
+            status, content, content_type = stub.dispatch(
+                method, url.path, parse_qs(url.query, keep_blank_values=True), body, self.headers)
+            headers = {}
+        except StubJiraError as e:
+            status, content_type, headers = e.status, 'application/json', e.headers
+            content = json.dumps({'errorMessages': [e.message], 'errors': {}}).encode('utf-8')
+        except Exception as e:
+            status, content_type, headers = 500, 'application/json', {}
+            content = json.dumps({'errorMessages': [repr(e)], 'errors': {}}).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,143 @@
+import datetime
+
+import mock
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status, test
+
+from waldur_jira import analytics
+
+from . import factories, fixtures
+from .stub_server import SLA_FIELD_ID, StubJiraServer
+
+
+class IssueAnalyticsTest(test.APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.fixture = fixtures.JiraFixture()
+        self.project = self.fixture.jira_project
+        self.high = factories.PriorityFactory(settings=self.fixture.service_settings, name='High')
+        self.low = factories.PriorityFactory(settings=self.fixture.service_settings, name='Low')
+        self.issue_type = factories.IssueTypeFactory(settings=self.fixture.service_settings, name='Bug')
+        self.now = timezone.now()
+
+    def create_issue(self, hours, priority=None, assignee='alice', resolved_ago=1, sla_met=None):
+        resolution_date = self.now - datetime.timedelta(days=resolved_ago)
+        return factories.IssueFactory(
+            project=self.project,
+            priority=priority or self.high,
+            type=self.issue_type,
+            assignee_username=assignee,
+            backend_created=resolution_date - datetime.timedelta(hours=hours),
+            resolution_date=resolution_date,
+            resolution_sla_met=sla_met,
+        )
+
+    def get_analytics(self, **query):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.ProjectFactory.get_list_url('issue_analytics'), query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_resolution_time_is_grouped_by_priority_and_assignee(self):
+        self.create_issue(1)
+        self.create_issue(2)
+        self.create_issue(9, assignee='bob')
+        self.create_issue(100, priority=self.low, assignee='bob')
+
+        data = self.get_analytics()
+
+        self.assertEqual(data['total']['count'], 4)
+        self.assertEqual(data['total']['mttr'], 28 * 3600)
+        high = data['priority']['High']
+        self.assertEqual(high['count'], 3)
+        self.assertEqual(high['mttr'], 4 * 3600)
+        self.assertEqual(high['resolution_time'], {'p50': 2 * 3600, 'p90': 9 * 3600, 'p99': 9 * 3600})
+        self.assertEqual(high['histogram'], [1, 1, 0, 1, 0, 0, 0, 0])
+        self.assertEqual(data['priority']['Low']['histogram'], [0, 0, 0, 0, 0, 1, 0, 0])
+        self.assertEqual(data['assignee']['bob']['resolution_time']['p50'], 9 * 3600)
+        self.assertEqual(data['type']['Bug']['count'], 4)
+
+    def test_sla_compliance_is_computed_for_issues_with_completed_sla_cycle(self):
+        self.create_issue(1, sla_met=True)
+        self.create_issue(1, sla_met=False)
+        self.create_issue(1, priority=self.low)
+
+        data = self.get_analytics()
+
+        self.assertEqual(data['total']['sla_compliance'], 0.5)
+        self.assertEqual(data['priority']['High']['sla_compliance'], 0.5)
+        self.assertIsNone(data['priority']['Low']['sla_compliance'])
+
+    def test_issues_resolved_before_window_are_skipped(self):
+        self.create_issue(1, resolved_ago=1)
+        self.create_issue(1, resolved_ago=10)
+
+        self.assertEqual(self.get_analytics(window=7)['total']['count'], 1)
+        self.assertEqual(self.get_analytics(window=30)['total']['count'], 2)
+
+    def test_empty_scope(self):
+        data = self.get_analytics()
+
+        self.assertEqual(data['total']['count'], 0)
+        self.assertIsNone(data['total']['mttr'])
+        self.assertEqual(data['priority'], {})
+
+    def test_analytics_is_cached_until_issue_is_changed(self):
+        issue = self.create_issue(1)
+
+        with mock.patch('waldur_jira.analytics.compute_analytics', wraps=analytics.compute_analytics) as compute:
+            self.assertEqual(self.get_analytics()['total']['mttr'], 3600)
+            self.assertEqual(self.get_analytics()['total']['mttr'], 3600)
+            self.assertEqual(compute.call_count, 1)
+
+            issue.backend_created -= datetime.timedelta(hours=1)
+            issue.save()
+
+            self.assertEqual(self.get_analytics()['total']['mttr'], 2 * 3600)
+            self.assertEqual(compute.call_count, 2)
+
+    def test_window_is_validated(self):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.ProjectFactory.get_list_url('issue_analytics'), {'window': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IssueSlaComplianceTest(test.APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = StubJiraServer().start()
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.issues = [factories.IssueFactory(project=self.project, backend_id='P1-%s' % number)
+                       for number in range(1, 4)]
+
+    def tearDown(self):
+        self.server.stop()
+
+    def resolve_issue(self, key, completed_cycles):
+        resolution_date = timezone.now() - datetime.timedelta(days=1)
+        self.server.update_issue(key, {'fields': {
+            'resolution': {'id': '1', 'name': 'Done'},
+            'resolutiondate': resolution_date.strftime('%Y-%m-%dT%H:%M:%S.000+0000'),
+            SLA_FIELD_ID: {'completedCycles': completed_cycles},
+        }})
+
+    def test_sla_compliance_is_computed_from_completed_cycles_of_resolved_issues(self):
+        self.resolve_issue('P1-1', [{'breached': True}, {'breached': False}])
+        self.resolve_issue('P1-2', [{'breached': True}])
+        self.resolve_issue('P1-3', [])
+        self.project.get_backend().pull_issues(self.issues)
+
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.ProjectFactory.get_list_url('issue_analytics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total']['count'], 3)
+        self.assertEqual(response.data['total']['sla_compliance'], 0.5)
+        self.assertEqual(response.data['priority']['High']['sla_compliance'], 1)
+        self.assertEqual(response.data['priority']['Medium']['sla_compliance'], 0)
+        self.assertIsNone(response.data['priority']['Low']['sla_compliance'])
@@ -0,0 +1,59 @@
+from django.test import TestCase
+
+from waldur_core.structure.tests import factories as structure_factories
+
+from .. import models, utils
+
+
+class CommentMessageTest(TestCase):
+    def setUp(self):
+        self.user = structure_factories.UserFactory(username='alice', full_name='Alice Smith')
+
+    def _get_message(self, body, user):
+        return models.Comment(message=body, user=user).prepare_message()
+
+    def test_footer_is_stripped_and_user_is_resolved(self):
+        comment = models.Comment()
+        comment.clean_message(self._get_message('Body', self.user))
+
+        self.assertEqual(comment.message, 'Body')
+        self.assertEqual(comment.user, self.user)
+
+    def test_batch_users_are_resolved_with_single_query(self):
+        other_user = structure_factories.UserFactory(username='bob', full_name='Bob')
+        messages = [self._get_message('Body %s' % i, user) for i, user in enumerate([self.user, other_user] * 3)]
+        comments = [models.Comment() for _ in messages]
+
+        with self.assertNumQueries(1):
+            models.Comment.clean_messages(comments, messages)
+
+        self.assertEqual([comment.user for comment in comments], [self.user, other_user] * 3)
+        self.assertEqual(comments[2].message, 'Body 2')
+
+    def test_message_without_footer_is_kept(self):
+        comments = [models.Comment()]
+        models.Comment.clean_messages(comments, ['Plain message'])
+
+        self.assertEqual(comments[0].message, 'Plain message')
+        self.assertIsNone(comments[0].user)
+
+
+class UserResolverTest(TestCase):
+    def test_cached_users_are_not_queried_again(self):
+        structure_factories.UserFactory(username='alice')
+        resolver = utils.UserResolver()
+        resolver.resolve(['alice', 'unknown'])
+
+        with self.assertNumQueries(0):
+            users = resolver.resolve(['alice', 'unknown'])
+
+        self.assertEqual(list(users.keys()), ['alice'])
+
+    def test_least_recently_used_user_is_evicted(self):
+        resolver = utils.UserResolver(size=2)
+        resolver.resolve(['alice'])
+        resolver.resolve(['bob'])
+        resolver.resolve(['alice'])
+        resolver.resolve(['carol'])
+
+        self.assertEqual(set(resolver.cache.keys()), {'alice', 'carol'})
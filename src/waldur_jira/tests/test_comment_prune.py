@@ -0,0 +1,71 @@
+import mock
+from rest_framework import test
+
+from .. import models
+from . import factories, fixtures
+
+
+class PruneDeletedCommentsTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.project = self.fixture.jira_project
+        self.backend = self.project.get_backend()
+
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+
+        self.issue = factories.IssueFactory(project=self.project, backend_id='TST-1')
+        self.actual_comment = factories.CommentFactory(issue=self.issue, backend_id='100')
+        self.stale_comment = factories.CommentFactory(issue=self.issue, backend_id='101')
+        self.jira_mock().search_issues.return_value = self._get_search_result(self._get_raw_issue('TST-1', ['100']))
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_stale_comment_is_deleted(self):
+        self.backend.prune_deleted_comments(self.project)
+
+        self.assertTrue(models.Comment.objects.filter(id=self.actual_comment.id).exists())
+        self.assertFalse(models.Comment.objects.filter(id=self.stale_comment.id).exists())
+
+    def test_deletion_is_scoped_to_issue(self):
+        other_issue = factories.IssueFactory(backend_id='OTHER-1')
+        other_comment = factories.CommentFactory(issue=other_issue, backend_id='101')
+
+        self.backend.delete_old_comments(self.issue)
+
+        self.assertFalse(models.Comment.objects.filter(id=self.stale_comment.id).exists())
+        self.assertTrue(models.Comment.objects.filter(id=other_comment.id).exists())
+
+    def test_comments_of_missing_issue_are_kept(self):
+        self.jira_mock().search_issues.return_value = self._get_search_result()
+
+        self.backend.prune_deleted_comments(self.project)
+
+        self.assertTrue(models.Comment.objects.filter(id=self.stale_comment.id).exists())
+
+    def test_only_comment_field_is_requested(self):
+        self.backend.prune_deleted_comments(self.project)
+
+        self.jira_mock().search_issues.assert_called_once_with(
+            'key in (TST-1)', startAt=0, maxResults=1, fields='comment', validate_query=False, json_result=True)
+
+    def test_truncated_comments_are_listed_page_by_page(self):
+        raw_issue = self._get_raw_issue('TST-1', ['100'])
+        raw_issue['fields']['comment']['total'] = 2
+        self.jira_mock().search_issues.return_value = self._get_search_result(raw_issue)
+        self.jira_mock()._get_json.return_value = {'comments': [{'id': '100'}, {'id': '102'}], 'total': 2}
+
+        self.assertEqual(self.backend.get_comment_ids(['TST-1']), {'TST-1': {'100', '102'}})
+
+    def _get_search_result(self, *raw_issues):
+        return {'issues': list(raw_issues), 'total': len(raw_issues)}
+
+    def _get_raw_issue(self, key, comment_ids):
+        return {
+            'key': key,
+            'fields': {'comment': {
+                'total': len(comment_ids),
+                'comments': [{'id': comment_id, 'body': 'Comment body'} for comment_id in comment_ids],
+            }},
+        }
@@ -0,0 +1,71 @@
+import mock
+from jira import JIRAError
+from jira.client import ResultList
+from rest_framework import test
+
+from waldur_jira.backend import ConcurrentJiraBackend, JiraBackendError
+
+from . import fixtures
+
+
+class ConcurrentBackendTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.backend = ConcurrentJiraBackend(self.fixture.service_settings)
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_all_search_pages_are_fetched(self):
+        def search_issues(jql, startAt, maxResults, fields):
+            keys = range(startAt, min(startAt + maxResults, 25))
+            return ResultList(['TST-%s' % key for key in keys], _total=25)
+
+        self.jira_mock().search_issues.side_effect = search_issues
+
+        issues = list(self.backend.search_all_issues('project=TST', page_size=10))
+
+        self.assertEqual(issues, ['TST-%s' % key for key in range(25)])
+        self.assertEqual(self.jira_mock().search_issues.call_count, 3)
+
+    def test_issues_are_not_skipped_if_jira_caps_page_size(self):
+        def search_issues(jql, startAt, maxResults, fields):
+            keys = range(startAt, min(startAt + min(maxResults, 7), 25))
+            return ResultList(['TST-%s' % key for key in keys], _total=25)
+
+        self.jira_mock().search_issues.side_effect = search_issues
+
+        issues = list(self.backend.search_all_issues('project=TST', page_size=10))
+
+        self.assertEqual(issues, ['TST-%s' % key for key in range(25)])
+
+    def test_concurrent_backend_is_used_by_jira_projects(self):
+        self.assertIsInstance(self.fixture.jira_project.get_backend(), ConcurrentJiraBackend)
+
+    def test_search_error_is_reraised(self):
+        self.jira_mock().search_issues.side_effect = JIRAError(status_code=400)
+
+        with self.assertRaises(JiraBackendError):
+            list(self.backend.search_all_issues('project=TST'))
+
+    def test_deleted_issues_are_reported(self):
+        def get_issue(key):
+            if key == 'TST-2':
+                raise JIRAError(status_code=404)
+            return key
+
+        self.jira_mock().issue.side_effect = get_issue
+
+        issues = self.backend.get_backend_issues(['TST-1', 'TST-2', 'TST-3'])
+
+        self.assertEqual(issues, {'TST-1': 'TST-1', 'TST-2': None, 'TST-3': 'TST-3'})
+
+    def test_metadata_is_fetched_together(self):
+        self.jira_mock().fields.return_value = [{'id': 'customfield_1', 'clauseNames': ['Impact']}]
+        self.jira_mock().priorities.return_value = ['High']
+
+        self.assertEqual(self.backend.prefetch_metadata(), ['High'])
+        self.assertEqual(self.backend.get_field_id_by_name('Impact'), 'customfield_1')
+        self.assertEqual(self.jira_mock().fields.call_count, 1)
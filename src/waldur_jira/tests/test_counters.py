@@ -0,0 +1,89 @@
+import datetime
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status, test
+from six import StringIO
+
+from waldur_jira import models
+
+from . import factories, fixtures
+from .stub_server import StubJiraServer
+
+
+class IssueCountersTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.project = self.fixture.jira_project
+        self.priority = factories.PriorityFactory(settings=self.fixture.service_settings, name='High')
+        self.issue_type = factories.IssueTypeFactory(settings=self.fixture.service_settings, name='Bug')
+
+    def create_issue(self, **kwargs):
+        kwargs.setdefault('status', 'Open')
+        return factories.IssueFactory(project=self.project, priority=self.priority, type=self.issue_type, **kwargs)
+
+    def get_statistics(self, user=None, **query):
+        self.client.force_authenticate(user or self.fixture.staff)
+        response = self.client.get(factories.ProjectFactory.get_list_url('issue_statistics'), query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counters_follow_issue_changes(self):
+        issue = self.create_issue()
+        self.create_issue()
+        issue.status = 'Closed'
+        issue.save()
+
+        statistics = self.get_statistics()
+        self.assertEqual(statistics['total'], 2)
+        self.assertEqual(statistics['status'], {'Open': 1, 'Closed': 1})
+        self.assertEqual(statistics['priority'], {'High': 2})
+        self.assertEqual(statistics['type'], {'Bug': 2})
+
+        issue.delete()
+        self.assertEqual(self.get_statistics()['status'], {'Open': 1})
+
+    def test_statistics_are_filtered_by_waldur_project(self):
+        self.create_issue()
+        other_project = factories.ProjectFactory()
+        factories.IssueFactory(project=other_project)
+
+        self.assertEqual(self.get_statistics()['total'], 2)
+        statistics = self.get_statistics(project_uuid=self.fixture.project.uuid.hex)
+        self.assertEqual(statistics['total'], 1)
+
+    def test_statistics_are_limited_to_visible_projects(self):
+        self.create_issue()
+        self.assertEqual(self.get_statistics(user=self.fixture.owner)['total'], 1)
+        self.assertEqual(self.get_statistics(user=self.fixture.user)['total'], 0)
+
+    def test_breached_sla_is_counted(self):
+        self.create_issue(resolution_sla_deadline=timezone.now() - datetime.timedelta(minutes=1))
+        self.create_issue(resolution_sla_deadline=timezone.now() + datetime.timedelta(minutes=1))
+
+        self.assertEqual(self.get_statistics()['sla_breached'], 1)
+
+    def test_counters_are_rebuilt(self):
+        self.create_issue()
+        models.IssueCounter.objects.update(count=100)
+
+        call_command('rebuild_issue_counters', stdout=StringIO())
+
+        self.assertEqual(models.IssueCounter.objects.get().count, 1)
+
+
+class BulkImportCountersTest(test.APITransactionTestCase):
+    def test_issues_imported_in_bulk_are_counted(self):
+        with StubJiraServer(issues_per_project=30) as server:
+            fixture = fixtures.JiraFixture()
+            fixture.service_settings.backend_url = server.url
+            fixture.service_settings.save()
+            project = factories.ProjectFactory(service_project_link=fixture.service_project_link, backend_id='P1')
+            backend = project.get_backend()
+            backend.import_project_issues(project, max_results=None)
+
+            issue = models.Issue.objects.get(project=project, backend_id='P1-1')
+            backend.pull_issues([issue])
+
+        counts = models.IssueCounter.objects.filter(project=project).values_list('count', flat=True)
+        self.assertEqual(sum(counts), 30)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import io
+import json
+
+import six
+from rest_framework import status, test
+
+from . import factories, fixtures
+
+
+class IssueExportTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.issue = factories.IssueFactory(project=self.fixture.jira_project, summary='Überprüfung, "quoted"')
+        self.url = factories.IssueFactory.get_list_url('export')
+
+    def export(self, user=None, **query):
+        self.client.force_authenticate(user or self.fixture.staff)
+        response = self.client.get(self.url, query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_issues_are_exported_as_ndjson(self):
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['uuid'], self.issue.uuid.hex)
+        self.assertEqual(rows[0]['summary'], self.issue.summary)
+        self.assertEqual(rows[0]['project'], self.issue.project.backend_id)
+        self.assertEqual(rows[0]['priority'], self.issue.priority.name)
+        self.assertEqual(rows[0]['updated'], self.issue.updated.isoformat())
+
+    def test_issues_are_exported_as_csv(self):
+        factories.IssueFactory(project=self.issue.project)
+
+        response, content = self.export(export_format='csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        if six.PY2:
+            lines = io.BytesIO(content.encode('utf-8'))
+            rows = [{key: value.decode('utf-8') for key, value in row.items()} for row in csv.DictReader(lines)]
+        else:
+            rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        row = next(row for row in rows if row['uuid'] == self.issue.uuid.hex)
+        self.assertEqual(row['summary'], self.issue.summary)
+        self.assertEqual(row['parent'], '')
+
+    def test_issues_are_filtered(self):
+        factories.IssueFactory()
+
+        _, content = self.export(project_uuid=self.fixture.project.uuid.hex)
+        self.assertEqual(len(content.splitlines()), 1)
+
+        _, content = self.export(user=self.fixture.user)
+        self.assertEqual(content, '')
+
+    def test_export_format_is_validated(self):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(self.url, {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CommentExportTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.issue = factories.IssueFactory(project=self.fixture.jira_project)
+        self.comment = factories.CommentFactory(issue=self.issue, message='Überprüfung', user=self.fixture.staff)
+        self.url = factories.CommentFactory.get_list_url('export')
+
+    def export(self, **query):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(self.url, query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_comments_are_exported_as_ndjson(self):
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['uuid'], self.comment.uuid.hex)
+        self.assertEqual(rows[0]['issue'], self.issue.backend_id)
+        self.assertEqual(rows[0]['project'], self.issue.project.backend_id)
+        self.assertEqual(rows[0]['username'], self.fixture.staff.username)
+        self.assertEqual(rows[0]['message'], self.comment.message)
+
+    def test_comments_are_exported_as_csv(self):
+        response, content = self.export(export_format='csv')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="comments.csv"')
+        lines = content.splitlines()
+        self.assertEqual(lines[0], 'uuid,key,issue_uuid,issue,project,username,message,created')
+        self.assertEqual(len(lines), 2)
+
+    def test_comments_are_filtered_by_jira_project(self):
+        factories.CommentFactory()
+
+        _, content = self.export(jira_project_uuid=self.fixture.jira_project.uuid.hex)
+
+        self.assertEqual(len(content.splitlines()), 1)
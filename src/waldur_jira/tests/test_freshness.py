@@ -0,0 +1,128 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework import status, test
+
+from waldur_jira import models, utils
+
+from . import factories, fixtures
+from .stub_server import StubJiraServer
+
+
+class SyncFreshnessTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer().start()
+        self.fixture = fixtures.JiraFixture()
+        self.service_settings = self.fixture.service_settings
+        self.service_settings.backend_url = self.server.url
+        self.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.backend = self.project.get_backend()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get_sync_status(self):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.ProjectFactory.get_url(self.project, action='sync_status'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def post_summary_change(self, key, event_time):
+        self.server.update_issue(key, {'fields': {'summary': 'Updated summary'}})
+        issue = self.server.serialize_issue(key)
+        issue['fields'].pop('comment', None)
+        payload = {
+            'webhookEvent': 'jira:issue_updated',
+            'timestamp': int(time.mktime(event_time.timetuple()) * 1000),
+            'issue': issue,
+            'changelog': {'items': [{'field': 'summary', 'fieldId': 'summary', 'toString': 'Updated summary'}]},
+        }
+        response = self.client.post(reverse('jira-web-hook'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_jira_update_time_and_sync_time_are_recorded(self):
+        self.backend.import_project_issues(self.project, max_results=10)
+
+        issue = models.Issue.objects.get(project=self.project, backend_id='P1-1')
+        self.assertEqual(issue.backend_created, datetime.datetime(2018, 1, 1, 0, 1, tzinfo=timezone.utc))
+        self.assertEqual(issue.updated, datetime.datetime(2018, 1, 1, 1, 1, tzinfo=timezone.utc))
+        self.assertGreater(issue.synced, issue.updated)
+        self.assertIsNone(issue.webhook_latency)
+
+    def test_sync_lag_is_not_recorded_by_import(self):
+        labels = {'settings': self.service_settings.uuid.hex, 'project': 'P1'}
+        count = REGISTRY.get_sample_value('waldur_jira_sync_lag_seconds_count', labels) or 0
+
+        self.backend.import_project_issues(self.project, max_results=10)
+
+        # Synthetic issues have been updated in 2018, so lag would measure their age
+        self.assertEqual(REGISTRY.get_sample_value('waldur_jira_sync_lag_seconds_count', labels) or 0, count)
+        self.assertFalse(models.Issue.objects.filter(project=self.project, sync_lag__isnull=False).exists())
+        sync_status = self.get_sync_status()
+        self.assertTrue(sync_status['last_synced'])
+        self.assertIsNone(sync_status['sync_lag'])
+        self.assertIsNone(sync_status['webhook_latency'])
+        self.assertIsNone(sync_status['oldest_unsynced_change_age'])
+
+    def test_sync_lag_is_recorded_by_incremental_sync(self):
+        labels = {'settings': self.service_settings.uuid.hex, 'project': 'P1'}
+        self.backend.import_project_issues(self.project, max_results=10)
+        models.IssueSyncState.objects.create(
+            settings=self.service_settings, watermark=timezone.now() - datetime.timedelta(minutes=1))
+        self.server.update_issue('P1-1', {'fields': {'summary': 'Updated summary'}})
+        count = REGISTRY.get_sample_value('waldur_jira_sync_lag_seconds_count', labels) or 0
+
+        self.backend.sync_issues()
+
+        self.assertEqual(REGISTRY.get_sample_value('waldur_jira_sync_lag_seconds_count', labels), count + 1)
+        issue = models.Issue.objects.get(project=self.project, backend_id='P1-1')
+        self.assertEqual(issue.summary, 'Updated summary')
+        self.assertLess(issue.sync_lag, 60)
+        self.assertEqual(set(self.get_sync_status()['sync_lag'].keys()), {'p50', 'p90', 'p99'})
+
+    def test_sync_status_is_not_included_in_project_list(self):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.ProjectFactory.get_list_url())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('sync_status', response.data[0])
+
+    def test_webhook_latency_is_recorded(self):
+        self.backend.import_project_issues(self.project, max_results=1)
+
+        self.post_summary_change('P1-1', datetime.datetime.now() - datetime.timedelta(seconds=30))
+
+        issue = models.Issue.objects.get(project=self.project, backend_id='P1-1')
+        self.assertEqual(issue.summary, 'Updated summary')
+        self.assertGreaterEqual(issue.webhook_latency, 30)
+        self.assertLess(issue.sync_lag, 30)
+        self.assertGreaterEqual(self.get_sync_status()['webhook_latency']['p50'], 30)
+        labels = {'settings': self.service_settings.uuid.hex, 'event': 'jira:issue_updated'}
+        self.assertGreater(REGISTRY.get_sample_value('waldur_jira_webhook_latency_seconds_count', labels), 0)
+
+    def test_age_of_oldest_unsynced_change_is_based_on_sync_watermark(self):
+        watermark = timezone.now() - datetime.timedelta(minutes=10)
+        models.IssueSyncState.objects.create(settings=self.service_settings, watermark=watermark)
+        jira_settings = dict(settings.WALDUR_JIRA, ISSUE_SYNC_ENABLED=True)
+
+        with override_settings(WALDUR_JIRA=jira_settings):
+            age = self.get_sync_status()['oldest_unsynced_change_age']
+            self.client.force_authenticate(self.fixture.staff)
+            response = self.client.get(reverse('jira-metrics'))
+
+        self.assertGreaterEqual(age, 600)
+        self.assertLess(age, 660)
+        self.assertIn(b'waldur_jira_oldest_unsynced_change_age_seconds{settings="%s"}' %
+                      self.service_settings.uuid.hex.encode(), response.content)
+
+    def test_percentiles_use_nearest_rank(self):
+        self.assertEqual(utils.get_percentiles(range(1, 101)), {'p50': 50, 'p90': 90, 'p99': 99})
+        self.assertEqual(utils.get_percentiles([5]), {'p50': 5, 'p90': 5, 'p99': 5})
+        self.assertIsNone(utils.get_percentiles([]))
@@ -0,0 +1,144 @@
+import mock
+from django.conf import settings
+from django.test import override_settings
+from jira import JIRAError
+from jira.client import ResultList
+from rest_framework import test
+
+from waldur_jira.backend import IssueImportPipeline, JiraBackendError
+
+from .. import models
+from . import factories, fixtures
+
+
+class IssueImportTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.project = self.fixture.jira_project
+        self.backend = self.project.get_backend()
+
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.jira_mock().fields.return_value = [{
+            'clauseNames': ['Time to resolution'],
+            'id': 'customfield_10138',
+        }]
+        self.backend_issues = [self._get_backend_issue('TST-%s' % i) for i in range(7)]
+        self.jira_mock().search_issues.side_effect = self._search_issues
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_all_pages_are_imported(self):
+        self.backend.import_project_issues(self.project, max_results=None)
+
+        self.assertEqual(models.Issue.objects.filter(project=self.project).count(), 7)
+        self.assertEqual(self.jira_mock().search_issues.call_count, 3)
+
+    def test_import_is_limited(self):
+        self.backend.import_project_issues(self.project, start_at=2, max_results=4)
+
+        keys = set(models.Issue.objects.filter(project=self.project).values_list('backend_id', flat=True))
+        self.assertEqual(keys, {'TST-2', 'TST-3', 'TST-4', 'TST-5'})
+
+    def test_existing_issues_are_skipped(self):
+        factories.IssueFactory(project=self.project, backend_id='TST-1', summary='Existing issue')
+
+        self.backend.import_project_issues(self.project, max_results=None)
+
+        self.assertEqual(models.Issue.objects.filter(project=self.project).count(), 7)
+        self.assertEqual(models.Issue.objects.get(backend_id='TST-1').summary, 'Existing issue')
+
+    def test_issue_created_concurrently_is_skipped(self):
+        factories.IssueFactory(project=self.project, backend_id='TST-1', summary='Created by webhook')
+
+        # Issue is created after existing issues have been checked
+        with mock.patch('waldur_jira.backend.IssueImportPipeline._get_existing_keys', return_value=set()):
+            self.backend.import_project_issues(self.project, max_results=None)
+
+        self.assertEqual(models.Issue.objects.filter(project=self.project).count(), 7)
+        self.assertEqual(models.Issue.objects.get(backend_id='TST-1').summary, 'Created by webhook')
+        self.assertFalse(models.Comment.objects.filter(issue__backend_id='TST-1').exists())
+        self.assertTrue(models.Comment.objects.filter(issue__backend_id='TST-2').exists())
+
+    def test_comments_are_imported(self):
+        self.backend.import_project_issues(self.project, max_results=None)
+
+        comment = models.Comment.objects.get(issue__backend_id='TST-3')
+        self.assertEqual(comment.backend_id, 'TST-3-comment')
+        self.assertEqual(comment.message, 'Comment body')
+
+    def test_comments_of_long_threads_are_paginated(self):
+        backend_issue = self.backend_issues[0]
+        backend_issue.fields.comment.total = 5
+
+        def get_json(path, params):
+            self.assertEqual(path, 'issue/TST-0/comment')
+            ids = range(params['startAt'], min(params['startAt'] + 2, 5))
+            return {
+                'total': 5,
+                'comments': [{'id': 'TST-0-%s' % i, 'body': 'Body %s' % i, 'created': '2018-01-01T10:00:00.000+0000'}
+                             for i in ids],
+            }
+
+        self.jira_mock()._get_json.side_effect = get_json
+
+        with override_settings(WALDUR_JIRA=dict(settings.WALDUR_JIRA, COMMENT_PAGE_SIZE=2)):
+            self.backend.import_project_issues(self.project, max_results=None)
+
+        comments = models.Comment.objects.filter(issue__backend_id='TST-0').order_by('backend_id')
+        self.assertEqual([comment.message for comment in comments], ['Body %s' % i for i in range(5)])
+        self.assertEqual(self.jira_mock()._get_json.call_count, 3)
+
+    def test_comments_are_fetched_before_issues_are_inserted(self):
+        insert_issues = IssueImportPipeline._insert_issues
+
+        def check_comments_fetched(pipeline, issues):
+            imported_count = models.Issue.objects.filter(project=self.project).count()
+            self.assertEqual(get_issue_comments.call_count, imported_count + len(issues))
+            return insert_issues(pipeline, issues)
+
+        with mock.patch.object(self.backend, 'get_issue_comments', return_value=[]) as get_issue_comments, \
+                mock.patch.object(IssueImportPipeline, '_insert_issues', autospec=True,
+                                  side_effect=check_comments_fetched):
+            self.backend.import_project_issues(self.project, max_results=None)
+
+        self.assertEqual(models.Issue.objects.filter(project=self.project).count(), 7)
+
+    def test_import_is_stopped_if_page_producer_is_killed(self):
+        with mock.patch.object(IssueImportPipeline, '_fetch_pages', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.backend.import_project_issues(self.project)
+
+    def test_search_error_is_reraised(self):
+        self.jira_mock().search_issues.side_effect = JIRAError(status_code=500)
+
+        with self.assertRaises(JiraBackendError):
+            self.backend.import_project_issues(self.project)
+
+    def _search_issues(self, jql, startAt, maxResults, fields):
+        page_size = min(maxResults or 3, 3)
+        page = self.backend_issues[startAt:startAt + page_size]
+        return ResultList(page, _total=len(self.backend_issues))
+
+    def _get_backend_issue(self, key):
+        backend_comment = mock.Mock(id=key + '-comment', body='Comment body', created='2018-01-01T10:00:00.000+0000')
+        priority = mock.Mock(id=self.fixture.priority.backend_id)
+        issue_type = mock.Mock(id=self.fixture.issue_type.backend_id)
+        return mock.Mock(**{
+            'key': key,
+            'fields.summary': 'Summary of %s' % key,
+            'fields.description': '',
+            'fields.status.name': 'Open',
+            'fields.resolution': None,
+            'fields.resolutiondate': None,
+            'fields.priority': priority,
+            'fields.issuetype': issue_type,
+            'fields.attachment': [],
+            'fields.comment.total': 1,
+            'fields.comment.comments': [backend_comment],
+            'fields.customfield_10138': None,
+            'fields.assignee': None,
+            'fields.creator': None,
+            'fields.reporter': None,
+        })
@@ -1,11 +1,19 @@
+import datetime
+
 import mock
 from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from jira import JIRAError
+from jira.client import ResultList
 from rest_framework import test, status
 
 from waldur_core.structure.tests import factories as structure_factories
 
 from . import factories, fixtures
-from .. import models
+from .. import executors, models, tasks
+from .stub_server import SLA_FIELD_ID, StubJiraServer
 
 
 class BaseTest(test.APITransactionTestCase):
@@ -97,6 +105,27 @@ class IssueGetTest(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
 
+    def test_staff_can_filter_issues_by_jira_update_time(self):
+        self.client.force_authenticate(self.fixture.staff)
+        self.issue.updated = timezone.now() - datetime.timedelta(days=10)
+        self.issue.save()
+        recent_issue = factories.IssueFactory(project=self.fixture.jira_project)
+
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        response = self.client.get(factories.IssueFactory.get_list_url(), {'updated_after': since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([issue['uuid'] for issue in response.data], [recent_issue.uuid.hex])
+
+    def test_staff_can_order_issues_by_resolution_date(self):
+        self.client.force_authenticate(self.fixture.staff)
+        self.issue.resolution_date = timezone.now() - datetime.timedelta(days=10)
+        self.issue.save()
+        resolved_issue = factories.IssueFactory(project=self.fixture.jira_project)
+
+        response = self.client.get(factories.IssueFactory.get_list_url(), {'o': '-resolution_date'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([issue['uuid'] for issue in response.data], [resolved_issue.uuid.hex, self.issue.uuid.hex])
+
     def test_non_author_can_not_get_issue(self):
         self.client.force_authenticate(self.non_author)
         response = self.client.get(self.issue_url)
@@ -212,7 +241,9 @@ class IssueCreateResourceTest(IssueCreateBaseTest):
         response = self.client.post(factories.IssueFactory.get_list_url(), self._get_issue_payload())
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
         new_issue = models.Issue.objects.get(backend_id=response.data['key'])
-        self.assertEqual(new_issue.resolution_sla, self.ttr_value / 1000)
+        self.assertFalse(new_issue.resolution_sla_paused)
+        remaining_time = (new_issue.resolution_sla_deadline - timezone.now()).total_seconds()
+        self.assertAlmostEqual(remaining_time, self.ttr_value / 1000, delta=5)
 
     def _get_issue_payload(self, **kwargs):
         payload = {
@@ -271,6 +302,64 @@ class IssueCreateSubtaskTest(IssueCreateBaseTest):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class IssueBulkCreateTest(IssueCreateBaseTest):
+    def setUp(self):
+        super(IssueBulkCreateTest, self).setUp()
+        self.first_issue = self._create_scheduled_issue()
+        self.second_issue = self._create_scheduled_issue()
+
+        backend_issue = self.create_issue.return_value
+        backend_issue.key = 'TST-100'
+        self.create_issues = self.jira_mock().create_issues
+        self.create_issues.return_value = [
+            {'status': 'Success', 'issue': mock.Mock(key='TST-100'), 'error': None},
+            {'status': 'Error', 'issue': None, 'error': {'summary': 'Field is required.'}},
+        ]
+        self.jira_mock().search_issues.return_value = [backend_issue]
+
+    def test_issues_are_created_with_single_request(self):
+        executors.IssueBatchCreateExecutor.execute(self.first_issue, async=False)
+
+        self.assertEqual(self.create_issues.call_count, 1)
+        self.assertEqual(len(self.create_issues.call_args[0][0]), 2)
+        self.assertEqual(self.create_issue.call_count, 0)
+
+    def test_issue_key_is_mapped_back(self):
+        executors.IssueBatchCreateExecutor.execute(self.first_issue, async=False)
+
+        self.first_issue.refresh_from_db()
+        self.assertEqual(self.first_issue.state, models.Issue.States.OK)
+        self.assertEqual(self.first_issue.backend_id, 'TST-100')
+
+    def test_failed_issue_is_marked_as_erred(self):
+        executors.IssueBatchCreateExecutor.execute(self.first_issue, async=False)
+
+        self.second_issue.refresh_from_db()
+        self.assertEqual(self.second_issue.state, models.Issue.States.ERRED)
+        self.assertIsNone(self.second_issue.backend_id)
+        self.assertIn('Field is required.', self.second_issue.error_message)
+
+    def test_subtask_of_failed_issue_is_marked_as_erred(self):
+        subtask = self._create_scheduled_issue(parent=self.second_issue)
+
+        executors.IssueBatchCreateExecutor.execute(self.first_issue, async=False)
+
+        subtask.refresh_from_db()
+        self.assertEqual(subtask.state, models.Issue.States.ERRED)
+        self.assertIn('Field is required.', subtask.error_message)
+        self.assertEqual(self.create_issues.call_count, 1)
+
+    def _create_scheduled_issue(self, **kwargs):
+        return factories.IssueFactory(
+            project=self.fixture.jira_project,
+            type=self.fixture.issue_type,
+            priority=self.fixture.priority,
+            state=models.Issue.States.CREATION_SCHEDULED,
+            backend_id=None,
+            **kwargs
+        )
+
+
 @mock.patch('waldur_jira.executors.IssueUpdateExecutor.execute')
 class IssueUpdateTest(BaseTest):
     def test_author_can_update_issue(self, update_executor):
@@ -288,6 +377,196 @@ class IssueUpdateTest(BaseTest):
         self.assertEqual(update_executor.call_count, 0)
 
 
+class IssueBackendUpdateTest(BaseTest):
+    def setUp(self):
+        super(IssueBackendUpdateTest, self).setUp()
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.backend = self.issue.get_backend()
+
+    def tearDown(self):
+        super(IssueBackendUpdateTest, self).tearDown()
+        mock.patch.stopall()
+
+    def test_issue_is_not_fetched_before_update(self):
+        self.backend.update_issue(self.issue)
+
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        self.assertEqual(self.jira_mock()._session.put.call_count, 1)
+
+    @mock.patch('waldur_jira.backend.logger')
+    def test_issue_deleted_on_backend_is_skipped(self, logger):
+        self.jira_mock()._session.put.side_effect = JIRAError(status_code=404)
+        state = self.issue.state
+
+        self.backend.update_issue(self.issue)
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.state, state)
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        self.assertIn('already been deleted on backend', logger.debug.call_args[0][0])
+
+
+class IssueBulkPullTest(BaseTest):
+    def setUp(self):
+        super(IssueBulkPullTest, self).setUp()
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.jira_mock().fields.return_value = [{
+            'clauseNames': ['Time to resolution'],
+            'id': 'customfield_10138',
+        }]
+        self.deleted_issue = factories.IssueFactory(project=self.fixture.jira_project)
+        self.jira_mock().search_issues.return_value = [self._get_backend_issue(self.issue.backend_id)]
+        self.backend = self.issue.get_backend()
+
+    def tearDown(self):
+        super(IssueBulkPullTest, self).tearDown()
+        mock.patch.stopall()
+
+    def test_issues_are_fetched_in_chunks(self):
+        keys = ['TST-%s' % i for i in range(5)]
+        self.jira_mock().search_issues.return_value = []
+
+        with override_settings(WALDUR_JIRA=dict(settings.WALDUR_JIRA, ISSUE_IMPORT_PAGE_SIZE=2)):
+            backend_issues, missing_keys = self.backend.get_backend_issues_by_keys(keys)
+
+        self.assertEqual(self.jira_mock().search_issues.call_count, 3)
+        self.assertEqual(missing_keys, set(keys))
+
+    def test_issues_are_paged_if_jira_caps_search_results(self):
+        other_issue = factories.IssueFactory(project=self.fixture.jira_project)
+        backend_issues = [self._get_backend_issue(issue.backend_id) for issue in (self.issue, other_issue)]
+
+        def search_issues(jql, startAt, maxResults, fields, validate_query):
+            # JIRA returns single issue per page regardless of requested page size
+            return ResultList(backend_issues[startAt:startAt + 1], _total=len(backend_issues))
+
+        self.jira_mock().search_issues.side_effect = search_issues
+        self.backend.pull_issues([self.issue, other_issue])
+
+        self.assertEqual(self.jira_mock().search_issues.call_count, 2)
+        self.assertTrue(models.Issue.objects.filter(id=other_issue.id).exists())
+        other_issue.refresh_from_db()
+        self.assertEqual(other_issue.summary, 'Pulled summary')
+
+    def test_issues_are_not_deleted_if_search_results_are_incomplete(self):
+        self.jira_mock().search_issues.side_effect = [
+            ResultList([self._get_backend_issue(self.issue.backend_id)], _total=2),
+            ResultList([], _total=2),
+        ]
+
+        self.backend.pull_issues([self.issue, self.deleted_issue])
+
+        self.assertTrue(models.Issue.objects.filter(id=self.deleted_issue.id).exists())
+
+    def test_issues_are_refreshed_and_deleted_ones_are_removed(self):
+        self.backend.pull_issues([self.issue, self.deleted_issue])
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Pulled summary')
+        self.assertFalse(models.Issue.objects.filter(id=self.deleted_issue.id).exists())
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+
+    def test_issue_moved_in_jira_is_refreshed_by_old_key(self):
+        moved_issue = self._get_backend_issue('NEW-1')
+        self.jira_mock().search_issues.return_value = [moved_issue]
+        self.jira_mock().issue.return_value = moved_issue
+
+        self.backend.pull_issues([self.issue])
+
+        self.jira_mock().issue.assert_called_once_with(self.issue.backend_id)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Pulled summary')
+        self.assertEqual(self.issue.backend_id, 'NEW-1')
+
+    def test_issue_modified_during_pull_is_not_overwritten(self):
+        # Issue is modified after pull has been started
+        models.Issue.objects.filter(id=self.issue.id).update(
+            summary='Local summary', modified=timezone.now() + datetime.timedelta(minutes=1))
+
+        self.backend.pull_issues([self.issue])
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Local summary')
+
+    @mock.patch('waldur_jira.views.tasks.pull_issues')
+    def test_staff_can_pull_issues_in_bulk(self, pull_issues_mock):
+        self.client.force_authenticate(self.fixture.staff)
+        url = factories.IssueFactory.get_list_url('bulk_pull')
+        response = self.client.post(url, {'issues': [self.issue_url]})
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        pull_issues_mock.delay.assert_called_once_with([self.issue.uuid.hex])
+
+    def test_issues_of_task_are_refreshed(self):
+        tasks.pull_issues([self.issue.uuid.hex])
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Pulled summary')
+
+    def test_user_can_not_pull_issues_in_bulk(self):
+        self.client.force_authenticate(self.author)
+        url = factories.IssueFactory.get_list_url('bulk_pull')
+        response = self.client.post(url, {'issues': [self.issue_url]})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def _get_backend_issue(self, key):
+        return mock.Mock(**{
+            'key': key,
+            'fields.summary': 'Pulled summary',
+            'fields.description': '',
+            'fields.status.name': 'Open',
+            'fields.resolution': None,
+            'fields.resolutiondate': None,
+            'fields.priority': mock.Mock(id=self.fixture.priority.backend_id),
+            'fields.issuetype': mock.Mock(id=self.fixture.issue_type.backend_id),
+            'fields.customfield_10138': None,
+            'fields.assignee': None,
+            'fields.creator': None,
+            'fields.reporter': None,
+        })
+
+
+@override_settings(WALDUR_JIRA=dict(settings.WALDUR_JIRA, UPDATE_DEBOUNCE_WINDOW=10))
+@mock.patch('waldur_jira.executors.IssueDebouncedUpdateExecutor.apply_signature')
+class IssueDebouncedUpdateTest(BaseTest):
+    def tearDown(self):
+        super(IssueDebouncedUpdateTest, self).tearDown()
+        cache.clear()
+
+    def test_updates_within_window_are_collapsed(self, apply_signature):
+        self.client.force_authenticate(self.author)
+        self.client.patch(self.issue_url, {'description': 'first'})
+        self.client.patch(self.issue_url, {'description': 'second'})
+
+        self.assertEqual(apply_signature.call_count, 1)
+
+    def test_update_committed_after_task_is_started_is_pushed(self, apply_signature):
+        issue = models.Issue.objects.get(pk=self.issue.pk)
+        cache_key = tasks.get_debounced_update_cache_key(issue)
+        cache.set(cache_key, True)
+        models.Issue.objects.filter(pk=self.issue.pk).update(description='latest')
+
+        task = tasks.DebouncedBackendMethodTask()
+        task.kwargs = {}
+        task.pre_execute(issue)
+
+        self.assertIsNone(cache.get(cache_key))
+        self.assertEqual(issue.description, 'latest')
+
+    def test_issue_remains_editable_while_update_is_pending(self, apply_signature):
+        self.client.force_authenticate(self.author)
+        self.client.patch(self.issue_url, {'description': 'first'})
+        response = self.client.patch(self.issue_url, {'description': 'second'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.state, models.Issue.States.OK)
+        self.assertEqual(self.issue.description, 'second')
+
+
 @mock.patch('waldur_jira.executors.IssueDeleteExecutor.execute')
 class IssueDeleteTest(BaseTest):
 
@@ -313,29 +592,53 @@ class IssueFilterTest(BaseTest):
             project=self.fixture.jira_project,
             state=models.Issue.States.OK,
             user=self.author,
-            resolution_sla=-100
+            resolution_sla_deadline=timezone.now() - datetime.timedelta(seconds=100)
         )
         self.issue_unbreached = factories.IssueFactory(
             project=self.fixture.jira_project,
             state=models.Issue.States.OK,
             user=self.author,
-            resolution_sla=100
+            resolution_sla_deadline=timezone.now() + datetime.timedelta(seconds=100)
         )
 
     def test_filter_sla_ttr_breached_set_to_true(self):
         response = self._get_response(True)
         self.assertEqual(len(response.data), 1)
-        self.assertTrue([issue['resolution_sla'] for issue in response.data][0] == -100)
+        self.assertAlmostEqual(response.data[0]['resolution_sla'], -100, delta=5)
 
     def test_filter_sla_ttr_breached_set_to_false(self):
         response = self._get_response(False)
         self.assertEqual(len(response.data), 1)
-        self.assertTrue([issue['resolution_sla'] for issue in response.data][0] == 100)
+        self.assertAlmostEqual(response.data[0]['resolution_sla'], 100, delta=5)
 
     def test_filter_sla_ttr_breached_dont_set(self):
         response = self._get_response(None)
         self.assertEqual(len(response.data), 3)
 
+    def test_sla_is_breached_when_deadline_passes_without_sync(self):
+        self.issue_unbreached.resolution_sla_deadline = timezone.now() - datetime.timedelta(seconds=1)
+        self.issue_unbreached.save()
+
+        response = self._get_response(True)
+        self.assertEqual(len(response.data), 2)
+
+    def test_paused_sla_keeps_remaining_time(self):
+        self.issue_breached.resolution_sla_paused = True
+        self.issue_breached.resolution_sla_remaining = datetime.timedelta(hours=1)
+        self.issue_breached.save()
+
+        response = self._get_response(False)
+        self.assertEqual(len(response.data), 2)
+        remaining = {issue['uuid']: issue['resolution_sla'] for issue in response.data}
+        self.assertEqual(remaining[self.issue_breached.uuid.hex], 3600)
+
+    def test_issues_are_ordered_by_remaining_sla(self):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.IssueFactory.get_list_url(), {
+            'o': 'resolution_sla', 'sla_ttr_breached': False})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['uuid'], self.issue_unbreached.uuid.hex)
+
     def _get_response(self, sla_ttr_breached):
         self.client.force_authenticate(self.fixture.staff)
         response = self.client.get(factories.IssueFactory.get_list_url(), {
@@ -343,3 +646,59 @@ class IssueFilterTest(BaseTest):
         })
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         return response
+
+
+class IssueResolutionSlaTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer().start()
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.issue = factories.IssueFactory(project=self.project, backend_id='P1-1')
+        self.backend = self.project.get_backend()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_breach_time_of_ongoing_cycle_is_stored_as_deadline(self):
+        self.backend.pull_issues([self.issue])
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.resolution_sla_deadline, datetime.datetime(2018, 1, 2, 0, 1, tzinfo=timezone.utc))
+        self.assertFalse(self.issue.resolution_sla_paused)
+        self.assertTrue(models.Issue.objects.filter_resolution_sla_breached().filter(pk=self.issue.pk).exists())
+
+    def test_remaining_time_of_paused_cycle_is_stored(self):
+        self.server.update_issue('P1-1', {'fields': {SLA_FIELD_ID: {'ongoingCycle': {
+            'paused': True, 'remainingTime': {'millis': 0}}}}})
+
+        self.backend.pull_issues([self.issue])
+
+        issue = models.Issue.objects.annotate_resolution_sla().get(pk=self.issue.pk)
+        self.assertTrue(issue.resolution_sla_paused)
+        self.assertIsNone(issue.resolution_sla_deadline)
+        self.assertEqual(issue.resolution_sla, datetime.timedelta(0))
+        self.assertEqual(issue.get_resolution_sla(), datetime.timedelta(0))
+
+    def test_outcome_of_the_latest_completed_cycle_is_stored(self):
+        self.server.update_issue('P1-1', {'fields': {SLA_FIELD_ID: {'completedCycles': [
+            {'breached': False},
+            {'breachTime': {'epochMillis': 1514764800000}, 'stopTime': {'epochMillis': 1514768400000}},
+        ]}}})
+
+        self.backend.pull_issues([self.issue])
+
+        self.issue.refresh_from_db()
+        self.assertIsNone(self.issue.resolution_sla_deadline)
+        self.assertFalse(self.issue.resolution_sla_met)
+
+    def test_sla_is_cleared_when_cycle_is_completed(self):
+        self.server.update_issue('P1-1', {'fields': {SLA_FIELD_ID: {'completedCycles': []}}})
+
+        self.backend.pull_issues([self.issue])
+
+        issue = models.Issue.objects.annotate_resolution_sla().get(pk=self.issue.pk)
+        self.assertIsNone(issue.resolution_sla_deadline)
+        self.assertIsNone(issue.resolution_sla)
@@ -1,5 +1,6 @@
 import mock
-
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import test
 
 from waldur_jira.backend import JiraBackend
@@ -54,3 +55,60 @@ class IssueTypesTest(test.APITransactionTestCase):
         self.assertEqual(issue_type.name, self.mock_issue_type.name)
         self.assertEqual(issue_type.description, self.mock_issue_type.description)
         self.assertEqual(issue_type.icon_url, self.mock_issue_type.iconUrl)
+
+
+class InstanceIssueTypesTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.first_project = self.fixture.jira_project
+        self.second_project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link)
+
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.jira_mock()._get_json.return_value = [
+            {'key': self.first_project.backend_id, 'issueTypes': [self._get_raw_issue_type('1', 'Task')]},
+            {'key': self.second_project.backend_id, 'issueTypes': [
+                self._get_raw_issue_type('1', 'Task'),
+                self._get_raw_issue_type('2', 'Bug'),
+            ]},
+        ]
+        self.backend = JiraBackend(self.fixture.service_settings)
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_issue_types_of_all_projects_are_fetched_with_single_request(self):
+        self.backend.pull_all_issue_types()
+
+        self.jira_mock()._get_json.assert_called_once_with('project', params={'expand': 'issueTypes'})
+        self.assertEqual(set(self.first_project.issue_types.values_list('backend_id', flat=True)), {'1'})
+        self.assertEqual(set(self.second_project.issue_types.values_list('backend_id', flat=True)), {'1', '2'})
+
+    def test_existing_issue_type_is_updated_and_stale_link_is_removed(self):
+        issue_type = factories.IssueTypeFactory(settings=self.fixture.service_settings, backend_id='1', name='Old')
+        stale_issue_type = factories.IssueTypeFactory(settings=self.fixture.service_settings, backend_id='3')
+        self.first_project.issue_types.add(issue_type, stale_issue_type)
+
+        self.backend.pull_all_issue_types()
+
+        issue_type.refresh_from_db()
+        self.assertEqual(issue_type.name, 'Task')
+        self.assertEqual(set(self.first_project.issue_types.values_list('backend_id', flat=True)), {'1'})
+
+    def test_unchanged_issue_types_are_not_written(self):
+        self.backend.pull_all_issue_types()
+
+        with CaptureQueriesContext(connection) as context:
+            self.backend.pull_all_issue_types()
+
+        statements = [query['sql'].split()[0] for query in context.captured_queries]
+        self.assertFalse({'INSERT', 'UPDATE', 'DELETE'} & set(statements))
+
+    def _get_raw_issue_type(self, issue_type_id, name):
+        return {
+            'id': issue_type_id,
+            'name': name,
+            'description': '%s description' % name,
+            'iconUrl': 'http://example.com/%s.svg' % issue_type_id,
+            'subtask': False,
+        }
@@ -0,0 +1,97 @@
+import mock
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status, test
+
+from waldur_jira import metrics
+
+from . import fixtures
+from .stub_server import StubJiraServer
+
+
+class MetricsTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer().start()
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.backend = self.fixture.jira_project.get_backend()
+        self.settings_label = self.fixture.service_settings.uuid.hex
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get_value(self, name, method, endpoint, **labels):
+        labels.update(settings=self.settings_label, method=method, endpoint=endpoint)
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_counted_by_endpoint_and_status(self):
+        self.backend.get_backend_issue('P1-1')
+        self.backend.get_backend_issue('P1-2')
+
+        self.assertEqual(self.get_value('waldur_jira_responses_total', 'GET', '/rest/api/2/serverInfo',
+                                        status='200'), 1)
+        self.assertEqual(self.get_value('waldur_jira_responses_total', 'GET', '/rest/api/2/issue/{key}',
+                                        status='200'), 2)
+        self.assertEqual(self.get_value('waldur_jira_request_duration_seconds_count', 'GET',
+                                        '/rest/api/2/issue/{key}'), 2)
+        self.assertGreater(self.get_value('waldur_jira_transferred_bytes_total', 'GET',
+                                          '/rest/api/2/issue/{key}', direction='received'), 0)
+
+    def test_rate_limited_requests_are_counted(self):
+        self.assertTrue(self.backend.ping())
+        self.server.reset_counters()
+        self.server.rate_limit = 1
+
+        self.assertTrue(self.backend.ping())
+        self.assertFalse(self.backend.ping())
+
+        self.assertEqual(self.get_value('waldur_jira_rate_limited_total', 'GET', '/rest/api/2/myself'), 1)
+        self.assertEqual(self.get_value('waldur_jira_responses_total', 'GET', '/rest/api/2/myself',
+                                        status='429'), 1)
+        self.assertEqual(self.get_value('waldur_jira_responses_total', 'GET', '/rest/api/2/myself',
+                                        status='200'), 2)
+
+    def test_endpoint_is_normalized(self):
+        self.assertEqual(metrics.get_endpoint('http://example.com/jira/rest/api/2/issue/TST-1/comment/10001'),
+                         '/rest/api/2/issue/{key}/comment/{id}')
+        self.assertEqual(metrics.get_endpoint('http://example.com/secure/attachment/10001/file.txt'),
+                         '/secure/attachment/{id}/{filename}')
+        self.assertEqual(metrics.get_endpoint('http://example.com/secure/thumbnail/10001/_thumb_10001.png'),
+                         '/secure/thumbnail/{id}/{filename}')
+        self.assertEqual(metrics.get_endpoint('http://example.com/plugins/servlet/avatar/10001'), 'other')
+
+    def test_metrics_are_exposed_to_staff_only(self):
+        self.backend.ping()
+        url = reverse('jira-metrics')
+
+        self.client.force_authenticate(self.fixture.owner)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(b'waldur_jira_request_duration_seconds_bucket', response.content)
+
+
+class MetricsPushTest(test.APITransactionTestCase):
+    def setUp(self):
+        metrics._push_state.pending = True
+        metrics._push_state.pushed_at = 0
+
+    @mock.patch('waldur_jira.metrics.push_to_gateway')
+    def test_metrics_are_pushed_once_per_interval(self, push_mock):
+        jira_settings = dict(settings.WALDUR_JIRA, METRICS_PUSHGATEWAY='localhost:9091')
+        with override_settings(WALDUR_JIRA=jira_settings):
+            metrics.push_metrics()
+            metrics._push_state.pending = True
+            metrics.push_metrics()
+
+        self.assertEqual(push_mock.call_count, 1)
+
+    @mock.patch('waldur_jira.metrics.push_to_gateway')
+    def test_metrics_are_not_pushed_if_gateway_is_not_configured(self, push_mock):
+        metrics.push_metrics()
+        self.assertFalse(push_mock.called)
@@ -0,0 +1,85 @@
+import logging
+import os
+import pstats
+import shutil
+import tempfile
+
+import mock
+from django.conf import settings
+from django.test import override_settings
+from rest_framework import test
+
+from waldur_jira import profiling
+from waldur_jira.backend import JiraBackend
+
+from . import factories, fixtures
+from .stub_server import StubJiraServer
+
+
+class ProfilingTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer().start()
+        self.fixture = fixtures.JiraFixture()
+        self.service_settings = self.fixture.service_settings
+        self.service_settings.backend_url = self.server.url
+        self.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.issue = factories.IssueFactory(project=self.project, backend_id='P1-1')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def enable_profiling(self):
+        self.service_settings.options = {'profiling': True}
+        self.service_settings.save()
+        self.project.refresh_from_db()
+
+    def test_backend_is_not_profiled_by_default(self):
+        self.assertIsInstance(self.project.get_backend(), JiraBackend)
+
+    def test_backend_is_profiled_if_environment_flag_is_set(self):
+        with mock.patch.dict(os.environ, {'WALDUR_JIRA_PROFILING': '1'}):
+            self.assertIsInstance(self.project.get_backend(), profiling.ProfiledBackend)
+
+    @mock.patch('waldur_jira.profiling.logger')
+    def test_statistics_of_backend_method_call_are_logged(self, logger_mock):
+        self.enable_profiling()
+        backend = self.project.get_backend()
+        self.assertTrue(backend.manager)
+        self.server.reset_counters()
+
+        backend.pull_issues([self.issue])
+
+        level, _, context = logger_mock.log.call_args[0]
+        self.assertEqual(context['method'], 'pull_issues')
+        self.assertEqual(context['jira_requests'], self.server.request_count)
+        self.assertEqual(level, logging.INFO)
+        self.assertGreater(context['db_queries'], 0)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Synthetic issue P1-1')
+
+    @mock.patch('waldur_jira.profiling.tracemalloc', None)
+    @mock.patch('waldur_jira.profiling.logger')
+    def test_growth_of_peak_rss_is_reported_if_tracemalloc_is_not_available(self, logger_mock):
+        self.enable_profiling()
+
+        self.project.get_backend().pull_issues([self.issue])
+
+        _, _, context = logger_mock.log.call_args[0]
+        self.assertGreaterEqual(context['memory_peak'], 0)
+
+    def test_profile_of_sampled_call_is_stored(self):
+        self.enable_profiling()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        jira_settings = dict(settings.WALDUR_JIRA, PROFILING_SLOW_THRESHOLD=60,
+                             PROFILING_SAMPLE_RATE=1, PROFILING_DIRECTORY=directory)
+
+        with override_settings(WALDUR_JIRA=jira_settings):
+            self.project.get_backend().pull_issues([self.issue])
+
+        file_names = os.listdir(directory)
+        self.assertEqual(len(file_names), 1)
+        self.assertTrue(file_names[0].startswith('pull_issues-'))
+        self.assertTrue(pstats.Stats(os.path.join(directory, file_names[0])).total_calls)
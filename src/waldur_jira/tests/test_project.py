@@ -1,5 +1,6 @@
 import mock
 from ddt import ddt, data
+from django.core.cache import cache
 from rest_framework import test, status
 
 from waldur_jira import models, executors
@@ -96,22 +97,59 @@ class ProjectImportableResourcesTest(BaseProjectImportTest):
 
     @mock.patch('waldur_jira.backend.JiraBackend.get_resources_for_import')
     def test_importable_projects_are_returned(self, get_projects_mock):
-        backend_projects = self._generate_backend_projects()
+        backend_projects = [{'name': project.name, 'backend_id': project.backend_id}
+                            for project in self._generate_backend_projects()]
         get_projects_mock.return_value = backend_projects
-        data = {
-            'service_project_link':
-                factories.JiraServiceProjectLinkFactory.get_url(self.fixture.service_project_link)
-        }
 
-        response = self.client.get(self.url, data=data)
+        response = self.client.get(self.url, data=self._get_query())
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEquals(len(response.data), len(backend_projects))
         returned_backend_ids = [item['backend_id'] for item in response.data]
-        expected_backend_ids = [item.backend_id for item in backend_projects]
+        expected_backend_ids = [item['backend_id'] for item in backend_projects]
         self.assertItemsEqual(returned_backend_ids, expected_backend_ids)
         get_projects_mock.assert_called()
 
+    @mock.patch('waldur_jira.backend.JiraBackend.get_resources_for_import')
+    def test_registered_projects_are_excluded(self, get_projects_mock):
+        get_projects_mock.return_value = [
+            {'name': 'Registered', 'backend_id': self.fixture.jira_project.backend_id},
+            {'name': 'New', 'backend_id': 'NEW'},
+        ]
+
+        response = self.client.get(self.url, data=self._get_query())
+
+        self.assertEqual([item['backend_id'] for item in response.data], ['NEW'])
+
+    @mock.patch('waldur_jira.backend.JiraBackend.get_resources_for_import')
+    def test_projects_are_filtered_by_name(self, get_projects_mock):
+        get_projects_mock.return_value = [
+            {'name': 'Support desk', 'backend_id': 'SD'},
+            {'name': 'Development', 'backend_id': 'DEV'},
+        ]
+
+        response = self.client.get(self.url, data=self._get_query(name='support'))
+
+        self.assertEqual([item['backend_id'] for item in response.data], ['SD'])
+
+    @mock.patch('waldur_jira.backend.JIRA')
+    def test_catalogue_is_cached_until_refresh(self, jira_mock):
+        cache.clear()
+        jira_mock().projects.return_value = []
+
+        self.client.get(self.url, data=self._get_query())
+        self.client.get(self.url, data=self._get_query())
+        self.assertEqual(jira_mock().projects.call_count, 1)
+
+        self.client.get(self.url, data=self._get_query(refresh='true'))
+        self.assertEqual(jira_mock().projects.call_count, 2)
+
+    def _get_query(self, **kwargs):
+        return dict(
+            service_project_link=factories.JiraServiceProjectLinkFactory.get_url(self.fixture.service_project_link),
+            **kwargs
+        )
+
 
 class ProjectImportResourceTest(BaseProjectImportTest):
 
@@ -129,8 +167,8 @@ class ProjectImportResourceTest(BaseProjectImportTest):
 
         self.jira_mock_get_project.side_effect = get_project
 
-        self.jira_patcher_executors = mock.patch('waldur_jira.serializers.executors')
-        self.jira_mock_executors = self.jira_patcher_executors.start()
+        self.jira_patcher_executor = mock.patch('waldur_jira.executors.ProjectImportFromBackendExecutor.execute')
+        self.jira_mock_executor = self.jira_patcher_executor.start()
 
     def tearDown(self):
         mock.patch.stopall()
@@ -145,7 +183,19 @@ class ProjectImportResourceTest(BaseProjectImportTest):
 
         response = self.client.post(self.url, payload)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
-        self.assertEqual(self.jira_mock_executors.ProjectPullExecutor.execute.call_count, 1)
+        self.assertEqual(self.jira_mock_executor.call_count, 1)
+
+    def test_placeholder_project_is_created_without_calling_backend(self):
+        payload = {
+            'backend_id': 'backend_id',
+            'service_project_link': factories.JiraServiceProjectLinkFactory.get_url(self.fixture.service_project_link),
+        }
+
+        self.client.post(self.url, payload)
+
+        project = models.Project.objects.get(backend_id='backend_id')
+        self.assertEqual(project.state, models.Project.States.CREATION_SCHEDULED)
+        self.assertEqual(self.jira_mock_get_project.call_count, 0)
 
     def test_backend_project_cannot_be_imported_if_it_is_registered_in_waldur(self):
         project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link)
@@ -187,6 +237,19 @@ class TasksTest(BaseProjectImportTest):
     def tearDown(self):
         mock.patch.stopall()
 
+    def test_placeholder_project_is_imported_in_background(self):
+        backend_project = self._generate_backend_projects()[0]
+        self.jira_mock_get_project.side_effect = None
+        self.jira_mock_get_project.return_value = backend_project
+        project = factories.ProjectFactory(state=models.Project.States.CREATION_SCHEDULED)
+        executors.ProjectImportFromBackendExecutor.execute(project, async=False)
+
+        project.refresh_from_db()
+        self.assertEqual(project.state, models.Project.States.OK)
+        self.assertEqual(project.runtime_state, 'success')
+        self.assertEqual(project.name, backend_project.name)
+        self.assertEqual(self.jira_mock_import_project_batch.call_count, 1)
+
     def test_import_projects(self):
         project = factories.ProjectFactory()
         executors.ProjectPullExecutor.execute(project, async=False)
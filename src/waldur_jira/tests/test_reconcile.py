@@ -0,0 +1,115 @@
+import mock
+from jira.client import ResultList
+from rest_framework import test
+
+from .. import models
+from . import factories, fixtures
+
+
+class ProjectReconcileTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.project = self.fixture.jira_project
+        self.backend = self.project.get_backend()
+
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.jira_mock().fields.return_value = [{
+            'clauseNames': ['Time to resolution'],
+            'id': 'customfield_10138',
+        }]
+        self.jira_mock().search_issues.side_effect = self._search_issues
+
+        self.backend_issues = {
+            'TST-1': self._get_backend_issue('TST-1', '2018-01-01T10:00:00.000+0000'),
+            'TST-2': self._get_backend_issue('TST-2', '2018-01-01T10:00:00.000+0000'),
+        }
+        self.unchanged_issue = factories.IssueFactory(
+            project=self.project, backend_id='TST-1',
+            backend_fingerprint=self.backend.get_issue_fingerprint(self.backend_issues['TST-1']))
+        self.changed_issue = factories.IssueFactory(
+            project=self.project, backend_id='TST-2', backend_fingerprint='outdated')
+        self.stale_issue = factories.IssueFactory(project=self.project, backend_id='TST-3')
+        # Keys which are skipped by project search, for example, because offsets are shifted by deleted issue
+        self.skipped_keys = set()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_stale_issue_is_deleted(self):
+        self.backend.reconcile_project(self.project)
+
+        self.assertFalse(models.Issue.objects.filter(id=self.stale_issue.id).exists())
+
+    def test_changed_issue_is_refreshed(self):
+        self.backend.reconcile_project(self.project)
+
+        self.changed_issue.refresh_from_db()
+        self.assertEqual(self.changed_issue.summary, 'Summary of TST-2')
+        self.assertEqual(self.changed_issue.backend_fingerprint,
+                         self.backend.get_issue_fingerprint(self.backend_issues['TST-2']))
+
+    def test_unchanged_issue_is_not_fetched(self):
+        self.backend.reconcile_project(self.project)
+
+        jql = self.jira_mock().search_issues.call_args[0][0]
+        self.assertEqual(jql, 'key in (TST-2,TST-3)')
+        self.unchanged_issue.refresh_from_db()
+        self.assertNotEqual(self.unchanged_issue.summary, 'Summary of TST-1')
+
+    def test_issue_is_refreshed_if_its_comment_is_deleted(self):
+        comment = factories.CommentFactory(issue=self.unchanged_issue, backend_id='TST-1-comment')
+        self.backend_issues['TST-1'].fields.comment.total = 0
+        self.backend_issues['TST-1'].fields.comment.comments = []
+
+        self.backend.reconcile_project(self.project)
+
+        self.assertFalse(models.Comment.objects.filter(id=comment.id).exists())
+
+    def test_issue_skipped_by_project_search_is_not_deleted(self):
+        self.skipped_keys.add('TST-1')
+
+        self.backend.reconcile_project(self.project)
+
+        self.assertTrue(models.Issue.objects.filter(id=self.unchanged_issue.id).exists())
+        self.assertFalse(models.Issue.objects.filter(id=self.stale_issue.id).exists())
+
+    def test_new_issue_is_created(self):
+        self.backend_issues['TST-4'] = self._get_backend_issue('TST-4', '2018-01-02T10:00:00.000+0000')
+
+        self.backend.reconcile_project(self.project)
+
+        issue = models.Issue.objects.get(project=self.project, backend_id='TST-4')
+        self.assertEqual(issue.comments.get().message, 'Comment body')
+
+    def _search_issues(self, jql, startAt=0, maxResults=50, fields=None, validate_query=True):
+        if jql.startswith('key in'):
+            keys = jql[len('key in ('):-1].split(',')
+            issues = [self.backend_issues[key] for key in keys if key in self.backend_issues]
+        else:
+            issues = sorted((issue for issue in self.backend_issues.values() if issue.key not in self.skipped_keys),
+                            key=lambda issue: issue.key)
+        return ResultList(issues[startAt:startAt + maxResults], _total=len(issues))
+
+    def _get_backend_issue(self, key, updated):
+        backend_comment = mock.Mock(id=key + '-comment', body='Comment body', created='2018-01-01T10:00:00.000+0000')
+        priority = mock.Mock(id=self.fixture.priority.backend_id)
+        issue_type = mock.Mock(id=self.fixture.issue_type.backend_id)
+        return mock.Mock(**{
+            'key': key,
+            'fields.summary': 'Summary of %s' % key,
+            'fields.description': '',
+            'fields.updated': updated,
+            'fields.status.name': 'Open',
+            'fields.resolution': None,
+            'fields.resolutiondate': None,
+            'fields.priority': priority,
+            'fields.issuetype': issue_type,
+            'fields.attachment': [],
+            'fields.comment.total': 1,
+            'fields.comment.comments': [backend_comment],
+            'fields.customfield_10138': None,
+            'fields.assignee': None,
+            'fields.creator': None,
+            'fields.reporter': None,
+        })
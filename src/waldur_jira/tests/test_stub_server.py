@@ -0,0 +1,80 @@
+from django.test import override_settings
+from rest_framework import test
+
+from waldur_jira.backend import JiraBackendError
+
+from .. import models
+from . import factories, fixtures
+from .stub_server import StubJiraServer
+
+
+class StubJiraServerTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer(projects=2, issues_per_project=30, comments_per_issue=3,
+                                     embedded_comments=2, max_results=10).start()
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.backend = self.project.get_backend()
+        # Client requests server info as soon as it is created
+        self.assertTrue(self.backend.manager)
+        self.server.reset_counters()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_service_properties_are_pulled(self):
+        self.backend.sync()
+
+        self.assertEqual(models.Priority.objects.filter(settings=self.fixture.service_settings).count(), 4)
+        self.assertEqual(self.project.issue_types.count(), 3)
+        self.assertEqual(self.backend.get_importable_projects(), [{'name': 'Project P2', 'backend_id': 'P2'}])
+
+    @override_settings(WALDUR_JIRA={'ISSUE_IMPORT_PAGE_SIZE': 10, 'COMMENT_PAGE_SIZE': 2,
+                                    'COMMENT_TEMPLATE': '', 'ISSUE': {'resolution_sla_field': 'Time to resolution'}})
+    def test_issues_are_imported_page_by_page(self):
+        self.backend.import_project_issues(self.project, max_results=None)
+
+        self.assertEqual(self.project.issues.count(), 30)
+        issue = self.project.issues.get(backend_id='P1-7')
+        self.assertEqual(issue.summary, 'Synthetic issue P1-7')
+        self.assertEqual(issue.comments.count(), 3)
+        self.assertEqual(self.server.request_counts['GET /rest/api/2/search'], 3)
+        self.assertEqual(self.server.request_counts['GET /rest/api/2/issue/{key}/comment'], 60)
+
+    def test_issue_changes_are_visible_to_backend(self):
+        self.server.update_issue('P1-1', {'fields': {'summary': 'Changed summary'}})
+        self.server.delete_issue('P1-2')
+
+        backend_issues, missing_keys = self.backend.get_backend_issues_by_keys(['P1-1', 'P1-2'])
+
+        self.assertEqual(backend_issues['P1-1'].fields.summary, 'Changed summary')
+        self.assertEqual(missing_keys, {'P1-2'})
+
+    def test_issue_and_comment_are_created(self):
+        issue = factories.IssueFactory(project=self.project, backend_id=None, summary='New issue')
+        self.backend.create_issue(issue)
+        comment = factories.CommentFactory(issue=issue, backend_id=None, message='New comment')
+        self.backend.create_comment(comment)
+
+        self.assertEqual(issue.backend_id, 'P1-31')
+        backend_issue = self.backend.get_backend_issue(issue.backend_id)
+        self.assertEqual(backend_issue.fields.summary, 'New issue')
+        self.assertEqual(self.backend.get_backend_comment(issue.backend_id, comment.backend_id).id,
+                         comment.backend_id)
+
+    def test_injected_errors_are_reraised(self):
+        self.server.error_rate = 1
+
+        with self.assertRaises(JiraBackendError):
+            self.backend.pull_priorities()
+        self.assertFalse(self.backend.ping())
+
+    def test_requests_exceeding_rate_limit_are_rejected(self):
+        self.server.rate_limit = 2
+
+        self.assertTrue(self.backend.ping())
+        self.assertTrue(self.backend.ping())
+        self.assertFalse(self.backend.ping())
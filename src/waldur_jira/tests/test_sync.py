@@ -0,0 +1,129 @@
+import datetime
+
+import mock
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+from jira.client import ResultList
+from rest_framework import test
+
+from .. import models
+from ..backend import InstanceIssueSync
+from . import factories, fixtures
+from .stub_server import StubJiraServer
+
+
+class InstanceIssueSyncTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.first_project = self.fixture.jira_project
+        self.first_project.backend_id = 'FIRST'
+        self.first_project.save()
+        self.second_project = factories.ProjectFactory(
+            service_project_link=self.fixture.service_project_link, backend_id='SECOND')
+        self.backend = self.fixture.service_settings.get_backend()
+
+        self.jira_patcher = mock.patch('waldur_jira.backend.JIRA')
+        self.jira_mock = self.jira_patcher.start()
+        self.jira_mock().fields.return_value = [{
+            'clauseNames': ['Time to resolution'],
+            'id': 'customfield_10138',
+        }]
+        self.backend_issues = [
+            self._get_backend_issue('FIRST-1', 'FIRST'),
+            self._get_backend_issue('SECOND-1', 'SECOND'),
+        ]
+        self.jira_mock().search_issues.side_effect = lambda jql, startAt, maxResults, fields, validate_query: \
+            ResultList(self.backend_issues[startAt:startAt + maxResults], _total=len(self.backend_issues))
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_issues_of_all_projects_are_fetched_with_single_search(self):
+        self.backend.sync_issues()
+
+        self.assertEqual(self.jira_mock().search_issues.call_count, 1)
+        jql = self.jira_mock().search_issues.call_args[0][0]
+        self.assertEqual(jql, 'project in ("FIRST","SECOND") ORDER BY updated ASC, key ASC')
+
+    def test_issues_are_routed_to_projects(self):
+        self.backend.sync_issues()
+
+        self.assertTrue(models.Issue.objects.filter(project=self.first_project, backend_id='FIRST-1').exists())
+        self.assertTrue(models.Issue.objects.filter(project=self.second_project, backend_id='SECOND-1').exists())
+
+    def test_only_issues_updated_since_watermark_are_requested(self):
+        watermark = timezone.now() - datetime.timedelta(minutes=30)
+        models.IssueSyncState.objects.create(settings=self.fixture.service_settings, watermark=watermark)
+
+        self.backend.sync_issues()
+
+        jql = self.jira_mock().search_issues.call_args[0][0]
+        self.assertIn('AND updated >= "-35m"', jql)
+        state = models.IssueSyncState.objects.get(settings=self.fixture.service_settings)
+        self.assertGreater(state.watermark, watermark)
+
+    @override_settings(WALDUR_JIRA=dict(settings.WALDUR_JIRA, ISSUE_IMPORT_PAGE_SIZE=1))
+    def test_next_page_starts_from_update_time_of_last_issue(self):
+        updated = (timezone.now() - datetime.timedelta(minutes=10)).strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+        for backend_issue in self.backend_issues:
+            backend_issue.fields.updated = updated
+
+        self.backend.sync_issues()
+
+        # Time is relative, because JIRA reads absolute time in time zone of JIRA user
+        jql = self.jira_mock().search_issues.call_args_list[1][0][0]
+        self.assertEqual(jql, 'project in ("FIRST","SECOND") AND updated >= "-15m" '
+                              'ORDER BY updated ASC, key ASC')
+        self.assertEqual(models.Issue.objects.filter(backend_id__in=['FIRST-1', 'SECOND-1']).count(), 2)
+
+    def _get_backend_issue(self, key, project_key):
+        return mock.Mock(**{
+            'key': key,
+            'fields.project.key': project_key,
+            'fields.summary': 'Summary of %s' % key,
+            'fields.updated': '2018-01-01T10:00:00.000+0200',
+            'fields.description': '',
+            'fields.status.name': 'Open',
+            'fields.resolution': None,
+            'fields.resolutiondate': None,
+            'fields.priority': mock.Mock(id=self.fixture.priority.backend_id),
+            'fields.issuetype': mock.Mock(id=self.fixture.issue_type.backend_id),
+            'fields.attachment': [],
+            'fields.comment.total': 0,
+            'fields.comment.comments': [],
+            'fields.customfield_10138': None,
+            'fields.assignee': None,
+            'fields.creator': None,
+            'fields.reporter': None,
+        })
+
+
+@override_settings(WALDUR_JIRA=dict(settings.WALDUR_JIRA, ISSUE_IMPORT_PAGE_SIZE=2))
+class InstanceIssueSyncPaginationTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer(issues_per_project=5).start()
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.backend = self.fixture.service_settings.get_backend()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_issues_are_not_skipped_if_they_are_modified_during_sync(self):
+        sync_page = InstanceIssueSync.sync_page
+
+        def modify_first_issue(sync, backend_issues, projects):
+            if any(backend_issue.key == 'P1-1' for backend_issue in backend_issues):
+                self.server.update_issue('P1-1', {'fields': {'summary': 'Updated summary'}})
+            return sync_page(sync, backend_issues, projects)
+
+        with mock.patch.object(InstanceIssueSync, 'sync_page', modify_first_issue):
+            self.backend.sync_issues()
+
+        keys = models.Issue.objects.filter(project=self.project).values_list('backend_id', flat=True)
+        self.assertEqual(sorted(keys), ['P1-%s' % number for number in range(1, 6)])
+        self.assertEqual(models.Issue.objects.get(backend_id='P1-1').summary, 'Updated summary')
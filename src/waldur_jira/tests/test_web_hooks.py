@@ -1,11 +1,14 @@
+import datetime
 import json
 
 import mock
 import pkg_resources
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import test, status
 
 from . import factories, fixtures
+from .stub_server import StubJiraServer
 from .. import models
 
 
@@ -22,6 +25,9 @@ class BaseTest(test.APITransactionTestCase):
             'body': 'comment message',
         })
 
+    def tearDown(self):
+        mock.patch.stopall()
+
     def _create_request_data(self, file_path):
         jira_request = pkg_resources.\
             resource_stream(__name__, file_path).read().decode()
@@ -97,3 +103,235 @@ class CommentDeleteTest(BaseTest):
         self.assertTrue(
             models.Comment.objects.filter(backend_id=self.comment.backend_id, issue=self.issue).exists()
         )
+
+
+class IssueEventRequestsTest(BaseTest):
+    JIRA_COMMENT_CREATE_REQUEST_FILE_NAME = "jira_comment_create_query.json"
+
+    def setUp(self):
+        super(IssueEventRequestsTest, self).setUp()
+        self.issue = factories.IssueFactory(project=self.fixture.jira_project,
+                                            updated=datetime.datetime(2018, 1, 1, tzinfo=timezone.utc))
+        self._create_request_data(self.JIRA_COMMENT_CREATE_REQUEST_FILE_NAME)
+        self.jira_mock().fields.return_value = [{
+            'clauseNames': ['Time to resolution'],
+            'id': 'customfield_10138',
+        }]
+        self.jira_mock().issue.return_value = self._get_backend_issue()
+        self.jira_mock().issue.reset_mock()
+        self.jira_mock().comment.reset_mock()
+
+    def test_issue_update_with_attachment_fetches_issue_once(self):
+        self.request_data['webhookEvent'] = 'jira:issue_updated'
+        self.request_data['changelog'] = {'items': [{'field': 'Attachment', 'fieldId': 'attachment'}]}
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 1)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Updated summary')
+
+    def test_legacy_issue_update_with_attachment_fetches_issue_once(self):
+        self.request_data['webhookEvent'] = 'jira:issue_updated'
+        self.request_data['issue_event_type_name'] = 'issue_updated'
+        self.request_data['issue']['fields']['comment'] = {'total': 0}
+        self.request_data['changelog'] = {'items': [{'field': 'Attachment', 'fieldId': 'attachment'}]}
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 1)
+
+    def test_legacy_comment_deletion_fetches_only_comment_ids(self):
+        self.request_data['webhookEvent'] = 'jira:issue_updated'
+        self.request_data['issue_event_type_name'] = 'issue_comment_deleted'
+        self.request_data['issue']['fields']['comment'] = {'total': 0}
+        self.jira_mock().search_issues.return_value = {
+            'issues': [{'key': self.issue.backend_id, 'fields': {'comment': {'total': 0, 'comments': []}}}],
+            'total': 1,
+        }
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        self.assertEqual(self.jira_mock().search_issues.call_count, 1)
+        self.assertEqual(self.jira_mock().search_issues.call_args[1]['fields'], 'comment')
+        self.assertTrue(self.jira_mock().search_issues.call_args[1]['json_result'])
+
+    def test_status_transition_does_not_fetch_issue(self):
+        self._set_status_transition()
+        self.request_data['issue']['fields']['customfield_10138'] = {
+            'ongoingCycle': {'paused': False, 'breachTime': {'epochMillis': 1514800800000}},
+        }
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'In Progress')
+        self.assertEqual(self.issue.resolution_sla_deadline,
+                         datetime.datetime(2018, 1, 1, 10, 0, tzinfo=timezone.utc))
+
+    def test_resolution_sla_is_cleared_when_its_cycle_is_completed_by_transition(self):
+        self.issue.resolution_sla_deadline = timezone.now()
+        self.issue.save()
+        self._set_status_transition()
+        self.request_data['issue']['fields']['customfield_10138'] = {'completedCycles': [{'breached': False}]}
+
+        self._post_event()
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'In Progress')
+        self.assertIsNone(self.issue.resolution_sla_deadline)
+
+    def test_status_transition_without_resolution_sla_triggers_full_refresh(self):
+        self._set_status_transition()
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 1)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, 'Open')
+
+    def test_fingerprint_is_refreshed_by_changelog_update(self):
+        self._set_status_transition()
+        fields = self.request_data['issue']['fields']
+        fields.update(customfield_10138=None, updated='2018-01-01T10:00:00.000+0000', attachment=[],
+                      comment={'comments': [], 'total': 2})
+        self.request_data['issue_event_type_name'] = 'issue_updated'
+
+        self._post_event()
+
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.backend_fingerprint, self.issue.get_backend().compute_issue_fingerprint(
+            self.issue.backend_id, fields['updated'], [], 2))
+
+    def test_outdated_changelog_is_ignored(self):
+        self.issue.updated = datetime.datetime(2018, 3, 1, tzinfo=timezone.utc)
+        self.issue.save()
+        self._set_status_transition()
+        self.request_data['issue']['fields'].update(customfield_10138=None, updated='2018-02-01T10:00:00.000+0000')
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        old_status = self.issue.status
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, old_status)
+        self.assertEqual(self.issue.updated, datetime.datetime(2018, 3, 1, tzinfo=timezone.utc))
+
+    def test_priority_change_is_applied_from_changelog(self):
+        priority = factories.PriorityFactory(settings=self.fixture.service_settings)
+        self.request_data['webhookEvent'] = 'jira:issue_updated'
+        self.request_data['changelog'] = {'items': [
+            {'field': 'priority', 'fieldId': 'priority', 'to': priority.backend_id, 'toString': priority.name},
+        ]}
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.priority, priority)
+
+    def test_unmapped_field_change_triggers_full_refresh(self):
+        self.request_data['webhookEvent'] = 'jira:issue_updated'
+        self.request_data['changelog'] = {'items': [
+            {'field': 'status', 'fieldId': 'status', 'to': '3', 'toString': 'In Progress'},
+            {'field': 'labels', 'fieldId': 'labels', 'to': None, 'toString': 'urgent'},
+        ]}
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 1)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.summary, 'Updated summary')
+        self.assertEqual(self.issue.status, 'Open')
+
+    def test_issue_creation_fetches_issue_once(self):
+        self.request_data['webhookEvent'] = 'jira:issue_created'
+        self.request_data['issue']['key'] = 'NEW-1'
+        self.jira_mock().issue.return_value.key = 'NEW-1'
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 1)
+        self.assertTrue(models.Issue.objects.filter(backend_id='NEW-1').exists())
+
+    def test_issue_deletion_fetches_issue_once(self):
+        self.request_data['webhookEvent'] = 'jira:issue_deleted'
+        self.jira_mock().issue.return_value = None
+
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 1)
+        self.assertFalse(models.Issue.objects.filter(id=self.issue.id).exists())
+
+    def test_comment_creation_does_not_fetch_issue(self):
+        self._post_event()
+
+        self.assertEqual(self.jira_mock().issue.call_count, 0)
+        self.assertEqual(self.jira_mock().comment.call_count, 1)
+
+    def _set_status_transition(self):
+        self.request_data['webhookEvent'] = 'jira:issue_updated'
+        self.request_data['changelog'] = {'items': [
+            {'field': 'status', 'fieldId': 'status', 'to': '3', 'toString': 'In Progress'},
+        ]}
+
+    def _post_event(self):
+        result = self.client.post(self.url, self.request_data)
+        self.assertEqual(result.status_code, status.HTTP_201_CREATED)
+
+    def _get_backend_issue(self):
+        return mock.Mock(**{
+            'key': self.issue.backend_id,
+            'fields.summary': 'Updated summary',
+            'fields.description': '',
+            'fields.status.name': 'Open',
+            'fields.resolution': None,
+            'fields.resolutiondate': None,
+            'fields.priority': mock.Mock(id=self.fixture.priority.backend_id),
+            'fields.issuetype': mock.Mock(id=self.fixture.issue_type.backend_id),
+            'fields.attachment': [],
+            'fields.comment.total': 0,
+            'fields.comment.comments': [],
+            'fields.customfield_10138': None,
+            'fields.assignee': None,
+            'fields.creator': None,
+            'fields.reporter': None,
+        })
+
+
+class IssueTransitionRequestsTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.server = StubJiraServer().start()
+        self.fixture = fixtures.JiraFixture()
+        self.fixture.service_settings.backend_url = self.server.url
+        self.fixture.service_settings.save()
+        self.project = factories.ProjectFactory(service_project_link=self.fixture.service_project_link,
+                                                backend_id='P1')
+        self.project.get_backend().import_project_issues(self.project, max_results=1)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def post_status_transition(self, status_name):
+        self.server.update_issue('P1-1', {'fields': {'status': {'name': status_name}}})
+        issue = self.server.serialize_issue('P1-1')
+        issue['fields'].pop('comment', None)
+        payload = {
+            'webhookEvent': 'jira:issue_updated',
+            'issue': issue,
+            'changelog': {'items': [{'field': 'status', 'fieldId': 'status', 'toString': status_name}]},
+        }
+        response = self.client.post(reverse('jira-web-hook'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_status_transition_does_not_make_jira_requests(self):
+        # Resolution SLA field id is fetched once per service settings
+        self.post_status_transition('In Progress')
+        self.server.reset_counters()
+
+        self.post_status_transition('Resolved')
+
+        self.assertEqual(self.server.request_count, 0)
+        self.assertEqual(models.Issue.objects.get(backend_id='P1-1').status, 'Resolved')
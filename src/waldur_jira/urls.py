@@ -17,4 +17,5 @@ def register_in(router):
 
 urlpatterns = [
     url(r'^api/jira-webhook-receiver/$', views.WebHookReceiverViewSet.as_view(), name='jira-web-hook'),
+    url(r'^api/jira-metrics/$', views.MetricsView.as_view(), name='jira-metrics'),
 ]
@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+
+import collections
+import math
+import re
+
+from django.contrib.auth import get_user_model
+from django.utils import six
+from django.utils.dateparse import parse_datetime
+
+_comment_patterns = {}
+
+
+def get_comment_pattern(template):
+    """ Compiled regex which matches footer added to comment by COMMENT_TEMPLATE. """
+    if template not in _comment_patterns:
+        User = get_user_model()
+        escaped = re.sub(r'([\^~*?:\(\)\[\]|+])', r'\\\1', template)
+        pattern = escaped.format(body='', user=User(full_name=r'(.+?)', username=r'([\w.@+-]+)'))
+        _comment_patterns[template] = re.compile(pattern)
+    return _comment_patterns[template]
+
+
+class UserResolver(object):
+    """ Resolve usernames to users keeping the most recently used ones in LRU cache.
+
+    Usernames which are not cached yet are fetched with single query.
+    Unknown usernames are cached as well, so that they are not queried again.
+    """
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.cache = collections.OrderedDict()
+
+    def resolve(self, usernames):
+        usernames = set(usernames)
+        missing = usernames - set(self.cache.keys())
+        if missing:
+            users = {user.username: user for user in get_user_model().objects.filter(username__in=missing)}
+            for username in missing:
+                self.cache[username] = users.get(username)
+
+        result = {}
+        for username in usernames:
+            user = self.cache.pop(username)
+            # Re-insert username in order to mark it as the most recently used
+            self.cache[username] = user
+            if user is not None:
+                result[username] = user
+
+        while len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+
+        return result
+
+
+def get_percentiles(values, percents=(50, 90, 99)):
+    """ Nearest-rank percentiles of values, e.g. {'p50': 1.0, 'p90': 2.0, 'p99': 3.0}. """
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        'p%s' % percent: values[max(int(math.ceil(percent / 100.0 * len(values))), 1) - 1]
+        for percent in percents
+    }
+
+
+def parse_jira_time(value):
+    """ Parse JIRA timestamp such as 2018-01-01T10:00:00.000+0200. Empty and malformed values are ignored. """
+    if not value or not isinstance(value, six.string_types):
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
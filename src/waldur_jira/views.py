@@ -1,14 +1,18 @@
 import logging
 
+from django.http import HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import generics, permissions, viewsets
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from rest_framework import generics, permissions, status, views, viewsets
+from rest_framework.decorators import detail_route, list_route
+from rest_framework.response import Response
 
 from waldur_core.core import mixins as core_mixins
 from waldur_core.structure import filters as structure_filters
 from waldur_core.structure import permissions as structure_permissions
 from waldur_core.structure import views as structure_views
 
-from . import filters, executors, models, serializers
+from . import analytics, counters, export, filters, executors, freshness, models, serializers, tasks
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +51,7 @@ class ProjectViewSet(structure_views.ImportableResourceViewSet):
     create_executor = executors.ProjectCreateExecutor
     update_executor = executors.ProjectUpdateExecutor
     delete_executor = executors.ProjectDeleteExecutor
+    pull_executor = executors.ProjectReconcileExecutor
     async_executor = False
     use_atomic_transaction = True
 
@@ -55,6 +60,60 @@ class ProjectViewSet(structure_views.ImportableResourceViewSet):
     importable_resources_backend_method = 'get_resources_for_import'
     importable_resources_serializer_class = serializers.ProjectImportableSerializer
     import_resource_serializer_class = serializers.ProjectImportSerializer
+    import_resource_executor = executors.ProjectImportFromBackendExecutor
+
+    @list_route(methods=['get'])
+    def importable_resources(self, request):
+        """
+        Paginated list of JIRA projects which are not imported yet.
+        Filter by name using ?name=<substring>, pass ?refresh=true to refresh cached catalogue.
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        service_project_link = serializer.validated_data['service_project_link']
+
+        backend = service_project_link.get_backend()
+        projects = backend.get_importable_projects(
+            name=request.query_params.get('name'),
+            refresh=request.query_params.get('refresh') in ('true', 'True', '1'),
+        )
+        page = self.paginate_queryset(projects)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @list_route(methods=['get'])
+    def issue_statistics(self, request):
+        """
+        Number of issues of JIRA projects by status, priority and type, and number of issues with breached SLA.
+        Projects are filtered in the same way as list of JIRA projects, for example,
+        by Waldur project with ?project_uuid=<UUID>, by service with ?service_uuid=<UUID>
+        or by JIRA project with ?uuid=<UUID>.
+        """
+        projects = self.filter_queryset(self.get_queryset())
+        return Response(counters.get_statistics(projects))
+
+    @list_route(methods=['get'])
+    def issue_analytics(self, request):
+        """
+        Mean time to resolution, percentiles and histogram of resolution time and share of issues
+        resolved before SLA deadline, in total and by priority, type and assignee.
+        Issues resolved within last ?window=<days> (30 by default) are analyzed.
+        JIRA projects are filtered in the same way as for issue statistics.
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        projects = self.filter_queryset(self.get_queryset())
+        return Response(analytics.get_analytics(projects, serializer.validated_data['window']))
+
+    issue_analytics_serializer_class = serializers.IssueAnalyticsSerializer
+
+    @detail_route(methods=['get'])
+    def sync_status(self, request, uuid=None):
+        """
+        Freshness of issues of JIRA project: percentiles of sync lag and webhook latency of issues
+        synchronized recently, time of the latest synchronization and age of the oldest unsynced change.
+        """
+        return Response(freshness.get_project_sync_status(self.get_object()))
 
 
 class IssueTypeViewSet(structure_views.BaseServicePropertyViewSet):
@@ -71,6 +130,18 @@ class PriorityViewSet(structure_views.BaseServicePropertyViewSet):
     lookup_field = 'uuid'
 
 
+def get_export_response(view, name, fields):
+    serializer = view.get_serializer(data=view.request.query_params)
+    serializer.is_valid(raise_exception=True)
+    export_format = serializer.validated_data['export_format']
+
+    queryset = view.filter_queryset(view.get_queryset())
+    response = StreamingHttpResponse(export.stream(queryset, export_format, fields),
+                                     content_type=export.FORMATS[export_format])
+    response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (name, export_format)
+    return response
+
+
 class IssueViewSet(JiraPermissionMixin,
                    structure_views.ResourceViewSet):
     queryset = models.Issue.objects.all()
@@ -82,6 +153,34 @@ class IssueViewSet(JiraPermissionMixin,
     async_executor = False
     use_atomic_transaction = True
 
+    def get_queryset(self):
+        # Remaining time of resolution SLA is computed from its deadline at query time
+        return super(IssueViewSet, self).get_queryset().annotate_resolution_sla()
+
+    @list_route(methods=['post'])
+    def bulk_pull(self, request):
+        """ Refresh selected issues from JIRA using few search requests. """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        issue_uuids = [issue.uuid.hex for issue in serializer.validated_data['issues']]
+        tasks.pull_issues.delay(issue_uuids)
+        return Response({'detail': 'Pull of %s issues has been scheduled.' % len(issue_uuids)},
+                        status=status.HTTP_202_ACCEPTED)
+
+    bulk_pull_serializer_class = serializers.IssueBulkPullSerializer
+    bulk_pull_permissions = [structure_permissions.is_staff]
+
+    @list_route(methods=['get'])
+    def export(self, request):
+        """
+        Stream all issues matching filters without pagination and comments,
+        in NDJSON (by default) or CSV format selected with ?export_format=ndjson|csv.
+        Comments are exported at /api/jira-comments/export/.
+        """
+        return get_export_response(self, 'issues', export.FIELDS)
+
+    export_serializer_class = serializers.ExportSerializer
+
 
 class CommentViewSet(JiraPermissionMixin,
                      structure_views.ResourceViewSet):
@@ -94,6 +193,16 @@ class CommentViewSet(JiraPermissionMixin,
     async_executor = False
     use_atomic_transaction = True
 
+    @list_route(methods=['get'])
+    def export(self, request):
+        """
+        Stream all comments matching filters without pagination,
+        in NDJSON (by default) or CSV format selected with ?export_format=ndjson|csv.
+        """
+        return get_export_response(self, 'comments', export.COMMENT_FIELDS)
+
+    export_serializer_class = serializers.ExportSerializer
+
 
 class AttachmentViewSet(JiraPermissionMixin,
                         core_mixins.CreateExecutorMixin,
@@ -125,6 +234,17 @@ class WebHookReceiverViewSet(generics.CreateAPIView):
             raise
 
 
+class MetricsView(views.APIView):
+    """ Metrics of JIRA requests made by this process and freshness of synchronized issues
+    in Prometheus text format.
+    """
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        content = generate_latest(REGISTRY) + generate_latest(freshness.registry)
+        return HttpResponse(content, content_type=CONTENT_TYPE_LATEST)
+
+
 def get_jira_projects_count(project):
     return project.quotas.get(name='nc_jira_project_count').usage
 